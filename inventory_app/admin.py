@@ -3,7 +3,7 @@ from django.contrib.auth.admin import UserAdmin
 from .models import (
     User, BusinessUnit, ProductCategory, UnitOfMeasurement,
     Product, Item, Request, RequestApproval,
-    Transaction, Notification, AuditLog
+    Transaction, Notification, AuditLog, ProductStock, ProductUnitStock
 )
 
 # -----------------------------
@@ -52,8 +52,37 @@ class UnitOfMeasurementAdmin(admin.ModelAdmin):
 class ProductAdmin(admin.ModelAdmin):
     list_display = ('name', 'category', 'unit_of_measurement', 'price_per_unit', 'reorder_level', 'is_active', 'quantity_in_stock')
     list_filter = ('is_active', 'category')
+    list_select_related = ('category', 'unit_of_measurement', 'stock')
     search_fields = ('name',)
 
+# -----------------------------
+# Stock counters (maintained from Item saves; read-only here)
+# -----------------------------
+@admin.register(ProductStock)
+class ProductStockAdmin(admin.ModelAdmin):
+    list_display = ('product', 'available', 'assigned', 'in_repair', 'retired', 'low_stock_since', 'updated_at')
+    list_select_related = ('product',)
+    search_fields = ('product__name',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(ProductUnitStock)
+class ProductUnitStockAdmin(admin.ModelAdmin):
+    list_display = ('product', 'business_unit', 'available', 'assigned', 'in_repair', 'retired', 'updated_at')
+    list_filter = ('business_unit',)
+    list_select_related = ('product', 'business_unit')
+    search_fields = ('product__name',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
 # -----------------------------
 # Item
 # -----------------------------
@@ -0,0 +1,154 @@
+import logging
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, IntegerField, Q, Value, When
+
+from . import stock
+from .models import Item
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STRATEGY = getattr(settings, 'INVENTORY_ALLOCATION_STRATEGY', 'fifo')
+# Candidates fetched per round, and rounds before giving up under contention.
+CANDIDATES = 5
+MAX_ROUNDS = 3
+
+Claim = namedtuple('Claim', 'item_id business_unit_id attempts')
+
+
+# -------------------------------------------------
+# Strategies: order the Available items for a product
+# -------------------------------------------------
+CONDITION_RANK = {'New': 0, 'Refurbished': 1, 'Used': 2, 'Damaged': 3}
+
+
+def fifo(queryset, employee):
+    return queryset.order_by('purchase_date', 'id')
+
+
+def same_unit(queryset, employee):
+    unit_id = getattr(employee, 'business_unit_id', None)
+    return queryset.annotate(
+        unit_rank=Case(When(business_unit_id=unit_id, then=Value(0)), default=Value(1), output_field=IntegerField())
+    ).order_by('unit_rank', 'purchase_date', 'id')
+
+
+def best_condition(queryset, employee):
+    return queryset.annotate(
+        condition_rank=Case(
+            *[When(Q(condition=c), then=Value(rank)) for c, rank in CONDITION_RANK.items()],
+            default=Value(len(CONDITION_RANK)), output_field=IntegerField(),
+        )
+    ).order_by('condition_rank', 'purchase_date', 'id')
+
+
+STRATEGIES = {
+    'fifo': fifo,
+    'same_unit': same_unit,
+    'best_condition': best_condition,
+}
+
+
+# -------------------------------------------------
+# Claim statistics
+# -------------------------------------------------
+class AllocationStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.monotonic()
+            self.claims = 0
+            self.conflicts = 0
+            self.exhausted = 0
+            self.claim_seconds = 0.0
+
+    def record(self, claimed, conflicts, seconds):
+        with self._lock:
+            if claimed:
+                self.claims += 1
+            else:
+                self.exhausted += 1
+            self.conflicts += conflicts
+            self.claim_seconds += seconds
+
+    def snapshot(self):
+        with self._lock:
+            elapsed = max(time.monotonic() - self.started, 1e-9)
+            attempts = self.claims + self.conflicts
+            return {
+                'claims': self.claims,
+                'conflicts': self.conflicts,
+                'exhausted': self.exhausted,
+                'claims_per_second': self.claims / elapsed,
+                'contention_ratio': self.conflicts / attempts if attempts else 0.0,
+                'avg_claim_ms': 1000 * self.claim_seconds / max(self.claims + self.exhausted, 1),
+            }
+
+
+stats = AllocationStats()
+
+
+# -------------------------------------------------
+# Claiming
+# -------------------------------------------------
+def _claim_locked(candidates, employee):
+    # Backends with SKIP LOCKED hand each concurrent claimer a different row.
+    row = candidates.select_for_update(skip_locked=True).values_list('id', 'business_unit_id').first()
+    if row is None:
+        return None
+    Item.objects.filter(pk=row[0]).update(status='Assigned', assigned_to=employee)
+    return row
+
+
+def claim_item(product_id, employee, strategy=None):
+    """
+    Atomically move one Available item of ``product_id`` to Assigned for
+    ``employee``. Returns a Claim, or None when no item could be claimed.
+
+    Each candidate is taken with a compare-and-swap
+    ``UPDATE ... WHERE id = %s AND status = 'Available'``; losing the race on a
+    row just moves on to the next candidate, so two concurrent approvals can
+    never receive the same item.
+    """
+    order = STRATEGIES[strategy or DEFAULT_STRATEGY]
+    started = time.perf_counter()
+    conflicts = 0
+    claimed = None
+    with transaction.atomic():
+        available = order(Item.objects.filter(product_id=product_id, status='Available'), employee)
+        if connection.features.has_select_for_update_skip_locked:
+            row = _claim_locked(available, employee)
+            if row is not None:
+                claimed = Claim(row[0], row[1], 1)
+        else:
+            for _ in range(MAX_ROUNDS):
+                candidates = list(available.values_list('id', 'business_unit_id')[:CANDIDATES])
+                if not candidates:
+                    break
+                for item_id, business_unit_id in candidates:
+                    won = Item.objects.filter(pk=item_id, status='Available').update(
+                        status='Assigned', assigned_to=employee
+                    )
+                    if won:
+                        claimed = Claim(item_id, business_unit_id, conflicts + 1)
+                        break
+                    conflicts += 1
+                if claimed:
+                    break
+        if claimed:
+            # The UPDATE bypasses Item signals, so move the stock counters here.
+            stock.apply_transition(
+                (product_id, claimed.business_unit_id, 'Available'),
+                (product_id, claimed.business_unit_id, 'Assigned'),
+            )
+    stats.record(claimed is not None, conflicts, time.perf_counter() - started)
+    if conflicts:
+        logger.info("Item claim for product %s lost %d race(s)", product_id, conflicts)
+    return claimed
@@ -0,0 +1,470 @@
+import hashlib
+import hmac
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.forms.models import model_to_dict
+from django.http import HttpResponse, JsonResponse
+from django.middleware.csrf import CsrfViewMiddleware
+from django.utils.dateparse import parse_date
+from django.views.decorators.csrf import csrf_exempt
+
+from . import audit, bulk, inbox, scanner, versions
+from .forms import ItemForm, ProductForm, RequestForm
+from .models import Item, Notification, Product, Request, Transaction, User
+from .pagination import MAX_PAGE_SIZE, InvalidCursor, paginate
+
+API_VERSION = 'v1'
+# token -> username; clients send `Authorization: Bearer <token>`.
+TOKENS = getattr(settings, 'INVENTORY_API_TOKENS', {})
+
+
+class ApiError(Exception):
+    def __init__(self, status, message, **extra):
+        super().__init__(message)
+        self.status = status
+        self.payload = {'error': message, **extra}
+
+
+def _unit_id(user):
+    unit = getattr(user, 'businessunit', None)
+    return unit.id if unit is not None else None
+
+
+# -------------------------------------------------
+# Role scopes: the rows each role may read (mirrors the HTML views)
+# -------------------------------------------------
+def _products(user):
+    return Product.objects.all()
+
+
+def _items(user):
+    if user.role in ('ADMIN', 'INVENTORY_OFFICER'):
+        return Item.objects.all()
+    if user.role == 'DIRECTOR':
+        return Item.objects.filter(business_unit_id=_unit_id(user))
+    return Item.objects.filter(Q(status='Available') | Q(assigned_to=user))
+
+
+def _requests(user):
+    if user.role in ('ADMIN', 'INVENTORY_OFFICER'):
+        return Request.objects.all()
+    if user.role == 'DIRECTOR':
+        return Request.objects.filter(employee__business_unit_id=_unit_id(user))
+    return Request.objects.filter(employee=user)
+
+
+def _transactions(user):
+    if user.role in ('ADMIN', 'INVENTORY_OFFICER'):
+        return Transaction.objects.all()
+    if user.role == 'DIRECTOR':
+        return Transaction.objects.filter(item__business_unit_id=_unit_id(user))
+    return Transaction.objects.filter(employee=user)
+
+
+def _notifications(user):
+    return Notification.objects.filter(recipient=user)
+
+
+# -------------------------------------------------
+# Resources
+# -------------------------------------------------
+class Resource:
+    """
+    A read/write JSON collection. ``fields`` maps public names to ORM
+    lookups; rows are read with ``.values()`` and only renamed, never
+    instantiated as models. ``depends_on`` names the version counters
+    (see versions.py) whose bump changes this collection's ETag.
+    """
+
+    def __init__(self, name, scope, fields, keys=('id',), descending=False, default_fields=None,
+                 filters=(), depends_on=(), create=None, update=None, actions=None):
+        self.name = name
+        self.scope = scope
+        self.fields = fields
+        self.keys = keys
+        self.descending = descending
+        self.default_fields = default_fields or list(fields)
+        self.filters = filters
+        self.depends_on = depends_on
+        self.create = create
+        self.update = update
+        self.actions = actions or {}
+
+    def selected(self, request):
+        names = [f for f in request.GET.get('fields', '').split(',') if f]
+        if not names:
+            return self.default_fields
+        unknown = [f for f in names if f not in self.fields]
+        if unknown:
+            raise ApiError(400, 'Unknown field(s).', fields=unknown, available=list(self.fields))
+        return names
+
+    def queryset(self, request):
+        qs = self.scope(request.user)
+        for name in self.filters:
+            value = request.GET.get(name)
+            if value is not None:
+                try:
+                    qs = qs.filter(**{self.fields[name]: value})
+                except (ValidationError, ValueError, TypeError):
+                    raise ApiError(400, f'Invalid value for {name}.')
+        return qs
+
+    def serialize(self, rows, names):
+        lookups = [self.fields[n] for n in names]
+        return [{n: row[lookup] for n, lookup in zip(names, lookups)} for row in rows]
+
+    def lookups(self, names):
+        return list(dict.fromkeys([self.fields[n] for n in names] + list(self.keys)))
+
+    def get_row(self, request, pk, names=None):
+        names = names or self.default_fields
+        row = self.scope(request.user).filter(pk=pk).values(*self.lookups(names)).first()
+        if row is None:
+            raise ApiError(404, 'Not found.')
+        return self.serialize([row], names)[0]
+
+    def etag(self, request, *parts):
+        # Everything the response depends on, without touching the database.
+        # A director's scope also follows their unit and its members.
+        depends_on = self.depends_on
+        if request.user.role == 'DIRECTOR':
+            depends_on += ('businessunit',)
+        raw = '|'.join(map(str, (
+            API_VERSION, self.name, versions.get(*depends_on), request.user.pk, request.user.role,
+            sorted(request.GET.lists()), *parts,
+        )))
+        return f'W/"{hashlib.sha1(raw.encode()).hexdigest()}"'
+
+
+# -------------------------------------------------
+# Writes
+# -------------------------------------------------
+def _require_role(request, *roles):
+    if request.user.role not in roles:
+        raise ApiError(403, 'Forbidden.')
+
+
+def _form_save(form):
+    if not form.is_valid():
+        raise ApiError(400, 'Validation failed.', errors=form.errors.get_json_data())
+    return form.save()
+
+
+def _partial(form_class, instance, payload, **kwargs):
+    data = model_to_dict(instance, fields=form_class._meta.fields)
+    data.update(payload)
+    return form_class(data, instance=instance, **kwargs)
+
+
+def create_product(request, payload):
+    _require_role(request, 'INVENTORY_OFFICER')
+    product = _form_save(ProductForm(payload))
+    audit.record(request.user, 'Create', 'Product', product.id, f'{request.user.username} added product {product.name}')
+    return product.pk
+
+
+def update_product(request, pk, payload):
+    _require_role(request, 'INVENTORY_OFFICER')
+    product = _lookup(Product.objects.all(), pk)
+    _form_save(_partial(ProductForm, product, payload))
+    audit.record(request.user, 'Update', 'Product', product.id, f'{request.user.username} updated product {product.name}')
+
+
+def create_item(request, payload):
+    _require_role(request, 'INVENTORY_OFFICER')
+    item = _form_save(ItemForm(payload))
+    audit.record(request.user, 'Create', 'Item', item.id, f'{request.user.username} added item {item.serial_number}')
+    return item.pk
+
+
+def update_item(request, pk, payload):
+    _require_role(request, 'INVENTORY_OFFICER')
+    item = _lookup(Item.objects.all(), pk)
+    _form_save(_partial(ItemForm, item, payload))
+    audit.record(request.user, 'Update', 'Item', item.id, f'{request.user.username} updated item {item.serial_number}')
+
+
+def create_request(request, payload):
+    _require_role(request, 'EMPLOYEE')
+    form = RequestForm(payload, user=request.user)
+    if not form.is_valid():
+        raise ApiError(400, 'Validation failed.', errors=form.errors.get_json_data())
+    req = form.save(commit=False)
+    req.employee = request.user
+    req.save()
+    audit.record(request.user, 'Create', 'Request', req.id, f'{request.user.username} requested item {req.product}')
+    return req.pk
+
+
+def _request_action(action):
+    def run(request, pk, payload):
+        outcome = bulk.process_requests(request.user, [pk], action)[pk]
+        if outcome in ('not_found', 'forbidden'):
+            raise ApiError(404 if outcome == 'not_found' else 403, outcome)
+        if outcome not in ('approved', 'rejected'):
+            raise ApiError(409, outcome)
+        return outcome
+    return run
+
+
+def create_transaction(request, payload):
+    # Employees borrow for themselves, exactly like borrow_item.
+    _require_role(request, 'EMPLOYEE')
+    serial = Item.objects.filter(pk=payload.get('item')).values_list('serial_number', flat=True).first()
+    if serial is None:
+        raise ApiError(400, 'Unknown item.')
+    outcome, loan = scanner.check_out(
+        request.user, serial, request.user,
+        expected_return_date=_date(payload.get('expected_return_date')),
+        condition=payload.get('condition_on_borrow') or None,
+        remarks=payload.get('remarks') or '',
+    )
+    if loan is None:
+        raise ApiError(400 if outcome == 'invalid_condition' else 409, outcome)
+    return loan.pk
+
+
+def return_transaction(request, pk, payload):
+    loan = _lookup(_transactions(request.user), pk)
+    if request.user.role != 'INVENTORY_OFFICER' and loan.employee_id != request.user.id:
+        raise ApiError(403, 'Forbidden.')
+    outcome, closed = scanner.check_in(
+        request.user, loan.item.serial_number,
+        condition=payload.get('condition_on_return') or None,
+        remarks=payload.get('remarks') or '',
+    )
+    if closed is None:
+        raise ApiError(400 if outcome == 'invalid_condition' else 409, outcome)
+    return outcome
+
+
+def update_notification(request, pk, payload):
+    _lookup(_notifications(request.user), pk)
+    if payload.get('is_read') is not True:
+        raise ApiError(400, 'Only {"is_read": true} is supported.')
+    inbox.mark_read(request.user, [pk])
+
+
+def _lookup(queryset, pk):
+    obj = queryset.filter(pk=pk).first()
+    if obj is None:
+        raise ApiError(404, 'Not found.')
+    return obj
+
+
+def _date(value):
+    if not value:
+        return None
+    try:
+        parsed = parse_date(str(value))
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ApiError(400, 'Dates must be YYYY-MM-DD.')
+    return parsed
+
+
+RESOURCES = {r.name: r for r in [
+    Resource(
+        'products', _products,
+        fields={
+            'id': 'id', 'name': 'name', 'category_id': 'category_id', 'category': 'category__name',
+            'unit_of_measurement_id': 'unit_of_measurement_id', 'price_per_unit': 'price_per_unit',
+            'reorder_level': 'reorder_level', 'is_active': 'is_active', 'available': 'stock__available',
+        },
+        filters=('category_id', 'is_active'),
+        depends_on=('product', 'item'),
+        create=create_product, update=update_product,
+    ),
+    Resource(
+        'items', _items,
+        fields={
+            'id': 'id', 'serial_number': 'serial_number', 'product_id': 'product_id', 'product': 'product__name',
+            'status': 'status', 'condition': 'condition', 'location': 'location',
+            'purchase_date': 'purchase_date', 'warranty_expiry_date': 'warranty_expiry_date',
+            'assigned_to_id': 'assigned_to_id', 'business_unit_id': 'business_unit_id',
+        },
+        filters=('status', 'product_id', 'business_unit_id'),
+        depends_on=('item', 'product'),
+        create=create_item, update=update_item,
+    ),
+    Resource(
+        'requests', _requests,
+        fields={
+            'id': 'id', 'employee_id': 'employee_id', 'employee': 'employee__username',
+            'product_id': 'product_id', 'product': 'product__name', 'reason': 'reason',
+            'status': 'status', 'request_date': 'request_date', 'final_approval_date': 'final_approval_date',
+            'remarks': 'remarks',
+        },
+        keys=('request_date', 'id'), descending=True,
+        filters=('status', 'product_id'),
+        depends_on=('request', 'product'),
+        create=create_request,
+        actions={'approve': _request_action('approve'), 'reject': _request_action('reject')},
+    ),
+    Resource(
+        'transactions', _transactions,
+        fields={
+            'id': 'id', 'item_id': 'item_id', 'serial_number': 'item__serial_number',
+            'employee_id': 'employee_id', 'employee': 'employee__username', 'status': 'status',
+            'borrow_date': 'borrow_date', 'expected_return_date': 'expected_return_date',
+            'actual_return_date': 'actual_return_date', 'condition_on_borrow': 'condition_on_borrow',
+            'condition_on_return': 'condition_on_return', 'remarks': 'remarks',
+        },
+        keys=('borrow_date', 'id'), descending=True,
+        filters=('status', 'item_id', 'employee_id'),
+        depends_on=('transaction', 'item'),
+        create=create_transaction,
+        actions={'return': return_transaction},
+    ),
+    Resource(
+        'notifications', _notifications,
+        fields={'id': 'id', 'message': 'message', 'is_read': 'is_read', 'timestamp': 'timestamp'},
+        keys=('timestamp', 'id'), descending=True,
+        depends_on=('notification',),
+        update=update_notification,
+    ),
+]}
+
+
+# -------------------------------------------------
+# Dispatch
+# -------------------------------------------------
+def _token_user(request):
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme != 'Bearer' or not token:
+        return None
+    for known, username in TOKENS.items():
+        if hmac.compare_digest(token, known):
+            return User.objects.filter(username=username, is_active=True).first()
+    return None
+
+
+def _csrf_failure(request):
+    check = CsrfViewMiddleware(lambda r: None)
+    check.process_request(request)
+    return check.process_view(request, None, (), {})
+
+
+def endpoint(view):
+    # Token clients (ERP/BI) carry no cookies, so CSRF is only enforced for
+    # browser sessions, as CsrfViewMiddleware would.
+    @csrf_exempt
+    @wraps(view)
+    def wrapper(request, resource, *args, **kwargs):
+        if 'Authorization' in request.headers:
+            user = _token_user(request)
+            if user is None:
+                return JsonResponse({'error': 'Invalid token.'}, status=401)
+            request.user = user
+        elif not request.user.is_authenticated:
+            return JsonResponse({'error': 'Authentication required.'}, status=401)
+        else:
+            failure = _csrf_failure(request)
+            if failure is not None:
+                return JsonResponse({'error': 'CSRF verification failed.'}, status=403)
+        res = RESOURCES.get(resource)
+        if res is None:
+            return JsonResponse({'error': 'Unknown resource.'}, status=404)
+        try:
+            return view(request, res, *args, **kwargs)
+        except ApiError as e:
+            return JsonResponse(e.payload, status=e.status)
+        except InvalidCursor:
+            return JsonResponse({'error': 'Invalid cursor.'}, status=400)
+    return wrapper
+
+
+def _body(request):
+    try:
+        payload = json.loads(request.body or b'{}')
+    except ValueError:
+        raise ApiError(400, 'Invalid JSON.')
+    if not isinstance(payload, dict):
+        raise ApiError(400, 'Expected a JSON object.')
+    return payload
+
+
+def _not_modified(request, etag):
+    return etag in [t.strip() for t in request.headers.get('If-None-Match', '').split(',')]
+
+
+def _with_etag(response, etag):
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def _ids(request):
+    try:
+        ids = [int(i) for i in request.GET['ids'].split(',') if i]
+    except ValueError:
+        raise ApiError(400, 'ids must be a comma-separated list of integers.')
+    if len(ids) > MAX_PAGE_SIZE:
+        raise ApiError(400, f'At most {MAX_PAGE_SIZE} ids per request.')
+    return list(dict.fromkeys(ids))
+
+
+@endpoint
+def collection(request, res):
+    if request.method == 'POST':
+        if res.create is None:
+            raise ApiError(405, 'Method not allowed.')
+        pk = res.create(request, _body(request))
+        return JsonResponse(res.get_row(request, pk), status=201)
+    if request.method != 'GET':
+        raise ApiError(405, 'Method not allowed.')
+
+    etag = res.etag(request)
+    if _not_modified(request, etag):
+        return _with_etag(HttpResponse(status=304), etag)
+    names = res.selected(request)
+    qs = res.queryset(request)
+
+    if 'ids' in request.GET:
+        ids = _ids(request)
+        rows = {row['id']: row for row in qs.filter(pk__in=ids).values(*res.lookups(names + ['id']))}
+        body = {
+            'results': res.serialize([rows[i] for i in ids if i in rows], names),
+            'missing': [i for i in ids if i not in rows],
+        }
+    else:
+        page = paginate(request, qs.values(*res.lookups(names)), res.keys, res.descending)
+        body = {
+            'results': res.serialize(page.object_list, names),
+            'next_cursor': page.next_cursor,
+            'prev_cursor': page.prev_cursor,
+            'page_size': page.page_size,
+        }
+    return _with_etag(JsonResponse(body), etag)
+
+
+@endpoint
+def detail(request, res, pk):
+    if request.method == 'PATCH':
+        if res.update is None:
+            raise ApiError(405, 'Method not allowed.')
+        res.update(request, pk, _body(request))
+        return JsonResponse(res.get_row(request, pk))
+    if request.method != 'GET':
+        raise ApiError(405, 'Method not allowed.')
+    etag = res.etag(request, pk)
+    if _not_modified(request, etag):
+        return _with_etag(HttpResponse(status=304), etag)
+    return _with_etag(JsonResponse(res.get_row(request, pk, res.selected(request))), etag)
+
+
+@endpoint
+def action(request, res, pk, name):
+    run = res.actions.get(name)
+    if run is None:
+        raise ApiError(404, 'Unknown action.')
+    if request.method != 'POST':
+        raise ApiError(405, 'Method not allowed.')
+    outcome = run(request, pk, _body(request))
+    return JsonResponse({'outcome': outcome, 'object': res.get_row(request, pk)})
@@ -6,3 +6,16 @@ class InventoryAppConfig(AppConfig):
 
     def ready(self):
         import inventory_app.signals
+
+
+def start_background_tasks():
+    """
+    Start the in-process background threads (outbox worker, overdue sweeps,
+    stand-in replica refreshes). Called from the WSGI/ASGI entry points, which runserver loads
+    too, so migrate, shell and other management commands never start them.
+    """
+    from inventory_app import outbox, overdue, replica
+    if outbox.MODE == 'thread':
+        outbox.worker.start()
+    overdue.start_scheduler()
+    replica.start_refresher()
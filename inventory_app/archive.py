@@ -0,0 +1,338 @@
+import datetime
+import gzip
+import json
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import AuditLog
+from .pagination import seek_filter
+
+ARCHIVE_DIR = Path(getattr(settings, 'INVENTORY_AUDIT_ARCHIVE_DIR', settings.BASE_DIR / 'archive' / 'auditlog'))
+RETENTION_DAYS = getattr(settings, 'INVENTORY_AUDIT_RETENTION_DAYS', 365)
+INDEX_NAME = 'index.json'
+
+ROW_FIELDS = ('id', 'user_id', 'user__username', 'action_type', 'object_type', 'object_id', 'timestamp', 'description')
+
+
+# -------------------------------------------------
+# Segment index
+# -------------------------------------------------
+# index.json maps each month ("2024-03") to its segment file, row count,
+# timestamp bounds and the users that appear in it, so a query only opens
+# segments that can contain matching rows. Each segment is a run of gzip
+# members, one per archiving batch, and ``chunks`` records every member's
+# byte offset, length, id and timestamp range so a reader can seek straight
+# to the members it needs instead of decompressing the whole month.
+def load_index(directory=None):
+    path = Path(directory or ARCHIVE_DIR) / INDEX_NAME
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'segments': {}}
+
+
+def _save_index(index, directory):
+    path = Path(directory) / INDEX_NAME
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _to_record(row):
+    return {
+        'id': row['id'],
+        'user_id': row['user_id'],
+        'user': row['user__username'],
+        'action_type': row['action_type'],
+        'object_type': row['object_type'],
+        'object_id': row['object_id'],
+        'timestamp': row['timestamp'].isoformat(),
+        'description': row['description'],
+    }
+
+
+def _append_chunk(path, records, end):
+    """
+    Write ``records`` as one gzip member at byte ``end`` of the segment and
+    return its ``(offset, length)``. Anything past ``end`` was left by a run
+    that crashed before saving the index, so it is overwritten.
+    """
+    with open(path, 'r+b' if path.exists() else 'wb') as raw:
+        raw.truncate(end)
+        raw.seek(end)
+        with gzip.GzipFile(fileobj=raw, mode='wb') as gz:
+            for record in records:
+                gz.write(json.dumps(record, separators=(',', ':')).encode())
+                gz.write(b'\n')
+        length = raw.tell() - end
+        raw.flush()
+        os.fsync(raw.fileno())
+    return end, length
+
+
+def _segment_end(meta):
+    last = meta['chunks'][-1] if meta['chunks'] else None
+    return last['offset'] + last['length'] if last else 0
+
+
+def _archived_ids(directory, meta, low, high):
+    """Ids between ``low`` and ``high`` already stored in the segment."""
+    ids = set()
+    for chunk in meta['chunks']:
+        # Batches go out in id order, so only a re-run after a crash overlaps a stored chunk.
+        if chunk['min_id'] <= high and chunk['max_id'] >= low:
+            ids.update(record['id'] for record in _read_chunk(directory, meta, chunk))
+    return ids
+
+
+# -------------------------------------------------
+# Archiving
+# -------------------------------------------------
+def archive(older_than_days=None, batch_size=2000, dry_run=False, directory=None):
+    """
+    Move AuditLog rows older than the retention horizon into monthly
+    ``auditlog-YYYY-MM.jsonl.gz`` segments. Each batch is written, fsynced and
+    recorded in the index before its rows are deleted. A crash before the
+    index is saved leaves bytes that no reader looks at and the next run
+    overwrites; a crash after it leaves rows that the next run finds already
+    stored and only deletes. Returns ``{month: rows_archived}``.
+    """
+    directory = Path(directory or ARCHIVE_DIR)
+    days = RETENTION_DAYS if older_than_days is None else older_than_days
+    cutoff = timezone.now() - datetime.timedelta(days=days)
+    base = AuditLog.objects.filter(timestamp__lt=cutoff).order_by('id').values(*ROW_FIELDS)
+
+    if not dry_run:
+        directory.mkdir(parents=True, exist_ok=True)
+    index = load_index(directory)
+    totals = {}
+    last_id = 0
+    while True:
+        rows = list(base.filter(id__gt=last_id)[:batch_size])
+        if not rows:
+            break
+        last_id = rows[-1]['id']
+
+        by_month = {}
+        for row in rows:
+            by_month.setdefault(row['timestamp'].strftime('%Y-%m'), []).append(row)
+        for month, month_rows in by_month.items():
+            totals[month] = totals.get(month, 0) + len(month_rows)
+        if dry_run:
+            continue
+
+        for month, month_rows in sorted(by_month.items()):
+            filename = f'auditlog-{month}.jsonl.gz'
+            meta = index['segments'].setdefault(month, {
+                'file': filename, 'rows': 0, 'min_ts': None, 'max_ts': None, 'user_ids': [], 'chunks': [],
+            })
+            stored = _archived_ids(directory, meta, month_rows[0]['id'], month_rows[-1]['id'])
+            month_rows = [r for r in month_rows if r['id'] not in stored]
+            if not month_rows:
+                continue
+            offset, length = _append_chunk(directory / filename, [_to_record(r) for r in month_rows],
+                                           _segment_end(meta))
+            stamps = [r['timestamp'].isoformat() for r in month_rows]
+            meta['chunks'].append({
+                'offset': offset, 'length': length, 'rows': len(month_rows),
+                'min_id': month_rows[0]['id'], 'max_id': month_rows[-1]['id'],
+                'min_ts': min(stamps), 'max_ts': max(stamps),
+            })
+            meta['rows'] += len(month_rows)
+            meta['min_ts'] = min(filter(None, [meta['min_ts'], min(stamps)]))
+            meta['max_ts'] = max(filter(None, [meta['max_ts'], max(stamps)]))
+            meta['user_ids'] = sorted(set(meta['user_ids']) | {r['user_id'] for r in month_rows})
+        _save_index(index, directory)
+        with transaction.atomic():
+            AuditLog.objects.filter(id__in=[r['id'] for r in rows]).delete()
+    return totals
+
+
+# -------------------------------------------------
+# Hot + cold queries
+# -------------------------------------------------
+def _hydrate(record):
+    record = dict(record)
+    record['timestamp'] = parse_datetime(record['timestamp'])
+    return record
+
+
+def _hot_row(row):
+    return {
+        'id': row['id'],
+        'user_id': row['user_id'],
+        'user': row['user__username'],
+        'action_type': row['action_type'],
+        'object_type': row['object_type'],
+        'object_id': row['object_id'],
+        'timestamp': row['timestamp'],
+        'description': row['description'],
+    }
+
+
+def _matches(record, user_id, start, end, action_type, object_type):
+    if user_id is not None and record['user_id'] != user_id:
+        return False
+    if start is not None and record['timestamp'] < start:
+        return False
+    if end is not None and record['timestamp'] >= end:
+        return False
+    if action_type and record['action_type'] != action_type:
+        return False
+    if object_type and record['object_type'] != object_type:
+        return False
+    return True
+
+
+def _segments_for(index, user_id, start, end, newest_first=True):
+    for month, meta in sorted(index['segments'].items(), reverse=newest_first):
+        if user_id is not None and user_id not in meta['user_ids']:
+            continue
+        if _in_range(meta, start, end):
+            yield meta
+
+
+def _in_range(meta, start, end):
+    if start is not None and parse_datetime(meta['max_ts']) < start:
+        return False
+    if end is not None and parse_datetime(meta['min_ts']) >= end:
+        return False
+    return True
+
+
+def _chunks_for(index, user_id, start, end, newest_first=True):
+    """
+    ``(segment, chunk)`` pairs that can match, newest-first by their newest
+    row (or oldest-first by their oldest row).
+    """
+    pairs = [
+        (meta, chunk)
+        for meta in _segments_for(index, user_id, start, end, newest_first)
+        for chunk in meta['chunks']
+        if _in_range(chunk, start, end)
+    ]
+    if newest_first:
+        pairs.sort(key=lambda pair: parse_datetime(pair[1]['max_ts']), reverse=True)
+    else:
+        pairs.sort(key=lambda pair: parse_datetime(pair[1]['min_ts']))
+    return pairs
+
+
+def _read_chunk(directory, meta, chunk, user_id=None, start=None, end=None, action_type=None, object_type=None):
+    with open(Path(directory) / meta['file'], 'rb') as f:
+        f.seek(chunk['offset'])
+        data = gzip.decompress(f.read(chunk['length']))
+    for line in data.splitlines():
+        record = _hydrate(json.loads(line))
+        if _matches(record, user_id, start, end, action_type, object_type):
+            yield record
+
+
+def _read_segment(directory, meta, user_id, start, end, action_type, object_type):
+    for chunk in meta['chunks']:
+        if _in_range(chunk, start, end):
+            yield from _read_chunk(directory, meta, chunk, user_id, start, end, action_type, object_type)
+
+
+def read_segments(user_id=None, start=None, end=None, action_type=None, object_type=None, directory=None,
+                  newest_first=True):
+    """Yield archived rows (timestamps parsed) from every segment that can match, a month at a time."""
+    directory = Path(directory or ARCHIVE_DIR)
+    index = load_index(directory)
+    for meta in _segments_for(index, user_id, start, end, newest_first):
+        yield from _read_segment(directory, meta, user_id, start, end, action_type, object_type)
+
+
+def archived_until(directory=None):
+    """Newest archived timestamp, or None if nothing has been archived."""
+    index = load_index(directory)
+    stamps = [parse_datetime(m['max_ts']) for m in index['segments'].values() if m['max_ts']]
+    return max(stamps) if stamps else None
+
+
+def audit_fetch(user=None, start=None, end=None, action_type=None, object_type=None, directory=None):
+    """
+    Build a ``fetch(values, after, limit)`` callable for
+    ``pagination.paginate_with`` that serves newest-first (timestamp, id)
+    pages from the live table and only opens archive segments once the page
+    reaches back past the newest archived row.
+    """
+    user_id = user.id if user is not None else None
+    hot = AuditLog.objects.all()
+    if user_id is not None:
+        hot = hot.filter(user_id=user_id)
+    if start is not None:
+        hot = hot.filter(timestamp__gte=start)
+    if end is not None:
+        hot = hot.filter(timestamp__lt=end)
+    if action_type:
+        hot = hot.filter(action_type=action_type)
+    if object_type:
+        hot = hot.filter(object_type=object_type)
+    hot = hot.values(*ROW_FIELDS)
+    boundary = archived_until(directory)
+    segment_dir = Path(directory or ARCHIVE_DIR)
+
+    def fetch(values, after, limit):
+        qs = hot
+        if values is not None:
+            qs = qs.filter(seek_filter(['timestamp', 'id'], values, True, after))
+        qs = qs.order_by('-timestamp', '-id') if after else qs.order_by('timestamp', 'id')
+        rows = [_hot_row(r) for r in qs[:limit]]
+
+        # Only the oldest-first walk ("prev") or a short newest-first page can
+        # need archived rows; archived rows are all older than the live ones.
+        if boundary is None:
+            return rows
+        if after and len(rows) == limit and rows[-1]['timestamp'] > boundary:
+            return rows
+        if values is not None and not after and values[0] > boundary:
+            return rows
+
+        # Walk chunks in listing order and stop once ``limit`` rows sort
+        # before anything the next chunk could hold, so a page only
+        # decompresses the chunks around its cursor.
+        seen = {r['id'] for r in rows}
+        key = lambda r: (r['timestamp'], r['id'])
+        cursor_key = tuple(values) if values is not None else None
+        chunks = _chunks_for(load_index(directory), user_id, start, end, newest_first=after)
+        cold = []
+        for n, (meta, chunk) in enumerate(chunks):
+            if cursor_key is not None:
+                if after and parse_datetime(chunk['min_ts']) > cursor_key[0]:
+                    continue
+                if not after and parse_datetime(chunk['max_ts']) < cursor_key[0]:
+                    continue
+            for record in _read_chunk(segment_dir, meta, chunk, user_id, start, end, action_type, object_type):
+                if record['id'] in seen:
+                    continue
+                seen.add(record['id'])
+                if cursor_key is not None:
+                    if after and not key(record) < cursor_key:
+                        continue
+                    if not after and not key(record) > cursor_key:
+                        continue
+                cold.append(record)
+            if n + 1 == len(chunks):
+                break
+            if after:
+                edge = parse_datetime(chunks[n + 1][1]['max_ts'])
+                reached = sum(1 for r in rows + cold if r['timestamp'] > edge)
+            else:
+                edge = parse_datetime(chunks[n + 1][1]['min_ts'])
+                reached = sum(1 for r in rows + cold if r['timestamp'] < edge)
+            if reached >= limit:
+                break
+        merged = sorted(rows + cold, key=key, reverse=after)
+        return merged[:limit]
+
+    return fetch
@@ -0,0 +1,187 @@
+import atexit
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from functools import partial
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from .models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+# 'sync'       - write each entry as it is recorded, inside the caller's transaction
+# 'buffered'   - collect entries per request/scope and bulk_create them once at the end
+# 'background' - hand each scope's entries to a worker thread that coalesces across requests
+MODE = getattr(settings, 'INVENTORY_AUDIT_MODE', 'buffered')
+QUEUE_SIZE = getattr(settings, 'INVENTORY_AUDIT_QUEUE_SIZE', 10000)
+BATCH_SIZE = getattr(settings, 'INVENTORY_AUDIT_BATCH_SIZE', 500)
+FLUSH_INTERVAL = getattr(settings, 'INVENTORY_AUDIT_FLUSH_INTERVAL', 0.5)
+
+_local = threading.local()
+
+
+def _scope_buffer():
+    stack = getattr(_local, 'stack', None)
+    return stack[-1] if stack else None
+
+
+def _write(entries):
+    if entries:
+        AuditLog.objects.bulk_create(entries, batch_size=BATCH_SIZE)
+
+
+# -------------------------------------------------
+# Recording
+# -------------------------------------------------
+def record(user, action_type, object_type, object_id, description, mode=None):
+    """
+    Record an AuditLog entry. In 'sync' mode it is inserted straight away and
+    shares the fate of the surrounding transaction; otherwise it only reaches
+    the buffer (or the table, outside a collect() scope) once that transaction
+    commits.
+    """
+    entry = AuditLog(
+        user=user,
+        action_type=action_type,
+        object_type=object_type,
+        object_id=object_id,
+        description=description,
+    )
+    mode = mode or MODE
+    buffer = _scope_buffer()
+    if mode == 'sync':
+        entry.save()
+    elif buffer is None:
+        transaction.on_commit(partial(_write, [entry]))
+    else:
+        transaction.on_commit(partial(buffer.append, entry))
+    return entry
+
+
+def flush(entries, mode=None):
+    mode = mode or MODE
+    if not entries:
+        return
+    if mode == 'background':
+        get_flusher().submit(entries)
+    else:
+        _write(entries)
+
+
+@contextmanager
+def collect(mode=None):
+    """
+    Buffer every ``record()`` made inside the block and write them with a
+    single bulk_create (or hand them to the background flusher) on exit.
+    """
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    buffer = []
+    stack.append(buffer)
+    try:
+        yield buffer
+    finally:
+        stack.pop()
+        flush(buffer, mode)
+
+
+class AuditBufferMiddleware:
+    """Collects the audit entries of one request and writes them in one batch."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if MODE == 'sync':
+            return self.get_response(request)
+        with collect():
+            return self.get_response(request)
+
+
+# -------------------------------------------------
+# Optional background flusher
+# -------------------------------------------------
+class BackgroundFlusher:
+    """
+    Daemon thread draining a bounded queue of entries, coalescing whatever
+    has arrived within FLUSH_INTERVAL into one bulk_create. When the queue is
+    full, the submitting request writes its own batch instead of dropping it.
+    """
+
+    def __init__(self, maxsize=QUEUE_SIZE, batch_size=BATCH_SIZE, interval=FLUSH_INTERVAL):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.batch_size = batch_size
+        self.interval = interval
+        self.written = 0
+        self.overflows = 0
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='audit-flusher', daemon=True)
+                self._thread.start()
+
+    def submit(self, entries):
+        self.start()
+        for i, entry in enumerate(entries):
+            try:
+                self.queue.put_nowait(entry)
+            except queue.Full:
+                self.overflows += 1
+                _write(entries[i:])
+                return
+
+    def _drain(self, first=None):
+        batch = [first] if first is not None else []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            try:
+                first = self.queue.get(timeout=self.interval)
+            except queue.Empty:
+                continue
+            batch = self._drain(first)
+            try:
+                close_old_connections()
+                _write(batch)
+                self.written += len(batch)
+            except Exception:
+                logger.exception("Failed to write %d audit log entries", len(batch))
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def drain(self):
+        """Synchronously write everything still queued (used at shutdown)."""
+        batch = self._drain()
+        while batch:
+            _write(batch)
+            self.written += len(batch)
+            for _ in batch:
+                self.queue.task_done()
+            batch = self._drain()
+
+
+_flusher = None
+_flusher_lock = threading.Lock()
+
+
+def get_flusher():
+    global _flusher
+    with _flusher_lock:
+        if _flusher is None:
+            _flusher = BackgroundFlusher()
+            atexit.register(_flusher.drain)
+        return _flusher
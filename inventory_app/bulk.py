@@ -0,0 +1,115 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import allocation, audit, dashboards, outbox, versions
+from .models import Request, RequestApproval
+
+MAX_BATCH = getattr(settings, 'INVENTORY_BULK_MAX', 1000)
+
+# (role, current status) -> status after approve / reject; mirrors approve_request and reject_request.
+TRANSITIONS = {
+    'approve': {
+        ('DIRECTOR', 'PENDING_DIRECTOR'): 'PENDING_OFFICER',
+        ('INVENTORY_OFFICER', 'PENDING_OFFICER'): 'APPROVED',
+    },
+    'reject': {
+        ('DIRECTOR', 'PENDING_DIRECTOR'): 'REJECTED_DIRECTOR',
+        ('INVENTORY_OFFICER', 'PENDING_OFFICER'): 'REJECTED_OFFICER',
+    },
+}
+
+
+class _NoStock(Exception):
+    pass
+
+
+def _director_unit_id(user):
+    unit = getattr(user, 'businessunit', None)
+    return unit.id if unit is not None else None
+
+
+def process_requests(user, ids, action):
+    """
+    Approve or reject many requests in one transaction and return
+    ``{request_id: outcome}``. Outcomes: approved, rejected, not_found,
+    forbidden, already_processed, no_stock.
+
+    Each status change is still a compare-and-swap on the request row, and
+    each officer approval claims its item through allocation.claim_item, so
+    the batch is safe against concurrent single-row approvals. Approval
+    rows and audit entries are written with one bulk insert each, and one
+    outbox event (queued here, since bulk_create skips post_save) notifies
+    the whole batch with a single insert. A director without a business unit
+    is refused every request. More than MAX_BATCH distinct ids raise
+    ValueError.
+    """
+    transitions = TRANSITIONS[action]
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > MAX_BATCH:
+        raise ValueError(f'At most {MAX_BATCH} requests per batch.')
+    if user.role not in {role for role, _ in transitions}:
+        return dict.fromkeys(ids, 'forbidden')
+    director_unit_id = _director_unit_id(user) if user.role == 'DIRECTOR' else None
+    if user.role == 'DIRECTOR' and director_unit_id is None:
+        return dict.fromkeys(ids, 'forbidden')
+    outcomes = {}
+    approvals = []
+    done = []
+    statuses = set()
+
+    with transaction.atomic():
+        requests = Request.objects.select_related('employee', 'product').in_bulk(ids)
+        now = timezone.now()
+
+        for request_id in ids:
+            req = requests.get(request_id)
+            if req is None:
+                outcomes[request_id] = 'not_found'
+                continue
+            if user.role == 'DIRECTOR' and req.employee.business_unit_id != director_unit_id:
+                outcomes[request_id] = 'forbidden'
+                continue
+            new_status = transitions.get((user.role, req.status))
+            if new_status is None:
+                outcomes[request_id] = 'already_processed'
+                continue
+
+            changes = {'status': new_status}
+            if new_status == 'APPROVED':
+                changes['final_approval_date'] = now
+            try:
+                with transaction.atomic():
+                    if not Request.objects.filter(pk=req.pk, status=req.status).update(**changes):
+                        outcomes[request_id] = 'already_processed'
+                        continue
+                    if new_status == 'APPROVED' and allocation.claim_item(req.product_id, req.employee) is None:
+                        raise _NoStock
+            except _NoStock:
+                outcomes[request_id] = 'no_stock'
+                continue
+
+            statuses.update((req.status, new_status))
+            for field, value in changes.items():
+                setattr(req, field, value)
+            approvals.append(RequestApproval(
+                request=req,
+                approver=user,
+                role=user.role,
+                status='APPROVED' if action == 'approve' else 'REJECTED',
+            ))
+            done.append(req)
+            outcomes[request_id] = 'approved' if action == 'approve' else 'rejected'
+
+        if approvals:
+            versions.bump('request')
+            dashboards.requests_changed({req.employee_id for req in done}, statuses)
+            RequestApproval.objects.bulk_create(approvals)
+            outbox.enqueue('requests.reviewed', f'reviewer:{user.pk}', {
+                'request_ids': [req.id for req in done], 'role': user.role, 'status': approvals[0].status,
+            })
+            verb, past = ('Approve', 'approved') if action == 'approve' else ('Reject', 'rejected')
+            for req in done:
+                audit.record(user, verb, 'Request', req.id, f'{user.username} {past} request {req.id}')
+
+    return outcomes
@@ -0,0 +1,15 @@
+from django.utils.functional import SimpleLazyObject
+
+from . import inbox, push
+
+
+def unread_notifications(request):
+    # Lazy so pages that never render the badge pay nothing; a cache hit costs no query.
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {}
+    return {
+        'unread_notifications': SimpleLazyObject(lambda: inbox.unread_count(user)),
+        'push_transport': push.TRANSPORT,
+        'push_poll_interval': push.POLL_INTERVAL,
+    }
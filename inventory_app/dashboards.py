@@ -0,0 +1,137 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponseBadRequest
+
+from . import versions
+from .models import User
+from .pagination import CursorPage, InvalidCursor, get_page_size, page_json_response, paginate, render_page, wants_json
+
+# Entries are keyed by the shared version counters (see versions.py), so no
+# worker serves a page older than the last write, whichever worker made it;
+# the TTL only bounds how long superseded entries occupy the cache. 0 disables
+# caching.
+CACHE_TTL = getattr(settings, 'INVENTORY_DASHBOARD_CACHE_TTL', 300)
+ROLES = ('EMPLOYEE', 'DIRECTOR', 'INVENTORY_OFFICER', 'ADMIN')
+
+# Scopes shared by every dashboard: user/business-unit names and product names.
+DIRECTORY = 'dashboard:directory'
+CATALOG = 'dashboard:catalog'
+OFFICER = 'dashboard:officer'
+
+
+def employee_scope(user_id):
+    return f'dashboard:employee:{user_id}'
+
+
+def unit_scope(business_unit_id):
+    return f'dashboard:unit:{business_unit_id}'
+
+
+# -------------------------------------------------
+# Invalidation
+# -------------------------------------------------
+def requests_changed(employee_ids, statuses):
+    """
+    Bump the dashboards that list requests of ``employee_ids`` in any of
+    ``statuses`` (pass both the old and the new status of a transition):
+    each employee's own dashboard, their unit's director dashboard while
+    PENDING_DIRECTOR is involved, and the officer dashboard while
+    PENDING_OFFICER is.
+    """
+    employee_ids = set(employee_ids)
+    statuses = set(statuses)
+    scopes = {employee_scope(e) for e in employee_ids}
+    if 'PENDING_DIRECTOR' in statuses:
+        units = (
+            User.objects.filter(pk__in=employee_ids, business_unit__isnull=False)
+            .values_list('business_unit_id', flat=True).distinct()
+        )
+        scopes.update(unit_scope(u) for u in units)
+    if 'PENDING_OFFICER' in statuses:
+        scopes.add(OFFICER)
+    versions.bump(*scopes)
+
+
+def directory_changed():
+    versions.bump(DIRECTORY)
+
+
+def catalog_changed():
+    versions.bump(CATALOG)
+
+
+# -------------------------------------------------
+# Hit / miss statistics
+# -------------------------------------------------
+def _stat_key(role, outcome):
+    return f'dashboard:stats:{role}:{outcome}'
+
+
+def _count(role, outcome):
+    key = _stat_key(role, outcome)
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def stats():
+    """``{role: {'hits', 'misses', 'hit_rate'}}`` since the last reset()."""
+    found = cache.get_many([_stat_key(r, o) for r in ROLES for o in ('hit', 'miss')])
+    result = {}
+    for role in ROLES:
+        hits = found.get(_stat_key(role, 'hit'), 0)
+        misses = found.get(_stat_key(role, 'miss'), 0)
+        total = hits + misses
+        result[role] = {'hits': hits, 'misses': misses, 'hit_rate': hits / total if total else None}
+    return result
+
+
+def reset_stats():
+    cache.delete_many([_stat_key(r, o) for r in ROLES for o in ('hit', 'miss')])
+
+
+# -------------------------------------------------
+# Cached rendering
+# -------------------------------------------------
+def render_cached(request, role, owner, depends_on, template, queryset, context_name, json_fields,
+                  keys=('timestamp', 'id'), descending=True, context=None):
+    """
+    render_paginated() with the page's rows cached under ``role``/``owner``
+    and the current counters of the ``depends_on`` scopes. Only the rows and
+    cursors are cached; the template is rendered per request, so the CSRF
+    token, messages and navbar stay user-specific. The response carries
+    ``X-Dashboard-Cache: hit|miss``.
+    """
+    as_json = wants_json(request)
+    page_size = get_page_size(request)
+    cursor = request.GET.get('cursor', '')
+    stamp = '.'.join(str(v) for v in versions.get(*depends_on))
+    variant = f"{stamp}:{'json' if as_json else 'html'}:{page_size}:{cursor}"
+    # Cursors come from the client; hash them so keys stay short and backend-safe.
+    key = f"dashboard:page:{role}:{owner}:{hashlib.sha1(variant.encode()).hexdigest()}"
+
+    cached = cache.get(key) if CACHE_TTL else None
+    if cached is not None:
+        _count(role, 'hit')
+        rows, next_cursor, prev_cursor = cached
+        page = CursorPage(rows, next_cursor, prev_cursor, request.GET, page_size)
+    else:
+        _count(role, 'miss')
+        try:
+            if as_json:
+                fields = list(dict.fromkeys([*json_fields, *keys]))
+                page = paginate(request, queryset.values(*fields), keys, descending, page_size)
+            else:
+                page = paginate(request, queryset, keys, descending, page_size)
+        except InvalidCursor:
+            return HttpResponseBadRequest('Invalid cursor.')
+        if CACHE_TTL:
+            cache.set(key, (list(page.object_list), page.next_cursor, page.prev_cursor), CACHE_TTL)
+
+    response = page_json_response(page) if as_json else render_page(request, template, page, context_name, context)
+    response['X-Dashboard-Cache'] = 'hit' if cached is not None else 'miss'
+    return response
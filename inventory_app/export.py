@@ -0,0 +1,198 @@
+import csv
+import datetime
+import io
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from . import archive
+from .models import AuditLog, Item, Request, Transaction, User
+
+CHUNK_SIZE = 2000
+# Rows are buffered into roughly this many bytes before each yield.
+FLUSH_BYTES = 64 * 1024
+
+
+# -------------------------------------------------
+# Datasets
+# -------------------------------------------------
+class Dataset:
+    def __init__(self, model, columns, date_field, unit_field, status_field='status'):
+        self.model = model
+        self.columns = columns  # (header, lookup) pairs
+        self.date_field = date_field
+        self.unit_field = unit_field
+        self.status_field = status_field
+
+    @property
+    def headers(self):
+        return [header for header, _ in self.columns]
+
+    def _is_datetime(self):
+        return self.model._meta.get_field(self.date_field).get_internal_type() == 'DateTimeField'
+
+    def _bound(self, day):
+        if self._is_datetime():
+            return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+        return day
+
+    def queryset(self, start=None, end=None, business_unit=None, status=None):
+        """Filtered rows as value tuples in primary-key order; ``end`` is inclusive."""
+        qs = self.model.objects.all()
+        if start:
+            qs = qs.filter(**{f'{self.date_field}__gte': self._bound(start)})
+        if end:
+            qs = qs.filter(**{f'{self.date_field}__lt': self._bound(end + datetime.timedelta(days=1))})
+        if business_unit:
+            qs = qs.filter(**{self.unit_field: business_unit})
+        if status and self.status_field:
+            qs = qs.filter(**{self.status_field: status})
+        return qs.order_by('pk').values_list(*[lookup for _, lookup in self.columns])
+
+    def rows(self, chunk_size=CHUNK_SIZE, **filters):
+        return self.queryset(**filters).iterator(chunk_size=chunk_size)
+
+
+class AuditDataset(Dataset):
+    """
+    AuditLog plus the rows archive_audit_logs moved to cold segments: archived
+    rows come first (oldest month first), then the live table in id order.
+    """
+
+    def rows(self, chunk_size=CHUNK_SIZE, **filters):
+        yield from self._archived(chunk_size, **filters)
+        yield from super().rows(chunk_size, **filters)
+
+    def _archived(self, chunk_size, start=None, end=None, business_unit=None, status=None):
+        user_ids = None
+        if business_unit:
+            user_ids = set(User.objects.filter(business_unit=business_unit).values_list('id', flat=True))
+        records = archive.read_segments(
+            start=self._bound(start) if start else None,
+            end=self._bound(end + datetime.timedelta(days=1)) if end else None,
+            action_type=status, newest_first=False,
+        )
+        chunk = []
+        for record in records:
+            if user_ids is None or record['user_id'] in user_ids:
+                chunk.append(record)
+            if len(chunk) >= chunk_size:
+                yield from self._unarchived_only(chunk)
+                chunk = []
+        yield from self._unarchived_only(chunk)
+
+    def _unarchived_only(self, records):
+        # A crash mid-archive can leave a row in both places; the live copy wins.
+        live = set(AuditLog.objects.filter(id__in=[r['id'] for r in records]).values_list('id', flat=True))
+        for r in records:
+            if r['id'] not in live:
+                yield tuple(r[header] for header in self.headers)
+
+
+DATASETS = {
+    'transactions': Dataset(Transaction, [
+        ('id', 'id'),
+        ('serial_number', 'item__serial_number'),
+        ('product', 'item__product__name'),
+        ('business_unit', 'item__business_unit__name'),
+        ('employee', 'employee__username'),
+        ('borrow_date', 'borrow_date'),
+        ('expected_return_date', 'expected_return_date'),
+        ('actual_return_date', 'actual_return_date'),
+        ('status', 'status'),
+        ('condition_on_borrow', 'condition_on_borrow'),
+        ('condition_on_return', 'condition_on_return'),
+        ('remarks', 'remarks'),
+    ], date_field='borrow_date', unit_field='item__business_unit'),
+    'items': Dataset(Item, [
+        ('id', 'id'),
+        ('product', 'product__name'),
+        ('serial_number', 'serial_number'),
+        ('purchase_date', 'purchase_date'),
+        ('condition', 'condition'),
+        ('status', 'status'),
+        ('location', 'location'),
+        ('warranty_expiry_date', 'warranty_expiry_date'),
+        ('assigned_to', 'assigned_to__username'),
+        ('business_unit', 'business_unit__name'),
+    ], date_field='purchase_date', unit_field='business_unit'),
+    'requests': Dataset(Request, [
+        ('id', 'id'),
+        ('employee', 'employee__username'),
+        ('business_unit', 'employee__business_unit__name'),
+        ('product', 'product__name'),
+        ('reason', 'reason'),
+        ('request_date', 'request_date'),
+        ('status', 'status'),
+        ('final_approval_date', 'final_approval_date'),
+        ('remarks', 'remarks'),
+    ], date_field='request_date', unit_field='employee__business_unit'),
+    'audit_logs': AuditDataset(AuditLog, [
+        ('id', 'id'),
+        ('user', 'user__username'),
+        ('action_type', 'action_type'),
+        ('object_type', 'object_type'),
+        ('object_id', 'object_id'),
+        ('timestamp', 'timestamp'),
+        ('description', 'description'),
+    ], date_field='timestamp', unit_field='user__business_unit', status_field='action_type'),
+}
+
+
+# -------------------------------------------------
+# Encoders: yield text chunks
+# -------------------------------------------------
+def _csv_chunks(headers, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(headers)
+    for row in rows:
+        writer.writerow(['' if v is None else v for v in row])
+        if buffer.tell() >= FLUSH_BYTES:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _jsonl_chunks(headers, rows):
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    parts = []
+    size = 0
+    for row in rows:
+        line = encoder.encode(dict(zip(headers, row))) + '\n'
+        parts.append(line)
+        size += len(line)
+        if size >= FLUSH_BYTES:
+            yield ''.join(parts)
+            parts, size = [], 0
+    yield ''.join(parts)
+
+
+ENCODERS = {'csv': _csv_chunks, 'jsonl': _jsonl_chunks}
+CONTENT_TYPES = {'csv': 'text/csv', 'jsonl': 'application/x-ndjson'}
+
+
+def _gzip(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream(dataset, fmt='csv', compress=False, chunk_size=CHUNK_SIZE, **filters):
+    """
+    Yield the export as byte chunks. Rows come from a server-side cursor
+    (``.iterator(chunk_size=...)``), so memory is flat and the first bytes
+    leave before the query has finished.
+    """
+    ds = DATASETS[dataset]
+    rows = ds.rows(chunk_size, **filters)
+    chunks = ENCODERS[fmt](ds.headers, rows)
+    if compress:
+        return _gzip(chunks)
+    return (chunk.encode() for chunk in chunks if chunk)
@@ -91,6 +91,30 @@ class ItemForm(forms.ModelForm):
         }
 
 
+class ItemImportForm(forms.Form):
+    file = forms.FileField(help_text='CSV or XLSX with a header row.')
+    dry_run = forms.BooleanField(required=False, initial=True, label='Validate only (dry run)')
+
+    def clean_file(self):
+        upload = self.cleaned_data['file']
+        if not upload.name.lower().endswith(('.csv', '.xlsx')):
+            raise forms.ValidationError('Upload a .csv or .xlsx file.')
+        return upload
+
+
+class ProfilingForm(forms.Form):
+    path = forms.CharField(required=False, help_text='Only requests whose path starts with this, e.g. /request/.')
+    username = forms.CharField(required=False, help_text='Only requests from this user.')
+    rate = forms.FloatField(initial=1.0, min_value=0.01, max_value=1.0, help_text='Fraction of matching requests to profile.')
+    mode = forms.ChoiceField(choices=[('cprofile', 'cProfile (exact, slower)'), ('sample', 'Stack sampling (flamegraph)')])
+    minutes = forms.IntegerField(initial=15, min_value=1, max_value=240)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for field in self.fields.values():
+            field.widget.attrs.update({'class': 'form-control form-control-sm'})
+
+
 class BusinessUnitForm(forms.ModelForm):
     class Meta:
         model = BusinessUnit
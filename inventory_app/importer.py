@@ -0,0 +1,237 @@
+import csv
+import datetime
+import io
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.utils.dateparse import parse_date
+
+from . import audit, search, stock
+from .models import BusinessUnit, Item, Product, User
+
+COLUMNS = (
+    'product', 'serial_number', 'purchase_date', 'condition', 'status',
+    'location', 'warranty_expiry_date', 'assigned_to', 'business_unit',
+)
+REQUIRED = ('product', 'serial_number', 'purchase_date', 'condition', 'location', 'business_unit')
+CONDITIONS = {value for value, _ in Item.CONDITION_CHOICES}
+STATUSES = {value for value, _ in Item.STATUS_CHOICES}
+
+# Natural-key caches are cleared past this size so memory stays flat on huge files.
+CACHE_LIMIT = 10000
+
+
+class ImportResult:
+    def __init__(self, max_errors=1000):
+        self.rows = 0
+        self.created = 0
+        self.error_count = 0
+        self.errors = []
+        self.max_errors = max_errors
+
+    def add_error(self, line, serial, message):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append((line, serial, message))
+
+
+# -------------------------------------------------
+# Readers: yield (line_number, {column: value}) lazily
+# -------------------------------------------------
+def read_csv(fileobj):
+    if isinstance(fileobj.read(0), bytes):
+        fileobj = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    reader = csv.DictReader(fileobj)
+    for row in reader:
+        yield reader.line_num, {k.strip().lower(): (v or '').strip() for k, v in row.items() if k}
+
+
+def read_xlsx(fileobj):
+    try:
+        from openpyxl import load_workbook
+    except ImportError as e:
+        raise ImportError("Importing .xlsx files requires openpyxl (pip install openpyxl).") from e
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(h or '').strip().lower() for h in next(rows, ())]
+        for line, values in enumerate(rows, start=2):
+            yield line, {
+                name: value.strip() if isinstance(value, str) else ('' if value is None else value)
+                for name, value in zip(header, values) if name
+            }
+    finally:
+        workbook.close()
+
+
+def reader_for(name):
+    return read_xlsx if name.lower().endswith('.xlsx') else read_csv
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# -------------------------------------------------
+# Natural-key resolution
+# -------------------------------------------------
+class _Lookup:
+    """name -> id cache filled one chunk at a time with a single IN query."""
+
+    def __init__(self, queryset, field):
+        self.queryset = queryset
+        self.field = field
+        self.cache = {}
+
+    def prime(self, names):
+        missing = {n for n in names if n and n not in self.cache}
+        if not missing:
+            return
+        if len(self.cache) + len(missing) > CACHE_LIMIT:
+            self.cache.clear()
+        found = {}
+        for pk, name in self.queryset.filter(**{f'{self.field}__in': missing}).values_list('pk', self.field):
+            # Names are not unique on every model; an ambiguous name resolves to None.
+            found[name] = None if name in found else pk
+        for name in missing:
+            self.cache[name] = found.get(name, False)
+
+    def get(self, name):
+        return self.cache.get(name, False)
+
+
+def _as_date(value):
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    return parse_date(str(value)) if value else None
+
+
+# -------------------------------------------------
+# Import
+# -------------------------------------------------
+def import_items(rows, user=None, chunk_size=1000, dry_run=False, result=None):
+    """
+    Validate and bulk-insert Items from ``rows`` (``(line, dict)`` pairs from
+    read_csv/read_xlsx). Work is done one chunk at a time: natural keys are
+    resolved with one query per model, serial numbers are checked against
+    the table with one IN query, and valid rows go in with one bulk_create,
+    so memory does not grow with the file. Invalid rows are reported in the
+    result and skipped. A dry run checks each chunk against the table, so a
+    serial repeated in two different chunks is only caught by the real run.
+    """
+    result = result or ImportResult()
+    products = _Lookup(Product.objects.all(), 'name')
+    units = _Lookup(BusinessUnit.objects.all(), 'name')
+    employees = _Lookup(User.objects.filter(role='EMPLOYEE'), 'username')
+
+    for chunk in _chunks(rows, chunk_size):
+        result.rows += len(chunk)
+        products.prime({str(r.get('product', '')) for _, r in chunk})
+        units.prime({str(r.get('business_unit', '')) for _, r in chunk})
+        employees.prime({str(r.get('assigned_to', '')) for _, r in chunk})
+        serials = [str(r.get('serial_number', '')) for _, r in chunk]
+        taken = set(Item.objects.filter(serial_number__in=[s for s in serials if s]).values_list('serial_number', flat=True))
+        in_chunk = set()
+
+        items = []
+        for line, row in chunk:
+            serial = str(row.get('serial_number', ''))
+            item, error = _build_item(row, serial, products, units, employees)
+            if error is None:
+                if serial in taken:
+                    error = 'serial_number already exists'
+                elif serial in in_chunk:
+                    error = 'serial_number repeated in file'
+            if error:
+                result.add_error(line, serial, error)
+                continue
+            in_chunk.add(serial)
+            items.append(item)
+
+        if dry_run:
+            result.created += len(items)
+            continue
+        if not items:
+            continue
+        try:
+            # The chunk's audit entries are written in one batch once it commits.
+            with audit.collect(), transaction.atomic():
+                _insert_chunk(items, user, chunk_size)
+        except IntegrityError:
+            # A serial number was inserted concurrently after the pre-check.
+            for item in items:
+                result.add_error(None, item.serial_number, 'chunk rejected: serial_number conflict during insert')
+            continue
+        result.created += len(items)
+    return result
+
+
+def _insert_chunk(items, user, batch_size):
+    Item.objects.bulk_create(items, batch_size=batch_size)
+    # bulk_create skips the Item signals: move stock counters, search index and audit here.
+    moved = Counter((i.product_id, i.business_unit_id, i.status) for i in items)
+    for (product_id, business_unit_id, status), n in moved.items():
+        stock.adjust(product_id, business_unit_id, status, n)
+    search.index_many('item', [i.id for i in items])
+    if user is not None:
+        for i in items:
+            audit.record(user, 'Create', 'Item', i.id, f'{user.username} imported item {i.serial_number}')
+
+
+def _build_item(row, serial, products, units, employees):
+    missing = [c for c in REQUIRED if not row.get(c)]
+    if missing:
+        return None, f"missing {', '.join(missing)}"
+    product_id = products.get(str(row['product']))
+    if not product_id:
+        return None, f"unknown or ambiguous product '{row['product']}'"
+    unit_id = units.get(str(row['business_unit']))
+    if not unit_id:
+        return None, f"unknown or ambiguous business unit '{row['business_unit']}'"
+    assigned_to_id = None
+    if row.get('assigned_to'):
+        assigned_to_id = employees.get(str(row['assigned_to']))
+        if not assigned_to_id:
+            return None, f"unknown employee '{row['assigned_to']}'"
+    condition = str(row['condition'])
+    if condition not in CONDITIONS:
+        return None, f"invalid condition '{condition}'"
+    status = str(row.get('status') or 'Available')
+    if status not in STATUSES:
+        return None, f"invalid status '{status}'"
+    purchase_date = _as_date(row['purchase_date'])
+    if purchase_date is None:
+        return None, f"invalid purchase_date '{row['purchase_date']}'"
+    warranty = None
+    if row.get('warranty_expiry_date'):
+        warranty = _as_date(row['warranty_expiry_date'])
+        if warranty is None:
+            return None, f"invalid warranty_expiry_date '{row['warranty_expiry_date']}'"
+    if len(serial) > 100:
+        return None, 'serial_number longer than 100 characters'
+    return Item(
+        product_id=product_id,
+        serial_number=serial,
+        purchase_date=purchase_date,
+        condition=condition,
+        status=status,
+        location=str(row['location'])[:100],
+        warranty_expiry_date=warranty,
+        assigned_to_id=assigned_to_id,
+        business_unit_id=unit_id,
+    ), None
+
+
+def write_error_report(result, fileobj):
+    writer = csv.writer(fileobj)
+    writer.writerow(['line', 'serial_number', 'error'])
+    writer.writerows(result.errors)
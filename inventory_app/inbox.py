@@ -0,0 +1,92 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from . import push, versions
+from .models import Notification
+
+# The cached count is kept exact by incr/decr on every change; the TTL only
+# bounds how long a drifted value (e.g. a process-local cache under several
+# workers) can survive.
+UNREAD_TTL = getattr(settings, 'INVENTORY_UNREAD_CACHE_TTL', 300)
+
+
+def _key(user_id):
+    return f'inbox:unread:{user_id}'
+
+
+# -------------------------------------------------
+# Unread counter
+# -------------------------------------------------
+def unread_count(user):
+    count = cache.get(_key(user.id))
+    if count is None:
+        count = Notification.objects.filter(recipient=user, is_read=False).count()
+        cache.set(_key(user.id), count, UNREAD_TTL)
+    return count
+
+
+def adjust_unread(user_id, delta):
+    # incr/decr only touch an existing key; a missing key is recomputed on the next read.
+    def apply():
+        try:
+            if delta > 0:
+                cache.incr(_key(user_id), delta)
+            elif delta < 0:
+                cache.decr(_key(user_id), -delta)
+        except ValueError:
+            pass
+    transaction.on_commit(apply)
+
+
+def invalidate(user_id):
+    transaction.on_commit(lambda: cache.delete(_key(user_id)))
+
+
+# -------------------------------------------------
+# Writes
+# -------------------------------------------------
+def notify_bulk(notifications, batch_size=500):
+    """bulk_create notifications (no post_save) and keep recipients' counters in step."""
+    created = Notification.objects.bulk_create(notifications, batch_size=batch_size)
+    versions.bump('notification')
+    per_recipient = {}
+    for note in created:
+        if not note.is_read:
+            per_recipient[note.recipient_id] = per_recipient.get(note.recipient_id, 0) + 1
+    for user_id, n in per_recipient.items():
+        adjust_unread(user_id, n)
+
+    def publish():
+        for note in created:
+            push.publish_notification(note)
+    transaction.on_commit(publish)
+    return created
+
+
+def mark_read(user, ids):
+    """Mark the given notifications of ``user`` read with a single UPDATE."""
+    updated = Notification.objects.filter(recipient=user, id__in=ids, is_read=False).update(is_read=True)
+    adjust_unread(user.id, -updated)
+    if updated:
+        versions.bump('notification')
+    return updated
+
+
+def mark_all_read(user):
+    updated = Notification.objects.filter(recipient=user, is_read=False).update(is_read=True)
+    transaction.on_commit(lambda: cache.set(_key(user.id), 0, UNREAD_TTL))
+    if updated:
+        versions.bump('notification')
+    return updated
+
+
+# -------------------------------------------------
+# Reads
+# -------------------------------------------------
+def inbox_queryset(user, unread_only=False):
+    """Newest-first inbox rows, served by the (recipient, is_read, timestamp, id) index."""
+    qs = Notification.objects.filter(recipient=user)
+    if unread_only:
+        qs = qs.filter(is_read=False)
+    return qs
@@ -0,0 +1,279 @@
+import datetime
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from . import audit, stock, versions
+from .models import IngestedEvent, Item, Transaction, User
+from .overdue import OPEN_STATUSES
+from .scanner import CONDITIONS, LOAN_DAYS
+
+MAX_EVENTS = getattr(settings, 'INVENTORY_INGEST_MAX', 1000)
+EVENT_TYPES = ('borrow', 'return', 'condition')
+# Whole-batch retries when a concurrent writer changes an item underneath us.
+RETRIES = 3
+
+APPLIED = ('borrowed', 'returned', 'condition_updated')
+
+
+class _Conflict(Exception):
+    pass
+
+
+class IngestConflict(Exception):
+    pass
+
+
+# -------------------------------------------------
+# Parsing
+# -------------------------------------------------
+def _parse(raw):
+    """Return ``(event, error_outcome)``; exactly one of them is None."""
+    if not isinstance(raw, dict):
+        return None, 'invalid'
+    client_id = raw.get('client_id')
+    if not isinstance(client_id, str) or not 0 < len(client_id) <= 64:
+        return None, 'invalid'
+    event = {
+        'client_id': client_id,
+        'type': raw.get('type'),
+        'serial': str(raw.get('serial') or '').strip(),
+        'employee': raw.get('employee'),
+        'condition': raw.get('condition') or None,
+        'remarks': str(raw.get('remarks') or ''),
+        'expected_return_date': None,
+        'occurred_at': None,
+    }
+    if event['type'] not in EVENT_TYPES or not event['serial']:
+        return event, 'invalid'
+    if event['condition'] is not None and event['condition'] not in CONDITIONS:
+        return event, 'invalid_condition'
+    if event['type'] == 'condition' and event['condition'] is None:
+        return event, 'invalid_condition'
+    # parse_* return None for a malformed string but raise ValueError for an
+    # impossible one (2024-02-30); both only invalidate this event.
+    if raw.get('occurred_at'):
+        try:
+            occurred = parse_datetime(str(raw['occurred_at']))
+        except ValueError:
+            occurred = None
+        if occurred is None:
+            return event, 'invalid'
+        event['occurred_at'] = occurred if timezone.is_aware(occurred) else timezone.make_aware(occurred)
+    if raw.get('expected_return_date'):
+        try:
+            expected = parse_date(str(raw['expected_return_date']))
+        except ValueError:
+            expected = None
+        if expected is None:
+            return event, 'invalid'
+        event['expected_return_date'] = expected
+    return event, None
+
+
+def _day(event):
+    return timezone.localdate(event['occurred_at']) if event['occurred_at'] else timezone.localdate()
+
+
+# -------------------------------------------------
+# Ingest
+# -------------------------------------------------
+def ingest(user, events, device=''):
+    """
+    Apply an ordered batch of offline scanner events and return one result
+    per event: ``{client_id, outcome, transaction_id, duplicate}``.
+
+    Current state for every item, open loan, employee and already-seen
+    client ID is loaded with one query each. The events are replayed in
+    order against that snapshot in memory, and the net changes are written
+    in one transaction. Items are updated with compare-and-swap UPDATEs
+    grouped by transition; if another writer got there first, the whole
+    batch is replayed against fresh state. Replaying a client_id returns
+    its stored outcome.
+    """
+    events = list(events)[:MAX_EVENTS]
+    for _ in range(RETRIES):
+        try:
+            with transaction.atomic():
+                return _ingest(user, events, device)
+        except (_Conflict, IntegrityError):
+            continue
+    raise IngestConflict("Items kept changing while the batch was applied; retry later.")
+
+
+def _ingest(user, raw_events, device):
+    parsed = [_parse(raw) for raw in raw_events]
+    client_ids = [e['client_id'] for e, _ in parsed if e is not None]
+    serials = {e['serial'] for e, error in parsed if error is None}
+    usernames = {e['employee'] for e, error in parsed if error is None and e['type'] == 'borrow' and e['employee']}
+
+    seen = {
+        e.client_id: e for e in IngestedEvent.objects.filter(client_id__in=client_ids)
+    }
+    items = {
+        row['serial_number']: row
+        for row in Item.objects.select_for_update().filter(serial_number__in=serials).values(
+            'id', 'serial_number', 'status', 'assigned_to_id', 'condition', 'product_id', 'business_unit_id'
+        )
+    }
+    state = {row['id']: dict(row) for row in items.values()}
+    open_loans = {}
+    for loan in Transaction.objects.select_for_update().filter(
+        item_id__in=list(state), status__in=OPEN_STATUSES
+    ).order_by('id'):
+        open_loans[loan.item_id] = loan
+    employees = dict(
+        User.objects.filter(username__in=usernames, role='EMPLOYEE').values_list('username', 'id')
+    )
+
+    results = []
+    records = []
+    new_loans = []
+    closed_loans = {}
+    in_batch = {}
+
+    for event, error in parsed:
+        if event is None:
+            results.append({'client_id': None, 'outcome': error, 'transaction_id': None, 'duplicate': False})
+            continue
+        client_id = event['client_id']
+        if client_id in seen:
+            previous = seen[client_id]
+            results.append({
+                'client_id': client_id, 'outcome': previous.outcome,
+                'transaction_id': previous.transaction_id, 'duplicate': True,
+            })
+            continue
+        if client_id in in_batch:
+            first = in_batch[client_id]
+            results.append({**first, 'duplicate': True})
+            continue
+
+        outcome, loan = error, None
+        if outcome is None:
+            outcome, loan = _apply(event, items, state, open_loans, employees, new_loans, closed_loans)
+        result = {'client_id': client_id, 'outcome': outcome, 'loan': loan, 'duplicate': False}
+        results.append(result)
+        in_batch[client_id] = result
+        records.append((event, result))
+
+    _write_loans(new_loans, closed_loans)
+    moved = _write_items(items, state)
+    versions.bump('transaction', 'item')
+    for (product_id, business_unit_id, old, new), n in moved.items():
+        stock.adjust(product_id, business_unit_id, old, -n)
+        stock.adjust(product_id, business_unit_id, new, n)
+
+    IngestedEvent.objects.bulk_create([
+        IngestedEvent(
+            client_id=event['client_id'],
+            event_type=str(event['type'] or '')[:20],
+            serial_number=event['serial'][:100],
+            outcome=result['outcome'],
+            transaction_id=result['loan'].id if result['loan'] is not None else None,
+            submitted_by=user,
+            device=device[:100],
+            occurred_at=event['occurred_at'],
+        )
+        for event, result in records
+    ])
+    for event, result in records:
+        if result['outcome'] in APPLIED:
+            audit.record(
+                user, 'Ingest', 'Item', items[event['serial']]['id'],
+                f"{user.username} synced {event['type']} of {event['serial']} ({event['client_id']})",
+            )
+
+    for result in results:
+        loan = result.pop('loan', None)
+        result.setdefault('transaction_id', loan.id if loan is not None else None)
+    return results
+
+
+def _apply(event, items, state, open_loans, employees, new_loans, closed_loans):
+    """Replay one event against the in-memory state. Returns ``(outcome, loan)``."""
+    row = items.get(event['serial'])
+    if row is None:
+        return 'not_found', None
+    item = state[row['id']]
+    day = _day(event)
+
+    if event['type'] == 'borrow':
+        employee_id = employees.get(event['employee'])
+        if employee_id is None:
+            return 'unknown_employee', None
+        if item['status'] != 'Available':
+            return 'not_available', None
+        loan = Transaction(
+            item_id=item['id'],
+            employee_id=employee_id,
+            expected_return_date=event['expected_return_date'] or day + datetime.timedelta(days=LOAN_DAYS),
+            condition_on_borrow=event['condition'] or item['condition'],
+            remarks=event['remarks'],
+        )
+        loan.borrowed_on = day
+        new_loans.append(loan)
+        open_loans[item['id']] = loan
+        item.update(status='Assigned', assigned_to_id=employee_id)
+        return 'borrowed', loan
+
+    if event['type'] == 'return':
+        loan = open_loans.pop(item['id'], None)
+        if loan is None:
+            return 'not_borrowed', None
+        condition = event['condition'] or loan.condition_on_borrow
+        loan.status = 'Returned'
+        loan.actual_return_date = day
+        loan.condition_on_return = condition
+        loan.remarks = event['remarks'] or loan.remarks
+        if loan.pk is not None:
+            closed_loans[loan.pk] = loan
+        if item['status'] == 'Assigned':
+            item.update(status='Available', assigned_to_id=None)
+        item['condition'] = condition
+        return 'returned', loan
+
+    item['condition'] = event['condition']
+    return 'condition_updated', None
+
+
+def _write_loans(new_loans, closed_loans):
+    if closed_loans:
+        still_open = Transaction.objects.filter(pk__in=list(closed_loans), status__in=OPEN_STATUSES).count()
+        if still_open != len(closed_loans):
+            raise _Conflict
+        Transaction.objects.bulk_update(
+            list(closed_loans.values()), ['status', 'actual_return_date', 'condition_on_return', 'remarks']
+        )
+    if new_loans:
+        Transaction.objects.bulk_create(new_loans)
+        # borrow_date is auto_now_add; backdate loans that were made offline.
+        by_day = defaultdict(list)
+        for loan in new_loans:
+            if loan.borrow_date != loan.borrowed_on:
+                by_day[loan.borrowed_on].append(loan.pk)
+        for day, ids in by_day.items():
+            Transaction.objects.filter(pk__in=ids).update(borrow_date=day)
+
+
+def _write_items(items, state):
+    """CAS-update changed items grouped by transition; returns stock moves."""
+    groups = defaultdict(list)
+    moved = Counter()
+    for row in items.values():
+        new = state[row['id']]
+        if (new['status'], new['assigned_to_id'], new['condition']) == (row['status'], row['assigned_to_id'], row['condition']):
+            continue
+        groups[(row['status'], new['status'], new['assigned_to_id'], new['condition'])].append(row['id'])
+        if new['status'] != row['status']:
+            moved[(row['product_id'], row['business_unit_id'], row['status'], new['status'])] += 1
+    for (old_status, status, assigned_to_id, condition), ids in groups.items():
+        updated = Item.objects.filter(pk__in=ids, status=old_status).update(
+            status=status, assigned_to_id=assigned_to_id, condition=condition
+        )
+        if updated != len(ids):
+            raise _Conflict
+    return moved
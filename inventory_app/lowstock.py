@@ -0,0 +1,79 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import inbox
+from .models import Notification, Product, ProductStock, User
+
+
+# -------------------------------------------------
+# Per-product evaluation (called from stock transitions)
+# -------------------------------------------------
+def _notify_officers(product_name, available, reorder_level):
+    officers = User.objects.filter(role='INVENTORY_OFFICER').values_list('id', flat=True)
+    inbox.notify_bulk([
+        Notification(
+            recipient_id=officer_id,
+            message=f"Low stock: {product_name} has {available} available (reorder level {reorder_level})."
+        )
+        for officer_id in officers
+    ])
+
+
+def evaluate(product_id):
+    """
+    Re-check one product against its reorder level and flip
+    ProductStock.low_stock_since on a crossing. The flag is set with a
+    conditional UPDATE, so only the transition that actually crosses the
+    threshold notifies officers; later decrements while already low do not.
+    Returns True if the product is low after the check.
+    """
+    row = (
+        Product.objects.filter(pk=product_id)
+        .values_list('name', 'reorder_level', 'stock__available', 'stock__low_stock_since')
+        .first()
+    )
+    if row is None:
+        return False
+    name, reorder_level, available, low_since = row
+    if available is None:
+        # No counter row: never stocked, or mid cascade-delete. Leave it to sync().
+        return False
+    is_low = available < reorder_level
+    flagged = ProductStock.objects.filter(product_id=product_id)
+
+    if is_low and low_since is None:
+        if flagged.filter(low_stock_since__isnull=True).update(low_stock_since=timezone.now()):
+            _notify_officers(name, available, reorder_level)
+    elif not is_low and low_since is not None:
+        flagged.update(low_stock_since=None)
+    return is_low
+
+
+# -------------------------------------------------
+# Set-based resync (after rebuilds and migrations)
+# -------------------------------------------------
+def sync(now=None):
+    """Recompute every flag with two UPDATEs, without notifying. Returns (flagged, cleared)."""
+    now = now or timezone.now()
+    with transaction.atomic():
+        ProductStock.objects.bulk_create([
+            ProductStock(product_id=pk)
+            for pk in Product.objects.filter(stock__isnull=True, reorder_level__gt=0).values_list('pk', flat=True)
+        ])
+        flagged = ProductStock.objects.filter(
+            low_stock_since__isnull=True, available__lt=F('product__reorder_level')
+        ).update(low_stock_since=now)
+        cleared = ProductStock.objects.filter(
+            low_stock_since__isnull=False, available__gte=F('product__reorder_level')
+        ).update(low_stock_since=None)
+    return flagged, cleared
+
+
+def low_stock():
+    """Products currently below their reorder level, longest-standing first (reads the index only)."""
+    return (
+        ProductStock.objects.filter(low_stock_since__isnull=False)
+        .select_related('product', 'product__category')
+        .order_by('low_stock_since', 'id')
+    )
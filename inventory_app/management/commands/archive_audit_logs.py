@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from inventory_app import archive
+
+
+class Command(BaseCommand):
+    help = "Move AuditLog rows older than the retention horizon into compressed monthly archive segments."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than', type=int, default=None, metavar='DAYS',
+            help=f'Archive rows older than DAYS (default: INVENTORY_AUDIT_RETENTION_DAYS = {archive.RETENTION_DAYS}).',
+        )
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--directory', default=None, help='Archive directory (default: INVENTORY_AUDIT_ARCHIVE_DIR).')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be archived without moving anything.')
+
+    def handle(self, *args, **options):
+        totals = archive.archive(
+            older_than_days=options['older_than'],
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+            directory=options['directory'],
+        )
+        verb = 'Would archive' if options['dry_run'] else 'Archived'
+        for month, count in sorted(totals.items()):
+            self.stdout.write(f"{month}: {count}")
+        self.stdout.write(self.style.SUCCESS(f"{verb} {sum(totals.values())} audit log row(s)."))
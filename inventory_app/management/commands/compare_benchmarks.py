@@ -0,0 +1,43 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Compare two view benchmark result files (written by the test suite when INVENTORY_BENCH_OUTPUT is set)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('old')
+        parser.add_argument('new')
+        parser.add_argument(
+            '--threshold', type=float, default=1.5,
+            help='Flag views whose median wall time grew by more than this factor (default 1.5).',
+        )
+
+    def _load(self, path):
+        try:
+            with open(path) as f:
+                return json.load(f)['views']
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f"Cannot read benchmark results from {path}: {e}")
+
+    def handle(self, *args, **options):
+        old, new = self._load(options['old']), self._load(options['new'])
+        regressions = 0
+        self.stdout.write(f"{'view':<40} {'queries':>11} {'wall ms (median)':>24}")
+        for name in sorted(old.keys() | new.keys()):
+            if name not in old or name not in new:
+                self.stdout.write(f"{name:<40} {'only in ' + ('new' if name in new else 'old'):>11}")
+                continue
+            a, b = old[name], new[name]
+            ratio = b['wall_ms_median'] / a['wall_ms_median'] if a['wall_ms_median'] else 1
+            worse = b['queries'] > a['queries'] or ratio > options['threshold']
+            regressions += worse
+            line = (
+                f"{name:<40} {a['queries']:>4} -> {b['queries']:<4} "
+                f"{a['wall_ms_median']:>9.2f} -> {b['wall_ms_median']:<9.2f} x{ratio:.2f}"
+            )
+            self.stdout.write(self.style.ERROR(line) if worse else line)
+        if regressions:
+            raise CommandError(f"{regressions} view(s) regressed.")
+        self.stdout.write(self.style.SUCCESS("No regressions."))
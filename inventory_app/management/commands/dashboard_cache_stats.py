@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from inventory_app import dashboards
+
+
+class Command(BaseCommand):
+    help = "Show dashboard cache hit/miss counts per role."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Zero the counters after printing them.')
+
+    def handle(self, *args, **options):
+        for role, counts in dashboards.stats().items():
+            rate = counts['hit_rate']
+            self.stdout.write(
+                f"{role:<18} hits {counts['hits']:>8}  misses {counts['misses']:>8}  "
+                f"hit rate {'-' if rate is None else f'{rate:.1%}'}"
+            )
+        if options['reset']:
+            dashboards.reset_stats()
+            self.stdout.write(self.style.SUCCESS("Counters reset."))
@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from inventory_app import outbox
+
+
+class Command(BaseCommand):
+    help = "Handle pending outbox events (notifications, audit entries) and report the backlog."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=outbox.BATCH_SIZE)
+        parser.add_argument(
+            '--every', type=float, default=0, metavar='SECONDS',
+            help='Keep running, draining every SECONDS (the worker for INVENTORY_OUTBOX_MODE=external).',
+        )
+        parser.add_argument('--stats', action='store_true', help='Only print the backlog and recent lag.')
+        parser.add_argument('--purge', action='store_true', help='Also delete handled events past the retention period.')
+        parser.add_argument('--retry-dead', action='store_true', help='Requeue events that ran out of attempts first.')
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self._stats()
+            return
+        if options['retry_dead']:
+            self.stdout.write(f"Requeued {outbox.retry_dead()} dead event(s).")
+        while True:
+            started = time.perf_counter()
+            handled = outbox.drain_all(options['batch_size'])
+            if handled or not options['every']:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Handled {handled} event(s) in {time.perf_counter() - started:.3f}s."
+                ))
+            if options['purge']:
+                self.stdout.write(f"Purged {outbox.purge()} handled event(s).")
+            if not options['every']:
+                self._stats()
+                return
+            time.sleep(options['every'])
+
+    def _stats(self):
+        stats = outbox.backlog()
+        avg, worst = stats['avg_lag_seconds'], stats['max_lag_seconds']
+        self.stdout.write(
+            f"pending {stats['pending']}  dead {stats['dead']}  "
+            f"oldest pending {stats['oldest_pending_seconds']:.1f}s  "
+            f"handled last hour {stats['done_last_hour']}  "
+            f"lag avg {'-' if avg is None else f'{avg:.3f}s'} max {'-' if worst is None else f'{worst:.3f}s'}"
+        )
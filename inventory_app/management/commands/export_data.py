@@ -0,0 +1,38 @@
+import sys
+
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_date
+
+from inventory_app import export
+
+
+class Command(BaseCommand):
+    help = "Stream transactions, items, requests or audit logs to CSV/JSONL in constant memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(export.DATASETS))
+        parser.add_argument('--format', choices=sorted(export.ENCODERS), default='csv')
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument('--start', type=parse_date, help='YYYY-MM-DD, inclusive')
+        parser.add_argument('--end', type=parse_date, help='YYYY-MM-DD, inclusive')
+        parser.add_argument('--business-unit', type=int, help='BusinessUnit id')
+        parser.add_argument('--status', help='Status (action type for audit_logs)')
+        parser.add_argument('--chunk-size', type=int, default=export.CHUNK_SIZE)
+        parser.add_argument('--output', '-o', help='Output file (default: stdout)')
+
+    def handle(self, *args, **options):
+        chunks = export.stream(
+            options['dataset'], options['format'], options['gzip'],
+            chunk_size=options['chunk_size'],
+            start=options['start'], end=options['end'],
+            business_unit=options['business_unit'], status=options['status'],
+        )
+        out = open(options['output'], 'wb') if options['output'] else sys.stdout.buffer
+        try:
+            for chunk in chunks:
+                out.write(chunk)
+        finally:
+            if options['output']:
+                out.close()
+            else:
+                out.flush()
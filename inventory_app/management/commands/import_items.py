@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory_app import importer
+from inventory_app.models import User
+
+
+class Command(BaseCommand):
+    help = "Stream Items from a CSV or XLSX file into the database in chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or XLSX file with columns: ' + ', '.join(importer.COLUMNS))
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Validate every row without inserting anything.')
+        parser.add_argument('--user', help='Username recorded in the audit log for the created items.')
+        parser.add_argument('--errors', metavar='PATH', help='Write the error report to this CSV file.')
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"Unknown user '{options['user']}'.")
+
+        read = importer.reader_for(options['path'])
+        mode = 'rb' if options['path'].lower().endswith('.xlsx') else 'r'
+        result = importer.ImportResult()
+        with open(options['path'], mode, **({} if mode == 'rb' else {'encoding': 'utf-8-sig', 'newline': ''})) as f:
+            importer.import_items(
+                read(f), user=user, chunk_size=options['chunk_size'],
+                dry_run=options['dry_run'], result=result,
+            )
+
+        if options['errors']:
+            with open(options['errors'], 'w', newline='') as f:
+                importer.write_error_report(result, f)
+        else:
+            for line, serial, message in result.errors[:50]:
+                self.stdout.write(f"line {line} ({serial}): {message}")
+
+        verb = 'would be created' if options['dry_run'] else 'created'
+        self.stdout.write(self.style.SUCCESS(
+            f"{result.rows} row(s) read, {result.created} item(s) {verb}, {result.error_count} error(s)."
+        ))
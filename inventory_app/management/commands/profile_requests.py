@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from inventory_app import profiling
+
+
+class Command(BaseCommand):
+    help = "Switch on request profiling for a path prefix, user or sample rate, or list recent profiles."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='', help='Only requests whose path starts with this.')
+        parser.add_argument('--user', default='', help='Only requests from this username.')
+        parser.add_argument('--rate', type=float, default=1.0, help='Fraction of matching requests to profile.')
+        parser.add_argument('--mode', choices=profiling.MODES, default='cprofile')
+        parser.add_argument('--minutes', type=int, default=15, help='Switch off automatically after this long.')
+        parser.add_argument('--off', action='store_true', help='Switch profiling off.')
+        parser.add_argument('--list', action='store_true', help='Show recent profiles and their top functions.')
+
+    def handle(self, *args, **options):
+        if options['list']:
+            for profile in profiling.recent():
+                self.stdout.write(
+                    f"{profile['id']}  {profile['method']} {profile['path']}  {profile['status']}  "
+                    f"{profile['duration_ms']} ms  {profile['mode']}"
+                )
+                for row in profile['top'][:5]:
+                    self.stdout.write(f"    {row['self_ms']:>9.2f} ms self  {row['total_ms']:>9.2f} ms total  {row['function']}")
+            return
+        if options['off']:
+            profiling.disable()
+            self.stdout.write(self.style.SUCCESS("Profiling switched off."))
+            return
+
+        profiling.enable(options['path'], options['user'], options['rate'], options['mode'], options['minutes'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Profiling {options['mode']} on {options['path'] or 'all paths'}"
+            f"{' for ' + options['user'] if options['user'] else ''} at rate {options['rate']} "
+            f"for {options['minutes']} minute(s); files go to {profiling.PROFILE_DIR}."
+        ))
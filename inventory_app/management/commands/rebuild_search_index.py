@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory_app import search
+
+
+class Command(BaseCommand):
+    help = "Repopulate the full-text search index (FTS5) from products, items and requests."
+
+    def handle(self, *args, **options):
+        if not search.enabled():
+            raise CommandError("The search index needs SQLite FTS5; other backends search the tables directly.")
+        rows = search.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {rows} document(s)."))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory_app import stock
+
+
+class Command(BaseCommand):
+    help = "Rebuild the ProductStock / ProductUnitStock counters from Item, or verify them."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify', action='store_true',
+            help='Only compare stored counters against a fresh recount; exit non-zero on drift.',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if options['verify']:
+            product_mismatches, unit_mismatches = stock.verify()
+            for key, expected, stored in product_mismatches:
+                self.stdout.write(f"product {key}: expected {expected}, stored {stored}")
+            for (product_id, business_unit_id), expected, stored in unit_mismatches:
+                self.stdout.write(
+                    f"product {product_id} / unit {business_unit_id}: expected {expected}, stored {stored}"
+                )
+            drift = len(product_mismatches) + len(unit_mismatches)
+            if drift:
+                raise CommandError(f"{drift} stock counter row(s) out of date; run without --verify to rebuild.")
+            self.stdout.write(self.style.SUCCESS("Stock counters are consistent."))
+            return
+
+        products, units = stock.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt stock counters for {products} product(s) and {units} product/unit pair(s)."
+        ))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory_app import valuation
+
+
+class Command(BaseCommand):
+    help = "Rebuild the ValuationSummary table from Item and Product, or verify it."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify', action='store_true',
+            help='Only compare stored rows against a fresh aggregate; exit non-zero on drift.',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if options['verify']:
+            mismatches = valuation.verify()
+            for (business_unit_id, category_id, status), expected, stored in mismatches:
+                self.stdout.write(
+                    f"unit {business_unit_id} / category {category_id} / {status}: "
+                    f"expected {expected}, stored {stored}"
+                )
+            if mismatches:
+                raise CommandError(
+                    f"{len(mismatches)} valuation row(s) out of date; run without --verify to rebuild."
+                )
+            self.stdout.write(self.style.SUCCESS("Valuation summary is consistent."))
+            return
+
+        rows = valuation.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} valuation row(s)."))
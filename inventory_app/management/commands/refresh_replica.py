@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory_app import replica
+
+
+class Command(BaseCommand):
+    help = "Copy the primary SQLite database onto the local stand-in replica."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--every', type=int, default=0, metavar='SECONDS',
+            help='Keep running, refreshing every SECONDS.',
+        )
+
+    def handle(self, *args, **options):
+        if not replica.is_standin():
+            raise CommandError("No local stand-in replica configured; set INVENTORY_DB_REPLICA=standin.")
+        while True:
+            took = replica.refresh()
+            self.stdout.write(self.style.SUCCESS(f"Replica refreshed in {took:.3f}s."))
+            if not options['every']:
+                return
+            time.sleep(options['every'])
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_date
+
+from inventory_app import overdue
+
+
+class Command(BaseCommand):
+    help = "Mark Borrowed transactions past their expected return date as Overdue and notify borrowers."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', default=None, help='Sweep as of this date (YYYY-MM-DD; default: today).')
+        parser.add_argument('--no-notify', action='store_true', help='Flip statuses without sending notifications.')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many loans are overdue.')
+        parser.add_argument(
+            '--every', type=int, default=0, metavar='SECONDS',
+            help='Keep running, sweeping every SECONDS (for hosts without cron).',
+        )
+
+    def handle(self, *args, **options):
+        today = parse_date(options['date']) if options['date'] else None
+        while True:
+            started = time.perf_counter()
+            count = overdue.sweep(today=today, notify=not options['no_notify'], dry_run=options['dry_run'])
+            verb = 'Would mark' if options['dry_run'] else 'Marked'
+            self.stdout.write(self.style.SUCCESS(
+                f"{verb} {count} transaction(s) overdue in {time.perf_counter() - started:.3f}s."
+            ))
+            if not options['every']:
+                return
+            time.sleep(options['every'])
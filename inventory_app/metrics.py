@@ -0,0 +1,260 @@
+import bisect
+import contextvars
+import logging
+import random
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import DjangoTemplates, Template
+
+slow_logger = logging.getLogger('inventory_app.slow_sql')
+
+# Fraction of requests that are timed and aggregated (0 turns instrumentation off).
+SAMPLE_RATE = getattr(settings, 'INVENTORY_METRICS_SAMPLE_RATE', 1.0)
+# Queries at or above this many milliseconds are logged with their view; 0 disables.
+# Enabling it wraps the connections of unsampled requests too.
+SLOW_QUERY_MS = getattr(settings, 'INVENTORY_SLOW_QUERY_MS', 0)
+SERVER_TIMING = getattr(settings, 'INVENTORY_METRICS_SERVER_TIMING', True)
+# Bearer token a Prometheus scraper can present instead of an admin session.
+TOKEN = getattr(settings, 'INVENTORY_METRICS_TOKEN', '')
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+_current = contextvars.ContextVar('inventory_metrics_recorder', default=None)
+
+
+# -------------------------------------------------
+# Metric types (in-process; each worker exposes its own)
+# -------------------------------------------------
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values):
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+class Counter:
+    def __init__(self, name, help, labelnames):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                base = _labels(self.labelnames, labels)
+                lines.append(f'{self.name}{{{base}}} {value}' if base else f'{self.name} {value}')
+        return lines
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Gauge(Counter):
+    def set(self, *labels, value):
+        with self._lock:
+            self._values[labels] = value
+
+    def render(self):
+        lines = super().render()
+        lines[1] = f'# TYPE {self.name} gauge'
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labelnames, buckets):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, *labels, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for labels, series in sorted(self._series.items()):
+                base = _labels(self.labelnames, labels)
+                cumulative = 0
+                for bound, count in zip((*self.buckets, '+Inf'), series):
+                    cumulative += count
+                    lines.append(f'{self.name}_bucket{{{base},le="{bound}"}} {cumulative}')
+                lines.append(f'{self.name}_sum{{{base}}} {series[-1]:.6f}')
+                lines.append(f'{self.name}_count{{{base}}} {cumulative}')
+        return lines
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+REQUESTS = Counter('inventory_requests_total', 'Sampled requests by view, method and status.',
+                   ('view', 'method', 'status'))
+LATENCY = Histogram('inventory_request_duration_seconds', 'Request latency.', ('view', 'method'), SECONDS_BUCKETS)
+QUERIES = Histogram('inventory_request_db_queries', 'SQL queries per request.', ('view',), QUERY_BUCKETS)
+DB_TIME = Histogram('inventory_request_db_seconds', 'Time spent executing SQL per request.', ('view',), SECONDS_BUCKETS)
+TEMPLATE_TIME = Histogram('inventory_request_template_seconds', 'Template render time per request.',
+                          ('view',), SECONDS_BUCKETS)
+RESPONSE_SIZE = Histogram('inventory_response_size_bytes', 'Response body size (non-streaming responses).',
+                          ('view',), SIZE_BUCKETS)
+SLOW_QUERIES = Counter('inventory_slow_queries_total', f'Queries slower than {SLOW_QUERY_MS} ms.', ('view',))
+
+# Reported by the outbox worker of this process (see inventory_app.outbox).
+OUTBOX_EVENTS = Counter('inventory_outbox_events_total', 'Outbox events handled by outcome.', ('topic', 'outcome'))
+OUTBOX_LAG = Histogram('inventory_outbox_lag_seconds', 'Time from enqueue to successful handling.',
+                       ('topic',), SECONDS_BUCKETS + (30, 60, 300))
+OUTBOX_BACKLOG = Gauge('inventory_outbox_backlog', 'Outbox events by status, as of the last drain.', ('status',))
+OUTBOX_OLDEST = Gauge('inventory_outbox_oldest_pending_seconds', 'Age of the oldest pending outbox event.', ())
+
+REGISTRY = (
+    REQUESTS, LATENCY, QUERIES, DB_TIME, TEMPLATE_TIME, RESPONSE_SIZE, SLOW_QUERIES,
+    OUTBOX_EVENTS, OUTBOX_LAG, OUTBOX_BACKLOG, OUTBOX_OLDEST,
+)
+
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+def reset():
+    for metric in REGISTRY:
+        metric.reset()
+
+
+# -------------------------------------------------
+# Per-request recording
+# -------------------------------------------------
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None else 'unmatched'
+
+
+class Recorder:
+    """Execute wrapper counting the request's queries; also logs slow ones."""
+
+    def __init__(self, request, sampled):
+        self.request = request
+        self.sampled = sampled
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.queries += 1
+            self.db_seconds += elapsed
+            if SLOW_QUERY_MS and elapsed * 1000 >= SLOW_QUERY_MS:
+                view = view_name(self.request)
+                SLOW_QUERIES.inc(view)
+                slow_logger.warning("%.1f ms in %s: %s", elapsed * 1000, view, sql[:2000])
+
+
+class InstrumentationMiddleware:
+    """
+    Time a sample of requests (INVENTORY_METRICS_SAMPLE_RATE): latency, SQL
+    count and time, template render time and response size, aggregated per
+    view for /metrics and returned in a Server-Timing header. Unsampled
+    requests pass straight through unless INVENTORY_SLOW_QUERY_MS is set,
+    in which case their queries are wrapped for the slow-query check only.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sampled = SAMPLE_RATE > 0 and (SAMPLE_RATE >= 1 or random.random() < SAMPLE_RATE)
+        if not sampled and not SLOW_QUERY_MS:
+            return self.get_response(request)
+
+        recorder = Recorder(request, sampled)
+        token = _current.set(recorder)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(recorder))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        if not sampled:
+            return response
+
+        elapsed = time.perf_counter() - started
+        view = view_name(request)
+        REQUESTS.inc(view, request.method, response.status_code)
+        LATENCY.observe(view, request.method, value=elapsed)
+        QUERIES.observe(view, value=recorder.queries)
+        DB_TIME.observe(view, value=recorder.db_seconds)
+        TEMPLATE_TIME.observe(view, value=recorder.template_seconds)
+        if not response.streaming:
+            RESPONSE_SIZE.observe(view, value=len(response.content))
+        if SERVER_TIMING:
+            response['Server-Timing'] = ', '.join((
+                f'app;dur={elapsed * 1000:.1f}',
+                f'db;dur={recorder.db_seconds * 1000:.1f};desc="{recorder.queries} queries"',
+                f'tpl;dur={recorder.template_seconds * 1000:.1f}',
+            ))
+        return response
+
+
+# -------------------------------------------------
+# Template timing
+# -------------------------------------------------
+class TimedTemplate(Template):
+    """
+    Adds its render time to the current request's recorder. Only top-level
+    renders (render(), render_to_string()) go through this wrapper; includes
+    and {% extends %} parents render inside them, so nothing is counted twice.
+    Lazy querysets evaluated by a template count towards both db and tpl.
+    """
+
+    def render(self, context=None, request=None):
+        recorder = _current.get()
+        if recorder is None or not recorder.sampled:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            recorder.template_seconds += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, handing out TimedTemplate (set as BACKEND in TEMPLATES)."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_stock(apps, schema_editor):
+    Item = apps.get_model('inventory_app', 'Item')
+    ProductStock = apps.get_model('inventory_app', 'ProductStock')
+    ProductUnitStock = apps.get_model('inventory_app', 'ProductUnitStock')
+    fields = {'Available': 'available', 'Assigned': 'assigned', 'In Repair': 'in_repair', 'Retired': 'retired'}
+
+    per_product = {}
+    per_unit = {}
+    rows = Item.objects.values('product_id', 'business_unit_id', 'status').annotate(n=models.Count('id')).order_by()
+    for row in rows:
+        field = fields.get(row['status'])
+        if field is None:
+            continue
+        product = per_product.setdefault(row['product_id'], dict.fromkeys(fields.values(), 0))
+        product[field] += row['n']
+        unit = per_unit.setdefault((row['product_id'], row['business_unit_id']), dict.fromkeys(fields.values(), 0))
+        unit[field] += row['n']
+
+    ProductStock.objects.bulk_create([ProductStock(product_id=pid, **c) for pid, c in per_product.items()])
+    ProductUnitStock.objects.bulk_create([
+        ProductUnitStock(product_id=pid, business_unit_id=bu, **c) for (pid, bu), c in per_unit.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory_app', '0003_businessunit_description_user_business_unit'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductStock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('available', models.PositiveIntegerField(default=0)),
+                ('assigned', models.PositiveIntegerField(default=0)),
+                ('in_repair', models.PositiveIntegerField(default=0)),
+                ('retired', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stock', to='inventory_app.product')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductUnitStock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('available', models.PositiveIntegerField(default=0)),
+                ('assigned', models.PositiveIntegerField(default=0)),
+                ('in_repair', models.PositiveIntegerField(default=0)),
+                ('retired', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('business_unit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='product_stock', to='inventory_app.businessunit')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='unit_stock', to='inventory_app.product')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('product', 'business_unit'), name='unique_product_unit_stock')],
+            },
+        ),
+        migrations.RunPython(backfill_stock, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_valuation(apps, schema_editor):
+    Item = apps.get_model('inventory_app', 'Item')
+    ValuationSummary = apps.get_model('inventory_app', 'ValuationSummary')
+    statuses = {'Available', 'Assigned', 'In Repair', 'Retired'}
+    rows = (
+        Item.objects.values('business_unit_id', 'product__category_id', 'status')
+        .annotate(n=models.Count('id'), value=models.Sum('product__price_per_unit'))
+        .order_by()
+    )
+    ValuationSummary.objects.bulk_create([
+        ValuationSummary(
+            business_unit_id=row['business_unit_id'], category_id=row['product__category_id'],
+            status=row['status'], item_count=row['n'], total_value=row['value'] or 0,
+        )
+        for row in rows if row['status'] in statuses
+    ])
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory_app', '0007_notification_inbox_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ValuationSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('Available', 'Available'), ('Assigned', 'Assigned'), ('In Repair', 'In Repair'), ('Retired', 'Retired')], max_length=20)),
+                ('item_count', models.IntegerField(default=0)),
+                ('total_value', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('business_unit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='valuations', to='inventory_app.businessunit')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='valuations', to='inventory_app.productcategory')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('business_unit', 'category', 'status'), name='unique_valuation_grain')],
+            },
+        ),
+        migrations.RunPython(backfill_valuation, migrations.RunPython.noop),
+    ]
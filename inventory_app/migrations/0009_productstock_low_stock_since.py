@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:46
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def flag_low_stock(apps, schema_editor):
+    # Same as lowstock.sync(): products that never had stock get a zero row first.
+    Product = apps.get_model('inventory_app', 'Product')
+    ProductStock = apps.get_model('inventory_app', 'ProductStock')
+    ProductStock.objects.bulk_create([
+        ProductStock(product_id=pk)
+        for pk in Product.objects.filter(stock__isnull=True, reorder_level__gt=0).values_list('pk', flat=True)
+    ])
+    ProductStock.objects.filter(available__lt=models.F('product__reorder_level')).update(low_stock_since=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory_app', '0008_valuation_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productstock',
+            name='low_stock_since',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.RunPython(flag_low_stock, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory_app', '0009_productstock_low_stock_since'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['status', 'expected_return_date'], name='transaction_status_due_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:52
+
+from django.db import migrations
+
+# rowid = object_id * 4 + kind code (product 1, item 2, request 3); see inventory_app.search.
+BACKFILL = [
+    "INSERT INTO inventory_search(rowid, kind, object_id, title, body) "
+    "SELECT p.id * 4 + 1, 'product', p.id, p.name, c.name "
+    "FROM inventory_app_product p JOIN inventory_app_productcategory c ON c.id = p.category_id",
+    "INSERT INTO inventory_search(rowid, kind, object_id, title, body) "
+    "SELECT id * 4 + 2, 'item', id, serial_number, location FROM inventory_app_item",
+    "INSERT INTO inventory_search(rowid, kind, object_id, title, body) "
+    "SELECT id * 4 + 3, 'request', id, '', reason FROM inventory_app_request",
+]
+
+
+def create_search_index(apps, schema_editor):
+    # FTS5 is SQLite-only; other backends fall back to icontains queries in search.py.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE inventory_search USING fts5("
+        "kind UNINDEXED, object_id UNINDEXED, title, body, "
+        "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+    )
+    for sql in BACKFILL:
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS inventory_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory_app', '0010_transaction_status_due_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
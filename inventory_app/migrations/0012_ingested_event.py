@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory_app', '0011_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestedEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('client_id', models.CharField(max_length=64, unique=True)),
+                ('event_type', models.CharField(max_length=20)),
+                ('serial_number', models.CharField(blank=True, max_length=100)),
+                ('outcome', models.CharField(max_length=30)),
+                ('device', models.CharField(blank=True, max_length=100)),
+                ('occurred_at', models.DateTimeField(blank=True, null=True)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('submitted_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('transaction', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='inventory_app.transaction')),
+            ],
+        ),
+    ]
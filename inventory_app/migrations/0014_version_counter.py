@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory_app', '0013_outbox_event'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('value', models.BigIntegerField()),
+            ],
+        ),
+    ]
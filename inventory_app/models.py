@@ -32,6 +32,9 @@ class User(AbstractUser):
     class Meta:
         verbose_name = "User"
         verbose_name_plural = "Users"
+        indexes = [
+            models.Index(fields=['date_joined', 'id'], name='user_joined_idx'),
+        ]
 
 class ProductCategory(models.Model):
     name = models.CharField(max_length=100)
@@ -59,7 +62,12 @@ class Product(models.Model):
 
     @property
     def quantity_in_stock(self):
-        return self.item_set.filter(status='Available').count()
+        # Served from the maintained ProductStock row; select_related('stock')
+        # keeps list pages at one query.
+        try:
+            return self.stock.available
+        except ProductStock.DoesNotExist:
+            return 0
 
 class Item(models.Model):
     STATUS_CHOICES = [
@@ -93,6 +101,65 @@ class Item(models.Model):
     def __str__(self):
         return f"{self.product.name} ({self.serial_number})"
 
+class StockCounts(models.Model):
+    available = models.PositiveIntegerField(default=0)
+    assigned = models.PositiveIntegerField(default=0)
+    in_repair = models.PositiveIntegerField(default=0)
+    retired = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Maps Item.status values to the counter column that tracks them.
+    STATUS_FIELDS = {
+        'Available': 'available',
+        'Assigned': 'assigned',
+        'In Repair': 'in_repair',
+        'Retired': 'retired',
+    }
+
+    class Meta:
+        abstract = True
+
+    @property
+    def total(self):
+        return self.available + self.assigned + self.in_repair + self.retired
+
+class ProductStock(StockCounts):
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, related_name='stock')
+    # Set while available stock is below Product.reorder_level; see lowstock.evaluate.
+    low_stock_since = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.product.name}: {self.available} available"
+
+class ProductUnitStock(StockCounts):
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='unit_stock')
+    business_unit = models.ForeignKey(BusinessUnit, on_delete=models.CASCADE, related_name='product_stock')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'business_unit'], name='unique_product_unit_stock'),
+        ]
+
+    def __str__(self):
+        return f"{self.product.name} @ {self.business_unit.name}: {self.available} available"
+
+class ValuationSummary(models.Model):
+    # Item count and stock value (count x Product.price_per_unit) per business unit, category and status.
+    business_unit = models.ForeignKey(BusinessUnit, on_delete=models.CASCADE, related_name='valuations')
+    category = models.ForeignKey(ProductCategory, on_delete=models.CASCADE, related_name='valuations')
+    status = models.CharField(max_length=20, choices=Item.STATUS_CHOICES)
+    item_count = models.IntegerField(default=0)
+    total_value = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['business_unit', 'category', 'status'], name='unique_valuation_grain'),
+        ]
+
+    def __str__(self):
+        return f"{self.business_unit} / {self.category} / {self.status}: {self.total_value}"
+
 class Request(models.Model):
     STATUS_CHOICES = [
         ('PENDING_DIRECTOR', 'Pending Director Approval'),
@@ -109,6 +176,12 @@ class Request(models.Model):
     final_approval_date = models.DateTimeField(null=True, blank=True)
     remarks = models.TextField(blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['employee', 'request_date', 'id'], name='request_employee_date_idx'),
+            models.Index(fields=['status', 'request_date', 'id'], name='request_status_date_idx'),
+        ]
+
     def __str__(self):
         return f"{self.product.name} requested by {self.employee.username}"
 
@@ -128,6 +201,12 @@ class Transaction(models.Model):
     condition_on_return = models.CharField(max_length=20, choices=Item.CONDITION_CHOICES, null=True, blank=True)
     remarks = models.TextField(blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['borrow_date', 'id'], name='transaction_borrow_date_idx'),
+            models.Index(fields=['status', 'expected_return_date'], name='transaction_status_due_idx'),
+        ]
+
     def __str__(self):
         return f"{self.item} borrowed by {self.employee.username}"
 
@@ -148,6 +227,12 @@ class Notification(models.Model):
     is_read = models.BooleanField(default=False)
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['recipient', 'timestamp', 'id'], name='notification_recipient_ts_idx'),
+            models.Index(fields=['recipient', 'is_read', 'timestamp', 'id'], name='notification_inbox_idx'),
+        ]
+
     def __str__(self):
         return f"To {self.recipient.username}: {self.message[:30]}..."
 
@@ -159,5 +244,64 @@ class AuditLog(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True)
     description = models.TextField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'timestamp', 'id'], name='auditlog_user_ts_idx'),
+            models.Index(fields=['timestamp'], name='auditlog_ts_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.username} {self.action_type} {self.object_type} {self.object_id}"
+
+class IngestedEvent(models.Model):
+    # One row per offline scanner event, keyed by the client's ID so replays are idempotent.
+    client_id = models.CharField(max_length=64, unique=True)
+    event_type = models.CharField(max_length=20)
+    serial_number = models.CharField(max_length=100, blank=True)
+    outcome = models.CharField(max_length=30)
+    transaction = models.ForeignKey(Transaction, on_delete=models.SET_NULL, null=True, blank=True)
+    submitted_by = models.ForeignKey(User, on_delete=models.CASCADE)
+    device = models.CharField(max_length=100, blank=True)
+    occurred_at = models.DateTimeField(null=True, blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.client_id} {self.event_type} {self.serial_number}: {self.outcome}"
+
+class OutboxEvent(models.Model):
+    # A side effect recorded in the same transaction as the change that caused it; drained by inventory_app.outbox.
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('DONE', 'Done'),
+        ('DEAD', 'Gave up after retries'),
+    ]
+    topic = models.CharField(max_length=50)
+    # Events of one aggregate (e.g. "request:42") are handled strictly in id order.
+    aggregate = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    available_at = models.DateTimeField(default=timezone.now)
+    claimed_by = models.CharField(max_length=100, blank=True)
+    claimed_until = models.DateTimeField(null=True, blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'available_at', 'id'], name='outbox_pending_idx'),
+            models.Index(fields=['aggregate', 'status', 'id'], name='outbox_aggregate_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.topic} {self.aggregate} ({self.status})"
+
+class VersionCounter(models.Model):
+    # Invalidation counter behind API ETags and cached dashboard pages (see inventory_app.versions).
+    # Kept in the database so a write in one worker is seen by every other worker.
+    name = models.CharField(max_length=100, unique=True)
+    value = models.BigIntegerField()
+
+    def __str__(self):
+        return f"{self.name} = {self.value}"
@@ -0,0 +1,383 @@
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, Max, Min, Q
+from django.utils import timezone
+
+from . import inbox, metrics
+from .models import AuditLog, BusinessUnit, Notification, OutboxEvent, Request, User
+
+logger = logging.getLogger(__name__)
+
+# 'sync'     - run handlers inline, inside the caller's transaction (no outbox rows)
+# 'thread'   - write an OutboxEvent in the caller's transaction; a daemon thread
+#              in this process drains it after commit
+# 'external' - only write the rows; `manage.py drain_outbox --every 1` drains them
+MODE = getattr(settings, 'INVENTORY_OUTBOX_MODE', 'thread')
+BATCH_SIZE = getattr(settings, 'INVENTORY_OUTBOX_BATCH_SIZE', 100)
+POLL_INTERVAL = getattr(settings, 'INVENTORY_OUTBOX_POLL_INTERVAL', 1.0)
+MAX_ATTEMPTS = getattr(settings, 'INVENTORY_OUTBOX_MAX_ATTEMPTS', 8)
+RETRY_BASE = getattr(settings, 'INVENTORY_OUTBOX_RETRY_BASE', 2)
+RETRY_MAX = getattr(settings, 'INVENTORY_OUTBOX_RETRY_MAX', 300)
+RETENTION_HOURS = getattr(settings, 'INVENTORY_OUTBOX_RETENTION_HOURS', 24)
+# A claimed batch is handed to another worker if not finished within this long.
+LEASE_SECONDS = 60
+PURGE_EVERY = 3600
+
+HANDLERS = {}
+
+
+def handler(topic):
+    def register(func):
+        HANDLERS[topic] = func
+        return func
+    return register
+
+
+# -------------------------------------------------
+# Enqueueing
+# -------------------------------------------------
+def enqueue(topic, aggregate, payload):
+    """Record a side effect in the current transaction (or run it now in 'sync' mode)."""
+    return enqueue_bulk([(topic, aggregate, payload)])
+
+
+def enqueue_bulk(events):
+    """``events`` is a list of ``(topic, aggregate, payload)``; one INSERT for all of them."""
+    if not events:
+        return []
+    if MODE == 'sync':
+        for topic, _, payload in events:
+            HANDLERS[topic](payload)
+        return []
+    now = timezone.now()
+    rows = OutboxEvent.objects.bulk_create([
+        OutboxEvent(topic=topic, aggregate=aggregate, payload=payload, created_at=now, available_at=now)
+        for topic, aggregate, payload in events
+    ])
+    if MODE == 'thread':
+        transaction.on_commit(worker.wake)
+    return rows
+
+
+# -------------------------------------------------
+# Draining
+# -------------------------------------------------
+def _owner():
+    return f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+
+
+def _retry_delay(attempts):
+    return min(RETRY_BASE * 2 ** (attempts - 1), RETRY_MAX)
+
+
+def _unclaimed(now):
+    return Q(claimed_until__isnull=True) | Q(claimed_until__lt=now)
+
+
+def drain(batch_size=BATCH_SIZE, owner=None):
+    """
+    Claim up to ``batch_size`` due events and handle them in id order.
+    Returns the number handled or failed; deferred events are not counted.
+
+    Claims are a compare-and-swap lease, so several workers can drain at
+    once. An event is only handled when no earlier PENDING event of its
+    aggregate is outside this batch, and a failure defers the rest of its
+    aggregate's events, which keeps each aggregate strictly ordered.
+    """
+    return _drain(batch_size, owner or _owner())[1]
+
+
+def _drain(batch_size, owner, after=0):
+    """One batch of events with ids above ``after``; returns ``(claimed ids, handled)``."""
+    now = timezone.now()
+    due = OutboxEvent.objects.filter(_unclaimed(now), status='PENDING', available_at__lte=now, id__gt=after)
+    ids = list(due.order_by('id').values_list('id', flat=True)[:batch_size])
+    if not ids:
+        return ids, 0
+    due.filter(id__in=ids).update(claimed_by=owner, claimed_until=now + timedelta(seconds=LEASE_SECONDS))
+    events = list(OutboxEvent.objects.filter(id__in=ids, claimed_by=owner, status='PENDING').order_by('id'))
+    if not events:
+        return ids, 0
+
+    # First pending event of each aggregate that this batch does not hold.
+    blockers = {}
+    earlier = (
+        OutboxEvent.objects
+        .filter(status='PENDING', aggregate__in={e.aggregate for e in events}, id__lt=events[-1].id)
+        .exclude(id__in=[e.id for e in events])
+        .values_list('aggregate', 'id')
+    )
+    for aggregate, event_id in earlier:
+        blockers[aggregate] = min(event_id, blockers.get(aggregate, event_id))
+
+    deferred = []
+    failed = set()
+    for event in events:
+        if event.aggregate in failed or blockers.get(event.aggregate, event.id) < event.id:
+            deferred.append(event.id)
+        elif not handle(event, owner):
+            failed.add(event.aggregate)
+    if deferred:
+        OutboxEvent.objects.filter(id__in=deferred, claimed_by=owner).update(claimed_until=None)
+    return ids, len(events) - len(deferred)
+
+
+def handle(event, owner):
+    """Run one event's handler and mark it DONE in the same transaction. Returns success."""
+    try:
+        with transaction.atomic():
+            HANDLERS[event.topic](event.payload)
+            done = OutboxEvent.objects.filter(id=event.id, claimed_by=owner, status='PENDING').update(
+                status='DONE', attempts=event.attempts + 1, processed_at=timezone.now(), claimed_until=None,
+            )
+            if not done:
+                # The lease expired and another worker took the event over; undo our side effects.
+                transaction.set_rollback(True)
+                return False
+    except Exception as e:
+        attempts = event.attempts + 1
+        dead = attempts >= MAX_ATTEMPTS
+        OutboxEvent.objects.filter(id=event.id, claimed_by=owner).update(
+            status='DEAD' if dead else 'PENDING',
+            attempts=attempts,
+            last_error=''.join(traceback.format_exception_only(e)).strip()[:2000],
+            available_at=timezone.now() + timedelta(seconds=_retry_delay(attempts)),
+            claimed_until=None,
+        )
+        logger.log(
+            logging.ERROR if dead else logging.WARNING,
+            "Outbox event %s (%s) failed on attempt %d%s", event.id, event.topic, attempts,
+            '; giving up' if dead else '', exc_info=dead,
+        )
+        metrics.OUTBOX_EVENTS.inc(event.topic, 'dead' if dead else 'retry')
+        return False
+    metrics.OUTBOX_EVENTS.inc(event.topic, 'done')
+    metrics.OUTBOX_LAG.observe(event.topic, value=(timezone.now() - event.created_at).total_seconds())
+    return True
+
+
+def drain_all(batch_size=BATCH_SIZE):
+    """
+    Drain until nothing is due; returns the number of events handled or failed.
+    Each pass starts past the ids of the one before, so events deferred behind
+    a failed or not-yet-due event are left for the next call instead of being
+    claimed over and over.
+    """
+    owner = _owner()
+    total, after = 0, 0
+    while True:
+        ids, handled = _drain(batch_size, owner, after)
+        total += handled
+        if len(ids) < batch_size:
+            return total
+        after = ids[-1]
+
+
+def backlog():
+    """Pending/dead counts, oldest pending age and the lag of the last hour's events (seconds)."""
+    now = timezone.now()
+    counts = dict(
+        OutboxEvent.objects.filter(status__in=('PENDING', 'DEAD'))
+        .values_list('status').annotate(n=Count('id')).order_by()
+    )
+    oldest = OutboxEvent.objects.filter(status='PENDING').aggregate(oldest=Min('created_at'))['oldest']
+    lag = ExpressionWrapper(F('processed_at') - F('created_at'), output_field=DurationField())
+    recent = OutboxEvent.objects.filter(status='DONE', processed_at__gte=now - timedelta(hours=1)).aggregate(
+        done=Count('id'), avg_lag=Avg(lag), max_lag=Max(lag),
+    )
+    stats = {
+        'pending': counts.get('PENDING', 0),
+        'dead': counts.get('DEAD', 0),
+        'oldest_pending_seconds': (now - oldest).total_seconds() if oldest else 0.0,
+        'done_last_hour': recent['done'],
+        'avg_lag_seconds': recent['avg_lag'].total_seconds() if recent['done'] else None,
+        'max_lag_seconds': recent['max_lag'].total_seconds() if recent['done'] else None,
+    }
+    metrics.OUTBOX_BACKLOG.set('PENDING', value=stats['pending'])
+    metrics.OUTBOX_BACKLOG.set('DEAD', value=stats['dead'])
+    metrics.OUTBOX_OLDEST.set(value=stats['oldest_pending_seconds'])
+    return stats
+
+
+def purge(hours=RETENTION_HOURS):
+    """Delete DONE events processed more than ``hours`` ago."""
+    cutoff = timezone.now() - timedelta(hours=hours)
+    deleted, _ = OutboxEvent.objects.filter(status='DONE', processed_at__lt=cutoff).delete()
+    return deleted
+
+
+def retry_dead():
+    """Put every DEAD event back in the queue with a fresh attempt budget."""
+    return OutboxEvent.objects.filter(status='DEAD').update(
+        status='PENDING', attempts=0, available_at=timezone.now(), claimed_until=None,
+    )
+
+
+# -------------------------------------------------
+# In-process worker
+# -------------------------------------------------
+class OutboxWorker:
+    """
+    Daemon thread that drains the outbox when woken after a commit, and
+    every ``interval`` seconds for retries and events left by other
+    processes. Server processes start it at boot (apps.start_background_tasks),
+    so events left behind by a restart are drained without waiting for a new
+    commit; anything else starts it on the first wake-up.
+    """
+
+    def __init__(self, interval=POLL_INTERVAL):
+        self.interval = interval
+        self.runs = 0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._purged = 0.0
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name='outbox-worker', daemon=True)
+                self._thread.start()
+
+    def wake(self):
+        self.start()
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                close_old_connections()
+                drain_all()
+                backlog()
+                if time.monotonic() - self._purged >= PURGE_EVERY:
+                    purge()
+                    self._purged = time.monotonic()
+                self.runs += 1
+            except Exception:
+                logger.exception("Outbox drain failed")
+            finally:
+                close_old_connections()
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+
+worker = OutboxWorker()
+
+
+# -------------------------------------------------
+# Handlers (formerly run inline by the signal receivers)
+# -------------------------------------------------
+@handler('request.submitted')
+def notify_director(payload):
+    req = (
+        Request.objects.select_related('employee__business_unit__director', 'product')
+        .filter(pk=payload['request_id']).first()
+    )
+    if req is None:
+        return
+    unit = req.employee.business_unit
+    director = unit.director if unit is not None else None
+    if director is None:
+        logger.warning(f"No director assigned to business unit '{unit}' for request {req.id}")
+        return
+    Notification.objects.create(
+        recipient=director,
+        message=f"New request from {req.employee.username} for {req.product.name}"
+    )
+
+
+def _review_notification(req, role, status, officer):
+    if status == 'REJECTED':
+        return Notification(
+            recipient_id=req.employee_id,
+            message=f"Your request #{req.id} has been rejected by {role.title()}."
+        )
+    if role == 'DIRECTOR':
+        if officer is None:
+            logger.warning(f"No Inventory Officer found to notify for request {req.id}")
+            return None
+        return Notification(
+            recipient=officer,
+            message=f"Request #{req.id} approved by Director. Awaiting your action."
+        )
+    if role == 'INVENTORY_OFFICER':
+        return Notification(
+            recipient_id=req.employee_id,
+            message=f"Your request #{req.id} for {req.product.name} has been approved."
+        )
+    return None
+
+
+def _officer_to_notify(role, status):
+    if role == 'DIRECTOR' and status != 'REJECTED':
+        return User.objects.filter(role='INVENTORY_OFFICER').first()
+    return None
+
+
+@handler('request.reviewed')
+def notify_review(payload):
+    req = Request.objects.select_related('product').filter(pk=payload['request_id']).first()
+    if req is None:
+        return
+    officer = _officer_to_notify(payload['role'], payload['status'])
+    note = _review_notification(req, payload['role'], payload['status'], officer)
+    if note is not None:
+        note.save()
+
+
+@handler('requests.reviewed')
+def notify_reviews(payload):
+    """Batch form of request.reviewed from bulk.process_requests: one INSERT for the whole batch."""
+    requests = Request.objects.select_related('product').in_bulk(payload['request_ids'])
+    officer = _officer_to_notify(payload['role'], payload['status'])
+    notes = [
+        _review_notification(requests[request_id], payload['role'], payload['status'], officer)
+        for request_id in payload['request_ids'] if request_id in requests
+    ]
+    inbox.notify_bulk([note for note in notes if note is not None])
+
+
+# Audit entries are written directly rather than through audit.record(), so
+# they commit together with the event's DONE mark.
+@handler('user.created')
+def audit_user_creation(payload):
+    if not User.objects.filter(pk=payload['user_id']).exists():
+        return
+    AuditLog.objects.create(
+        user_id=payload['user_id'], action_type='Create', object_type='User', object_id=payload['user_id'],
+        description=f"User {payload['username']} was created with role {payload['role']}",
+    )
+
+
+@handler('businessunit.director_assigned')
+def audit_director_assignment(payload):
+    if not User.objects.filter(pk=payload['director_id']).exists():
+        return
+    if not BusinessUnit.objects.filter(pk=payload['unit_id']).exists():
+        return
+    AuditLog.objects.bulk_create([
+        AuditLog(
+            user_id=payload['director_id'], action_type='Assign', object_type='BusinessUnit',
+            object_id=payload['unit_id'],
+            description=f"User {payload['director']} assigned as Director of {payload['unit']}",
+        ),
+        AuditLog(
+            user_id=payload['director_id'], action_type='Create', object_type='BusinessUnit',
+            object_id=payload['unit_id'],
+            description=f"Business Unit {payload['unit']} created with Director {payload['director']}",
+        ),
+    ])
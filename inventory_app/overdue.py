@@ -0,0 +1,105 @@
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from . import inbox, versions
+from .models import Notification, Transaction, User
+
+logger = logging.getLogger(__name__)
+
+SWEEP_INTERVAL = getattr(settings, 'INVENTORY_OVERDUE_SWEEP_INTERVAL', 0)  # seconds; 0 disables the scheduler
+OPEN_STATUSES = ('Borrowed', 'Overdue')
+
+
+# -------------------------------------------------
+# Sweep
+# -------------------------------------------------
+def _due(today):
+    # Served by transaction_status_due_idx (status, expected_return_date).
+    return Transaction.objects.filter(status='Borrowed', expected_return_date__lt=today)
+
+
+def sweep(today=None, notify=True, dry_run=False):
+    """
+    Flip every Borrowed loan whose expected_return_date has passed to
+    Overdue with one UPDATE, then notify each borrower and send officers
+    a single summary. Returns the number of loans flipped.
+    """
+    today = today or timezone.localdate()
+    with transaction.atomic():
+        rows = list(
+            _due(today)
+            .order_by()
+            .values_list('id', 'employee_id', 'expected_return_date', 'item__serial_number', 'item__product__name')
+        )
+        if not rows or dry_run:
+            return len(rows)
+        # Bound the UPDATE to the rows read above so every flipped loan is notified.
+        flipped = _due(today).filter(id__lte=max(r[0] for r in rows)).update(status='Overdue')
+        versions.bump('transaction')
+        if notify:
+            _notify(rows)
+    logger.info("Overdue sweep for %s flipped %d loan(s)", today, flipped)
+    return flipped
+
+
+def _notify(rows):
+    notifications = [
+        Notification(
+            recipient_id=employee_id,
+            message=f"Your loan of {product} ({serial}) was due on {due} and is now overdue."
+        )
+        for _, employee_id, due, serial, product in rows
+    ]
+    summary = f"{len(rows)} loan(s) became overdue."
+    notifications.extend(
+        Notification(recipient_id=officer_id, message=summary)
+        for officer_id in User.objects.filter(role='INVENTORY_OFFICER').values_list('id', flat=True)
+    )
+    inbox.notify_bulk(notifications)
+
+
+# -------------------------------------------------
+# In-process scheduler
+# -------------------------------------------------
+class OverdueScheduler:
+    """Daemon thread running sweep() every ``interval`` seconds."""
+
+    def __init__(self, interval=SWEEP_INTERVAL):
+        self.interval = interval
+        self.runs = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name='overdue-sweeper', daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                close_old_connections()
+                sweep()
+                self.runs += 1
+            except Exception:
+                logger.exception("Overdue sweep failed")
+            finally:
+                close_old_connections()
+
+
+scheduler = OverdueScheduler()
+
+
+def start_scheduler():
+    if SWEEP_INTERVAL > 0:
+        scheduler.start()
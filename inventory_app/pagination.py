@@ -0,0 +1,231 @@
+import base64
+import binascii
+import datetime
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import HttpResponseBadRequest, JsonResponse
+from django.shortcuts import render
+from django.utils.dateparse import parse_date, parse_datetime
+
+DEFAULT_PAGE_SIZE = getattr(settings, 'INVENTORY_PAGE_SIZE', 50)
+MAX_PAGE_SIZE = getattr(settings, 'INVENTORY_MAX_PAGE_SIZE', 200)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+# -------------------------------------------------
+# Cursor encoding
+# -------------------------------------------------
+def _dump_value(value):
+    if isinstance(value, datetime.datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {'d': value.isoformat()}
+    return value
+
+
+def _load_value(value):
+    if isinstance(value, dict):
+        if 'dt' in value:
+            parsed = parse_datetime(value['dt'])
+        elif 'd' in value:
+            parsed = parse_date(value['d'])
+        else:
+            parsed = None
+        if parsed is None:
+            raise InvalidCursor('Unreadable cursor value.')
+        return parsed
+    # Keys are column values: anything else (lists, objects, booleans) is a forged cursor.
+    if value is not None and (isinstance(value, bool) or not isinstance(value, (str, int, float))):
+        raise InvalidCursor('Unreadable cursor value.')
+    return value
+
+
+def encode_cursor(values, direction):
+    payload = json.dumps({'k': [_dump_value(v) for v in values], 'd': direction}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, keys):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        direction = payload['d']
+        values = [_load_value(v) for v in payload['k']]
+    except (binascii.Error, ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor(str(e)) from e
+    if direction not in ('next', 'prev'):
+        raise InvalidCursor('Unknown cursor direction.')
+    if len(values) != len(keys):
+        raise InvalidCursor('Cursor does not match this listing.')
+    return values, direction
+
+
+# -------------------------------------------------
+# Keyset pagination
+# -------------------------------------------------
+class CursorPage:
+    def __init__(self, object_list, next_cursor, prev_cursor, query_params, page_size):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.page_size = page_size
+        self._query_params = query_params
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.prev_cursor is not None
+
+    def _query(self, cursor):
+        params = self._query_params.copy()
+        params['cursor'] = cursor
+        params.pop('format', None)
+        return params.urlencode()
+
+    @property
+    def next_query(self):
+        return self._query(self.next_cursor) if self.next_cursor else ''
+
+    @property
+    def prev_query(self):
+        return self._query(self.prev_cursor) if self.prev_cursor else ''
+
+
+def seek_filter(fields, values, descending, after):
+    """
+    Build the row-value comparison ``(f1, f2, ...) < (v1, v2, ...)`` (or ``>``)
+    as nested Q objects, since Django has no tuple comparison.
+    """
+    forward = descending == after
+    op = 'lt' if forward else 'gt'
+    condition = Q()
+    for i in range(len(fields) - 1, -1, -1):
+        strict = Q(**{f'{fields[i]}__{op}': values[i]})
+        if i == len(fields) - 1:
+            condition = strict
+        else:
+            condition = strict | (Q(**{fields[i]: values[i]}) & condition)
+    return condition
+
+
+def _key_of(obj, fields):
+    if isinstance(obj, dict):
+        return [obj[f] for f in fields]
+    return [getattr(obj, f) for f in fields]
+
+
+def get_page_size(request, default=None):
+    default = default or DEFAULT_PAGE_SIZE
+    try:
+        size = int(request.GET.get('page_size', default))
+    except (TypeError, ValueError):
+        size = default
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def paginate(request, queryset, keys=('timestamp', 'id'), descending=True, page_size=None):
+    """
+    Seek-paginate ``queryset`` by the unique, indexed column tuple ``keys``.
+
+    The page is located with ``WHERE (keys) < cursor ORDER BY keys LIMIT n+1``
+    rather than OFFSET, so every page costs the same regardless of depth.
+    """
+    keys = list(keys)
+    prefix = '-' if descending else ''
+    order = [f'{prefix}{k}' for k in keys]
+    reverse_order = [k[1:] if k.startswith('-') else f'-{k}' for k in order]
+
+    def fetch(values, after, limit):
+        qs = queryset
+        if values is not None:
+            qs = qs.filter(seek_filter(keys, values, descending, after))
+        return list(qs.order_by(*(order if after else reverse_order))[:limit])
+
+    return paginate_with(request, fetch, keys, page_size)
+
+
+def paginate_with(request, fetch, keys, page_size=None):
+    """
+    Keyset pagination over any row source. ``fetch(values, after, limit)``
+    returns up to ``limit`` rows past the cursor ``values`` (None for the
+    first page): in listing order when ``after`` is true, reversed otherwise.
+    """
+    keys = list(keys)
+    page_size = page_size or get_page_size(request)
+
+    cursor = request.GET.get('cursor')
+    values, direction = None, 'next'
+    if cursor:
+        values, direction = decode_cursor(cursor, keys)
+
+    try:
+        rows = list(fetch(values, direction != 'prev', page_size + 1))
+    except (TypeError, ValueError, ValidationError) as e:
+        # A well-formed cursor can still carry the wrong type for its column.
+        if values is None:
+            raise
+        raise InvalidCursor(str(e)) from e
+    if direction == 'prev':
+        has_more = len(rows) > page_size
+        rows = rows[:page_size][::-1]
+        has_prev, has_next = has_more, bool(rows)
+    else:
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        has_prev, has_next = bool(cursor) and bool(rows), has_more
+
+    next_cursor = encode_cursor(_key_of(rows[-1], keys), 'next') if has_next and rows else None
+    prev_cursor = encode_cursor(_key_of(rows[0], keys), 'prev') if has_prev and rows else None
+    return CursorPage(rows, next_cursor, prev_cursor, request.GET, page_size)
+
+
+def wants_json(request):
+    return request.GET.get('format') == 'json' or 'application/json' in request.headers.get('Accept', '')
+
+
+def page_json_response(page):
+    """JSON variant of a page built from a ``.values()`` queryset."""
+    return JsonResponse({
+        'results': list(page.object_list),
+        'next_cursor': page.next_cursor,
+        'prev_cursor': page.prev_cursor,
+        'page_size': page.page_size,
+    })
+
+
+def render_paginated(request, template, queryset, context_name, json_fields,
+                     keys=('timestamp', 'id'), descending=True, context=None):
+    """
+    Render one keyset page of ``queryset`` into ``template`` as ``context_name``
+    (plus ``page`` for the pager), or as JSON when ``?format=json`` is asked for.
+    """
+    try:
+        if wants_json(request):
+            fields = list(dict.fromkeys([*json_fields, *keys]))
+            return page_json_response(paginate(request, queryset.values(*fields), keys, descending))
+        page = paginate(request, queryset, keys, descending)
+    except InvalidCursor:
+        return HttpResponseBadRequest('Invalid cursor.')
+    return render_page(request, template, page, context_name, context)
+
+
+def render_page(request, template, page, context_name, context=None):
+    context = dict(context or {})
+    context[context_name] = page.object_list
+    context['page'] = page
+    return render(request, template, context)
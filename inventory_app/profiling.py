@@ -0,0 +1,287 @@
+import cProfile
+import json
+import logging
+import marshal
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = Path(getattr(settings, 'INVENTORY_PROFILE_DIR', settings.BASE_DIR / 'profiles'))
+KEEP = getattr(settings, 'INVENTORY_PROFILE_KEEP', 50)
+SAMPLE_INTERVAL = getattr(settings, 'INVENTORY_PROFILE_SAMPLE_INTERVAL', 0.005)
+# How long a process trusts its last read of the switch file.
+SWITCH_REFRESH = 2
+TOP_N = 10
+MODES = ('cprofile', 'sample')
+
+SWITCH_NAME = 'switch.json'
+FILE_PATTERN = re.compile(r'^profile-[0-9]{8}-[0-9]{12}-[0-9a-f]{6}\.(json|prof|folded)$')
+
+# Profilers are process-wide on newer Pythons; one profiled request at a time.
+_busy = threading.Lock()
+_switch = {'value': None, 'checked': 0.0}
+
+
+# -------------------------------------------------
+# Switch (shared by the processes of one host through PROFILE_DIR)
+# -------------------------------------------------
+def enable(path='', username='', rate=1.0, mode='cprofile', minutes=15):
+    """Profile matching requests for the next ``minutes``; returns the switch."""
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode {mode!r}; expected one of {', '.join(MODES)}.")
+    switch = {
+        'path': path, 'username': username, 'rate': rate, 'mode': mode,
+        'until': time.time() + minutes * 60,
+    }
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = PROFILE_DIR / f'.{SWITCH_NAME}.{os.getpid()}'
+    tmp.write_text(json.dumps(switch))
+    os.replace(tmp, PROFILE_DIR / SWITCH_NAME)
+    _switch['checked'] = 0.0
+    return switch
+
+
+def disable():
+    try:
+        (PROFILE_DIR / SWITCH_NAME).unlink()
+    except FileNotFoundError:
+        pass
+    _switch['checked'] = 0.0
+
+
+def read_switch():
+    """The active switch, or None when profiling is off or has expired."""
+    try:
+        switch = json.loads((PROFILE_DIR / SWITCH_NAME).read_text())
+    except (OSError, ValueError):
+        return None
+    return switch if switch.get('until', 0) > time.time() else None
+
+
+def current():
+    now = time.monotonic()
+    if now - _switch['checked'] >= SWITCH_REFRESH:
+        _switch['value'] = read_switch()
+        _switch['checked'] = now
+    switch = _switch['value']
+    if switch is not None and switch['until'] <= time.time():
+        switch = _switch['value'] = None
+    return switch
+
+
+def matches(switch, request):
+    if switch['path'] and not request.path.startswith(switch['path']):
+        return False
+    if switch['username'] and getattr(request.user, 'username', None) != switch['username']:
+        return False
+    return switch['rate'] >= 1 or random.random() < switch['rate']
+
+
+# -------------------------------------------------
+# Capture
+# -------------------------------------------------
+class StackSampler:
+    """Daemon thread recording the stack of ``thread_id`` every ``interval`` seconds."""
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()  # tuple of (filename, line, name) keys, root first -> samples
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_filename, code.co_firstlineno, getattr(code, 'co_qualname', code.co_name)))
+                frame = frame.f_back
+            if stack:
+                self.stacks[tuple(reversed(stack))] += 1
+
+    def collapsed(self):
+        """Brendan Gregg's collapsed-stack format, for flamegraph.pl or speedscope."""
+        lines = []
+        for stack, count in self.stacks.most_common():
+            frames = ';'.join(f'{name} ({os.path.basename(filename)}:{line})' for filename, line, name in stack)
+            lines.append(f'{frames} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def pstats(self):
+        """
+        The samples as a pstats-compatible stats dict, so sampled profiles load
+        in pstats/snakeviz like cProfile ones. Times are samples x interval;
+        call counts are sample counts.
+        """
+        stats = {}
+        for stack, count in self.stacks.items():
+            seconds = count * self.interval
+            for func in set(stack):
+                cc, nc, tt, ct, callers = stats.get(func, (0, 0, 0.0, 0.0, {}))
+                stats[func] = (cc + count, nc + count, tt, ct + seconds, callers)
+            leaf = stack[-1]
+            cc, nc, tt, ct, callers = stats[leaf]
+            stats[leaf] = (cc, nc, tt + seconds, ct, callers)
+            for caller, callee in zip(stack, stack[1:]):
+                callers = stats[callee][4]
+                c_nc, c_cc, c_tt, c_ct = callers.get(caller, (0, 0, 0.0, 0.0))
+                callers[caller] = (c_nc + count, c_cc + count, c_tt, c_ct + seconds)
+        return stats
+
+
+def _function_name(func):
+    filename, line, name = func
+    if filename == '~':
+        return name
+    return f'{name} ({os.path.basename(filename)}:{line})'
+
+
+def top_functions(stats, limit=TOP_N):
+    ranked = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:limit]
+    return [
+        {'function': _function_name(func), 'calls': nc, 'self_ms': round(tt * 1000, 2), 'total_ms': round(ct * 1000, 2)}
+        for func, (cc, nc, tt, ct, callers) in ranked
+    ]
+
+
+def capture(request, get_response, mode):
+    """
+    Run the rest of the stack under cProfile or the stack sampler and write
+    the profile to PROFILE_DIR. Streaming bodies are produced after the view
+    returns and are not part of the profile.
+    """
+    if not _busy.acquire(blocking=False):
+        return get_response(request)
+    try:
+        started = time.perf_counter()
+        if mode == 'sample':
+            sampler = StackSampler(threading.get_ident())
+            sampler.start()
+            try:
+                response = get_response(request)
+            finally:
+                sampler.stop()
+            stats, collapsed, samples = sampler.pstats(), sampler.collapsed(), sum(sampler.stacks.values())
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                response = get_response(request)
+            finally:
+                profiler.disable()
+            profiler.create_stats()
+            stats, collapsed, samples = profiler.stats, None, None
+        elapsed = time.perf_counter() - started
+    finally:
+        _busy.release()
+
+    try:
+        save(request, response, mode, elapsed, stats, collapsed, samples)
+    except OSError:
+        logger.exception("Could not write profile for %s", request.path)
+    return response
+
+
+# -------------------------------------------------
+# Storage
+# -------------------------------------------------
+def save(request, response, mode, elapsed, stats, collapsed=None, samples=None):
+    now = timezone.now()
+    profile_id = f"profile-{now:%Y%m%d-%H%M%S%f}-{uuid.uuid4().hex[:6]}"
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+
+    # A request shorter than the sample interval has no samples; pstats
+    # cannot load an empty dump, so only the metadata is kept.
+    files = []
+    if stats:
+        files.append(f'{profile_id}.prof')
+        with open(PROFILE_DIR / files[-1], 'wb') as f:
+            marshal.dump(stats, f)
+    if stats and collapsed is not None:
+        files.append(f'{profile_id}.folded')
+        (PROFILE_DIR / files[-1]).write_text(collapsed)
+
+    match = getattr(request, 'resolver_match', None)
+    user = getattr(request, 'user', None)
+    meta = {
+        'id': profile_id,
+        'created': now.isoformat(),
+        'method': request.method,
+        'path': request.path,
+        'view': match.view_name if match is not None else None,
+        'user': user.username if user is not None and user.is_authenticated else None,
+        'status': response.status_code,
+        'mode': mode,
+        'duration_ms': round(elapsed * 1000, 1),
+        'samples': samples,
+        'files': files,
+        'top': top_functions(stats),
+    }
+    (PROFILE_DIR / f'{profile_id}.json').write_text(json.dumps(meta, indent=2))
+    prune()
+    return meta
+
+
+def _profile_ids():
+    return sorted((p.stem for p in PROFILE_DIR.glob('profile-*.json')), reverse=True)
+
+
+def recent(limit=10):
+    """Metadata of the newest profiles, newest first."""
+    profiles = []
+    for profile_id in _profile_ids()[:limit]:
+        try:
+            profiles.append(json.loads((PROFILE_DIR / f'{profile_id}.json').read_text()))
+        except (OSError, ValueError):
+            continue
+    return profiles
+
+
+def prune(keep=KEEP):
+    for profile_id in _profile_ids()[keep:]:
+        for path in PROFILE_DIR.glob(f'{profile_id}.*'):
+            path.unlink(missing_ok=True)
+
+
+def profile_path(name):
+    """Path of a stored profile file, or None if ``name`` is not one."""
+    if not FILE_PATTERN.match(name):
+        return None
+    path = PROFILE_DIR / name
+    return path if path.is_file() else None
+
+
+class ProfilingMiddleware:
+    """
+    Profile requests matching the switch set by enable(). When profiling is
+    off this costs a clock read and a dict lookup per request.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        switch = current()
+        if switch is None or not matches(switch, request):
+            return self.get_response(request)
+        return capture(request, self.get_response, switch['mode'])
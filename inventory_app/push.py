@@ -0,0 +1,117 @@
+import asyncio
+import collections
+import threading
+
+from django.conf import settings
+
+# Per-connection buffer; a subscriber that falls this far behind is flagged
+# and catches up from the database instead of growing without bound.
+QUEUE_SIZE = getattr(settings, 'INVENTORY_PUSH_QUEUE_SIZE', 100)
+HEARTBEAT = getattr(settings, 'INVENTORY_PUSH_HEARTBEAT', 15)
+LONG_POLL_TIMEOUT = getattr(settings, 'INVENTORY_PUSH_LONG_POLL_TIMEOUT', 5)
+POLL_INTERVAL = getattr(settings, 'INVENTORY_PUSH_POLL_INTERVAL', 15)
+TRANSPORT = getattr(settings, 'INVENTORY_PUSH_TRANSPORT', 'off')
+
+
+# -------------------------------------------------
+# Subscribers
+# -------------------------------------------------
+class AsyncSubscriber:
+    """An SSE connection: an asyncio.Queue fed thread-safely from publishers."""
+
+    def __init__(self, loop=None):
+        self.loop = loop or asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.overflowed = False
+
+    def _put(self, payload):
+        try:
+            self.queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    def deliver(self, payload):
+        self.loop.call_soon_threadsafe(self._put, payload)
+
+    async def get(self, timeout):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class ThreadSubscriber:
+    """A long-poll request parked on a worker thread."""
+
+    def __init__(self):
+        self.items = collections.deque(maxlen=QUEUE_SIZE)
+        self.event = threading.Event()
+
+    def deliver(self, payload):
+        self.items.append(payload)
+        self.event.set()
+
+    def wait(self, timeout):
+        return self.event.wait(timeout)
+
+
+# -------------------------------------------------
+# Fan-out hub
+# -------------------------------------------------
+class NotificationHub:
+    """
+    In-process fan-out keyed by recipient. An idle connection is one entry in
+    a set and a parked waiter; publishing to a user touches only that user's
+    subscribers. Only connections held by the publishing process are reached;
+    there is no cross-process channel.
+    """
+
+    def __init__(self):
+        self._subscribers = collections.defaultdict(set)
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def subscribe(self, user_id, subscriber):
+        with self._lock:
+            self._subscribers[user_id].add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, user_id, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(user_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[user_id]
+
+    def publish(self, user_id, payload):
+        with self._lock:
+            targets = list(self._subscribers.get(user_id, ()))
+        for subscriber in targets:
+            try:
+                subscriber.deliver(payload)
+            except RuntimeError:
+                # The subscriber's event loop has shut down; drop it.
+                self.unsubscribe(user_id, subscriber)
+        self.published += 1
+        return len(targets)
+
+    def connection_count(self):
+        with self._lock:
+            return sum(len(s) for s in self._subscribers.values())
+
+
+hub = NotificationHub()
+
+
+def payload_for(notification):
+    return {
+        'id': notification.id,
+        'message': notification.message,
+        'is_read': notification.is_read,
+        'timestamp': notification.timestamp.isoformat() if notification.timestamp else None,
+    }
+
+
+def publish_notification(notification):
+    hub.publish(notification.recipient_id, payload_for(notification))
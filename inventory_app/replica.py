@@ -0,0 +1,209 @@
+import contextvars
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from functools import wraps
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+ALIAS = getattr(settings, 'INVENTORY_REPLICA_ALIAS', 'replica')
+# After any write a user reads from the primary for this long (read-your-writes).
+PIN_SECONDS = getattr(settings, 'INVENTORY_REPLICA_PIN_SECONDS', 10)
+PIN_COOKIE = 'replica_pin'
+# Local stand-in only: seconds between refreshes, and how old the copy may
+# get before reads fall back to the primary.
+REFRESH_INTERVAL = getattr(settings, 'INVENTORY_REPLICA_REFRESH_INTERVAL', 5)
+MAX_LAG = getattr(settings, 'INVENTORY_REPLICA_MAX_LAG', 60)
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_read_alias = contextvars.ContextVar('inventory_read_alias', default=None)
+# Per-request ``{'wrote': bool}`` set up by ReplicaPinMiddleware. A dict rather
+# than a bool so a write made in a copied context (sync_to_async) still lands.
+_request_writes = contextvars.ContextVar('inventory_request_writes', default=None)
+
+
+def configured():
+    return ALIAS in settings.DATABASES
+
+
+def is_standin():
+    return configured() and settings.DATABASES[ALIAS].get('ENGINE') == 'django.db.backends.sqlite3'
+
+
+def lag():
+    """Seconds since the local stand-in was refreshed (None if it was never built)."""
+    try:
+        return time.time() - os.path.getmtime(settings.DATABASES[ALIAS]['NAME'])
+    except OSError:
+        return None
+
+
+def available():
+    if not configured():
+        return False
+    if is_standin():
+        age = lag()
+        return age is not None and age <= MAX_LAG
+    return True
+
+
+# -------------------------------------------------
+# Router
+# -------------------------------------------------
+class ReplicaRouter:
+    """
+    Send reads to the replica only while a @replica_reads view is running
+    for a user who is not pinned to the primary; everything else, and every
+    write and migration, uses ``default``.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+def _pinned(request):
+    try:
+        return float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def _streaming(iterator, alias):
+    # Streaming bodies are consumed after the view returns, so re-enter the
+    # replica routing around each chunk.
+    iterator = iter(iterator)
+    while True:
+        token = _read_alias.set(alias)
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            _read_alias.reset(token)
+        yield chunk
+
+
+def replica_reads(view):
+    """Serve a read-only view from the replica for safe methods, unless the user is pinned."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in SAFE_METHODS or _pinned(request) or not available():
+            return view(request, *args, **kwargs)
+        token = _read_alias.set(ALIAS)
+        try:
+            response = view(request, *args, **kwargs)
+        finally:
+            _read_alias.reset(token)
+        if getattr(response, 'streaming', False):
+            response.streaming_content = _streaming(response.streaming_content, ALIAS)
+        response['X-Read-Database'] = ALIAS
+        return response
+    return wrapper
+
+
+def note_write():
+    """Record that the current request wrote something (called from versions.bump)."""
+    state = _request_writes.get()
+    if state is not None:
+        state['wrote'] = True
+
+
+class ReplicaPinMiddleware:
+    """
+    Pin the client to the primary for PIN_SECONDS after any write request,
+    including a GET that wrote (e.g. the approve/reject links).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = {'wrote': False}
+        token = _request_writes.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_writes.reset(token)
+        if configured() and (request.method not in SAFE_METHODS or state['wrote']):
+            response.set_cookie(
+                PIN_COOKIE, f'{time.time() + PIN_SECONDS:.3f}',
+                max_age=PIN_SECONDS, httponly=True, samesite='Lax',
+            )
+        return response
+
+
+# -------------------------------------------------
+# Local stand-in replica (periodically refreshed SQLite copy)
+# -------------------------------------------------
+def refresh():
+    """
+    Copy the primary SQLite file onto the stand-in with SQLite's online
+    backup API, which yields a consistent snapshot while writers carry on
+    and replaces the copy in one transaction, so replica readers see either
+    the old or the new snapshot. Returns the seconds taken.
+    """
+    if not is_standin():
+        raise RuntimeError(f"DATABASES[{ALIAS!r}] is not a local SQLite stand-in.")
+    started = time.perf_counter()
+    source = str(settings.DATABASES['default']['NAME'])
+    target = str(settings.DATABASES[ALIAS]['NAME'])
+    with closing(sqlite3.connect(source, timeout=30)) as src, closing(sqlite3.connect(target, timeout=30)) as dst:
+        src.backup(dst)
+    # The mtime is what lag() measures; WAL writes may not touch the main file.
+    os.utime(target)
+    return time.perf_counter() - started
+
+
+class ReplicaRefresher:
+    """Daemon thread running refresh() every ``interval`` seconds."""
+
+    def __init__(self, interval=REFRESH_INTERVAL):
+        self.interval = interval
+        self.runs = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name='replica-refresher', daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        # Refresh straight away so the stand-in exists before the first wait.
+        while True:
+            try:
+                refresh()
+                self.runs += 1
+            except Exception:
+                logger.exception("Replica refresh failed")
+            if self._stop.wait(self.interval):
+                return
+
+
+refresher = ReplicaRefresher()
+
+
+def start_refresher():
+    if is_standin() and REFRESH_INTERVAL > 0:
+        refresher.start()
@@ -0,0 +1,152 @@
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from . import audit, stock, versions
+from .models import Item, Transaction, User
+from .overdue import OPEN_STATUSES
+
+MAX_SERIALS = getattr(settings, 'INVENTORY_SCAN_MAX', 500)
+LOAN_DAYS = getattr(settings, 'INVENTORY_SCAN_LOAN_DAYS', 14)
+CONDITIONS = {value for value, _ in Item.CONDITION_CHOICES}
+
+ITEM_FIELDS = (
+    'id', 'serial_number', 'status', 'condition', 'location',
+    'product_id', 'product__name', 'business_unit__name', 'assigned_to__username',
+)
+
+
+def clean_serials(serials):
+    """Strip, drop blanks and duplicates (keeping scan order), cap at MAX_SERIALS."""
+    return list(dict.fromkeys(s.strip() for s in serials if s and s.strip()))[:MAX_SERIALS]
+
+
+# -------------------------------------------------
+# Lookup
+# -------------------------------------------------
+def lookup(serials):
+    """
+    Resolve scanned serials to item, product, holder and open loan in one
+    query: serial_number IN (...) on its unique index, with the open
+    Transaction pulled in through correlated subqueries. Returns one entry
+    per serial in scan order; unknown serials come back with ``found: False``.
+    """
+    serials = clean_serials(serials)
+    open_loan = Transaction.objects.filter(item=OuterRef('pk'), status__in=OPEN_STATUSES).order_by('-id')
+    rows = (
+        Item.objects.filter(serial_number__in=serials)
+        .annotate(
+            loan_id=Subquery(open_loan.values('id')[:1]),
+            loan_status=Subquery(open_loan.values('status')[:1]),
+            loan_employee=Subquery(open_loan.values('employee__username')[:1]),
+            loan_due=Subquery(open_loan.values('expected_return_date')[:1]),
+        )
+        .values(*ITEM_FIELDS, 'loan_id', 'loan_status', 'loan_employee', 'loan_due')
+    )
+    by_serial = {row['serial_number']: row for row in rows}
+    results = []
+    for serial in serials:
+        row = by_serial.get(serial)
+        if row is None:
+            results.append({'serial': serial, 'found': False})
+            continue
+        loan = None
+        if row['loan_id'] is not None:
+            loan = {
+                'id': row['loan_id'],
+                'status': row['loan_status'],
+                'employee': row['loan_employee'],
+                'expected_return_date': row['loan_due'],
+            }
+        results.append({
+            'serial': serial,
+            'found': True,
+            'item': {
+                'id': row['id'],
+                'status': row['status'],
+                'condition': row['condition'],
+                'location': row['location'],
+                'product_id': row['product_id'],
+                'product': row['product__name'],
+                'business_unit': row['business_unit__name'],
+                'holder': row['assigned_to__username'],
+            },
+            'open_transaction': loan,
+        })
+    return results
+
+
+# -------------------------------------------------
+# Check-out / check-in
+# -------------------------------------------------
+def check_out(user, serial, employee, expected_return_date=None, condition=None, remarks=''):
+    """
+    Lend the item with ``serial`` to ``employee``. The item is taken with a
+    compare-and-swap UPDATE on status='Available', so two scanners can never
+    lend the same item. Returns ``(outcome, transaction_or_None)``; outcomes:
+    checked_out, invalid_condition, not_found, not_available.
+    """
+    if condition and condition not in CONDITIONS:
+        return 'invalid_condition', None
+    expected_return_date = expected_return_date or timezone.localdate() + datetime.timedelta(days=LOAN_DAYS)
+    with transaction.atomic():
+        row = Item.objects.filter(serial_number=serial).values_list('id', 'product_id', 'business_unit_id', 'condition').first()
+        if row is None:
+            return 'not_found', None
+        item_id, product_id, business_unit_id, item_condition = row
+        if not Item.objects.filter(pk=item_id, status='Available').update(status='Assigned', assigned_to=employee):
+            return 'not_available', None
+        # The UPDATE bypasses Item signals, so move the stock counters here.
+        stock.apply_transition(
+            (product_id, business_unit_id, 'Available'), (product_id, business_unit_id, 'Assigned')
+        )
+        loan = Transaction.objects.create(
+            item_id=item_id,
+            employee=employee,
+            expected_return_date=expected_return_date,
+            condition_on_borrow=condition or item_condition,
+            remarks=remarks,
+        )
+        audit.record(user, 'Borrow', 'Transaction', loan.id, f'{user.username} checked out {serial} to {employee.username}')
+    return 'checked_out', loan
+
+
+def check_in(user, serial, condition=None, remarks=''):
+    """
+    Close the open loan on ``serial`` and make the item Available again.
+    Outcomes: checked_in, invalid_condition, not_found, not_borrowed.
+    """
+    if condition and condition not in CONDITIONS:
+        return 'invalid_condition', None
+    with transaction.atomic():
+        row = Item.objects.filter(serial_number=serial).values_list('id', 'product_id', 'business_unit_id').first()
+        if row is None:
+            return 'not_found', None
+        item_id, product_id, business_unit_id = row
+        loan = Transaction.objects.filter(item_id=item_id, status__in=OPEN_STATUSES).order_by('-id').first()
+        if loan is None:
+            return 'not_borrowed', None
+        condition = condition or loan.condition_on_borrow
+        closed = Transaction.objects.filter(pk=loan.pk, status__in=OPEN_STATUSES).update(
+            status='Returned',
+            actual_return_date=timezone.localdate(),
+            condition_on_return=condition,
+            remarks=remarks or loan.remarks,
+        )
+        if not closed:
+            return 'not_borrowed', None
+        versions.bump('transaction')
+        if Item.objects.filter(pk=item_id, status='Assigned').update(status='Available', assigned_to=None, condition=condition):
+            stock.apply_transition(
+                (product_id, business_unit_id, 'Assigned'), (product_id, business_unit_id, 'Available')
+            )
+        loan.refresh_from_db()
+        audit.record(user, 'Return', 'Transaction', loan.id, f'{user.username} checked in {serial}')
+    return 'checked_in', loan
+
+
+def employee_by_username(username):
+    return User.objects.filter(username=username, role='EMPLOYEE').first() if username else None
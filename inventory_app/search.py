@@ -0,0 +1,195 @@
+import re
+from functools import reduce
+from operator import or_
+
+from django.db import connection
+from django.db.models import F, Q, Value
+
+from .models import Item, Product, ProductCategory, Request
+
+TABLE = 'inventory_search'
+# rowid = object_id * STRIDE + code, so each (kind, id) pair owns exactly one FTS row.
+KINDS = {'product': 1, 'item': 2, 'request': 3}
+STRIDE = 4
+MAX_TERMS = 10
+
+# Per kind: (title, body) source query, its model, and the fields the non-SQLite fallback matches.
+SOURCES = {
+    'product': (
+        f"SELECT p.id AS id, p.name AS title, c.name AS body, p.category_id AS category_id "
+        f"FROM {Product._meta.db_table} p JOIN {ProductCategory._meta.db_table} c ON c.id = p.category_id",
+        Product, ('name', 'category__name'),
+    ),
+    'item': (
+        f"SELECT id, serial_number AS title, location AS body FROM {Item._meta.db_table}",
+        Item, ('serial_number', 'location'),
+    ),
+    'request': (
+        f"SELECT id, '' AS title, reason AS body FROM {Request._meta.db_table}",
+        Request, ('reason',),
+    ),
+}
+
+
+def enabled():
+    return connection.vendor == 'sqlite'
+
+
+# -------------------------------------------------
+# Index maintenance: one INSERT ... SELECT per call
+# -------------------------------------------------
+def _reindex(kind, where='', params=()):
+    source = SOURCES[kind][0]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT OR REPLACE INTO {TABLE}(rowid, kind, object_id, title, body) "
+            f"SELECT src.id * {STRIDE} + {KINDS[kind]}, '{kind}', src.id, src.title, src.body "
+            f"FROM ({source}) src {where}",
+            params,
+        )
+
+
+def index(kind, object_id):
+    if enabled():
+        _reindex(kind, 'WHERE src.id = %s', [object_id])
+
+
+def index_many(kind, ids):
+    ids = list(ids)
+    if not enabled() or not ids:
+        return
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        _reindex(kind, f"WHERE src.id IN ({', '.join(['%s'] * len(chunk))})", chunk)
+
+
+def index_category(category_id):
+    """Product documents carry their category name; refresh them after a rename."""
+    if enabled():
+        _reindex('product', 'WHERE src.category_id = %s', [category_id])
+
+
+def remove(kind, object_id):
+    if enabled():
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {TABLE} WHERE rowid = %s", [object_id * STRIDE + KINDS[kind]])
+
+
+def rebuild():
+    """Repopulate the whole index from the source tables. Returns the row count."""
+    if not enabled():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE}")
+        for kind in SOURCES:
+            _reindex(kind)
+        cursor.execute(f"INSERT INTO {TABLE}({TABLE}) VALUES ('optimize')")
+        cursor.execute(f"SELECT count(*) FROM {TABLE}")
+        return cursor.fetchone()[0]
+
+
+# -------------------------------------------------
+# Querying
+# -------------------------------------------------
+def terms(query):
+    return re.findall(r'\w+', query or '')[:MAX_TERMS]
+
+
+def match_expression(query):
+    # Every term must match, each as a prefix; quoting keeps FTS operators out of user input.
+    return ' '.join(f'"{t}"*' for t in terms(query))
+
+
+def fetcher(query, kinds=None):
+    """
+    Return a ``fetch(values, after, limit)`` for pagination.paginate_with,
+    keyed on ('score', 'rowid'): best matches first (bm25 is lower for
+    better hits), rowid breaking ties.
+    """
+    kinds = [k for k in (kinds or KINDS) if k in KINDS]
+    expression = match_expression(query)
+    if not expression or not kinds:
+        return lambda values, after, limit: []
+    return _fts_fetcher(expression, kinds) if enabled() else _fallback_fetcher(query, kinds)
+
+
+def _fts_fetcher(expression, kinds):
+    kind_clause = f"AND kind IN ({', '.join(['%s'] * len(kinds))})"
+
+    def fetch(values, after, limit):
+        params = [expression, *kinds]
+        seek = ''
+        if values is not None:
+            seek = f"WHERE (score, rowid) {'>' if after else '<'} (%s, %s)"
+            params += list(values)
+        direction = 'ASC' if after else 'DESC'
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid, kind, object_id, score, snip FROM ("
+                f"  SELECT rowid, kind, object_id, bm25({TABLE}, 0, 0, 10.0, 1.0) AS score,"
+                f"         snippet({TABLE}, -1, '[', ']', '...', 8) AS snip"
+                f"  FROM {TABLE} WHERE {TABLE} MATCH %s {kind_clause}"
+                f") {seek} ORDER BY score {direction}, rowid {direction} LIMIT %s",
+                params + [limit],
+            )
+            columns = [c[0] for c in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    return fetch
+
+
+def _fallback_fetcher(query, kinds):
+    # No FTS: AND of per-term icontains across each kind's fields, unranked (score 0).
+    words = terms(query)
+
+    def fetch(values, after, limit):
+        rows = []
+        for kind in kinds:
+            _, model, fields = SOURCES[kind]
+            condition = Q()
+            for word in words:
+                condition &= reduce(or_, (Q(**{f'{f}__icontains': word}) for f in fields))
+            qs = model.objects.filter(condition).annotate(
+                rowid=F('id') * STRIDE + KINDS[kind], score=Value(0.0), kind=Value(kind),
+                object_id=F('id'), snip=Value(''),
+            )
+            if values is not None:
+                qs = qs.filter(**{'rowid__gt' if after else 'rowid__lt': values[1]})
+            order = 'rowid' if after else '-rowid'
+            rows.extend(qs.order_by(order).values('rowid', 'kind', 'object_id', 'score', 'snip')[:limit])
+        rows.sort(key=lambda r: r['rowid'], reverse=not after)
+        return rows[:limit]
+
+    return fetch
+
+
+def hydrate(rows):
+    """Attach display fields to raw hits with one query per kind."""
+    ids = {kind: [] for kind in KINDS}
+    for row in rows:
+        ids[row['kind']].append(row['object_id'])
+    objects = {
+        'product': Product.objects.select_related('category').in_bulk(ids['product']),
+        'item': Item.objects.select_related('product', 'business_unit').in_bulk(ids['item']),
+        'request': Request.objects.select_related('product', 'employee').in_bulk(ids['request']),
+    }
+    hits = []
+    for row in rows:
+        obj = objects[row['kind']].get(row['object_id'])
+        if obj is None:
+            continue
+        if row['kind'] == 'product':
+            title, detail = obj.name, obj.category.name
+        elif row['kind'] == 'item':
+            title, detail = f"{obj.product.name} ({obj.serial_number})", f"{obj.status} at {obj.business_unit.name}"
+        else:
+            title, detail = f"Request #{obj.id}: {obj.product.name}", f"{obj.employee.username}, {obj.get_status_display()}"
+        hits.append({
+            'kind': row['kind'],
+            'id': row['object_id'],
+            'title': title,
+            'detail': detail,
+            'snippet': row['snip'],
+            'score': row['score'],
+        })
+    return hits
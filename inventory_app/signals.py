@@ -1,61 +1,32 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_init, post_delete
 from django.dispatch import receiver
 from django.utils.timezone import now
-from .models import Request, RequestApproval, Notification, AuditLog, User, BusinessUnit
+from .models import Request, RequestApproval, Notification, User, BusinessUnit, Item, Product, ProductCategory, Transaction
+from . import stock, inbox, outbox, push, valuation, lowstock, search, versions, dashboards
+from django.db import transaction
+from functools import partial
 import logging
 
 logger = logging.getLogger(__name__)
 
 # -------------------------------------------------
 # Notify Director when a request is submitted
+# (notifications and audit entries below are handled by the outbox worker)
 # -------------------------------------------------
 @receiver(post_save, sender=Request)
 def notify_director_on_request(sender, instance, created, **kwargs):
     if created and instance.status == 'PENDING_DIRECTOR':
-        try:
-            director = instance.employee.business_unit.director
-            if director is not None:
-                Notification.objects.create(
-                    recipient=director,
-                    message=f"New request from {instance.employee.username} for {instance.product.name}"
-                )
-            else:
-                logger.warning(f"No director assigned to business unit '{instance.employee.business_unit}' for request {instance.id}")
-        except AttributeError as e:
-            logger.error(f"Missing attribute when notifying director for request {instance.id}: {e}")
+        outbox.enqueue('request.submitted', f'request:{instance.id}', {'request_id': instance.id})
 
 # -------------------------------------------------
 # Notify next approver and employee after approval
 # -------------------------------------------------
 @receiver(post_save, sender=RequestApproval)
 def notify_after_approval(sender, instance, created, **kwargs):
-    if not created:
-        return
-
-    req = instance.request
-    if instance.status == 'APPROVED':
-        if instance.role == 'DIRECTOR':
-            try:
-                officer = User.objects.filter(role='INVENTORY_OFFICER').first()
-                if officer:
-                    Notification.objects.create(
-                        recipient=officer,
-                        message=f"Request #{req.id} approved by Director. Awaiting your action."
-                    )
-                else:
-                    logger.warning(f"No Inventory Officer found to notify for request {req.id}")
-            except Exception as e:
-                logger.error(f"Error notifying Inventory Officer for request {req.id}: {e}")
-        elif instance.role == 'INVENTORY_OFFICER':
-            Notification.objects.create(
-                recipient=req.employee,
-                message=f"Your request #{req.id} for {req.product.name} has been approved."
-            )
-    elif instance.status == 'REJECTED':
-        Notification.objects.create(
-            recipient=req.employee,
-            message=f"Your request #{req.id} has been rejected by {instance.role.title()}."
-        )
+    if created:
+        outbox.enqueue('request.reviewed', f'request:{instance.request_id}', {
+            'request_id': instance.request_id, 'role': instance.role, 'status': instance.status,
+        })
 
 # -------------------------------------------------
 # Audit log for new user creation
@@ -63,13 +34,9 @@ def notify_after_approval(sender, instance, created, **kwargs):
 @receiver(post_save, sender=User)
 def log_user_creation(sender, instance, created, **kwargs):
     if created:
-        AuditLog.objects.create(
-            user=instance,
-            action_type='Create',
-            object_type='User',
-            object_id=instance.id,
-            description=f'User {instance.username} was created with role {instance.role}'
-        )
+        outbox.enqueue('user.created', f'user:{instance.id}', {
+            'user_id': instance.id, 'username': instance.username, 'role': instance.role,
+        })
 
 # -------------------------------------------------
 # Assign user to business unit if Director
@@ -77,19 +44,165 @@ def log_user_creation(sender, instance, created, **kwargs):
 @receiver(post_save, sender=BusinessUnit)
 def assign_director_to_unit(sender, instance, **kwargs):
     if instance.director:
-        instance.director.role = 'DIRECTOR'
-        instance.director.save()
-        AuditLog.objects.create(
-            user=instance.director,
-            action_type='Assign',
-            object_type='BusinessUnit',
-            object_id=instance.id,
-            description=f'User {instance.director.username} assigned as Director of {instance.name}'
-        )
-        AuditLog.objects.create(
-            user=instance.director,
-            action_type='Create',
-            object_type='BusinessUnit',
-            object_id=instance.id,
-            description=f'Business Unit {instance.name} created with Director {instance.director.username}'
-        )
\ No newline at end of file
+        # The role is part of the change itself, so it stays synchronous; skip the write when it is already set.
+        if instance.director.role != 'DIRECTOR':
+            instance.director.role = 'DIRECTOR'
+            instance.director.save()
+        outbox.enqueue('businessunit.director_assigned', f'businessunit:{instance.id}', {
+            'unit_id': instance.id, 'unit': instance.name,
+            'director_id': instance.director.id, 'director': instance.director.username,
+        })
+
+# -------------------------------------------------
+# Keep ProductStock / ProductUnitStock counters in sync with Item.status
+# -------------------------------------------------
+@receiver(post_init, sender=Item)
+def remember_item_stock_state(sender, instance, **kwargs):
+    # Read straight from __dict__ so deferred fields never trigger a query.
+    data = instance.__dict__
+    if instance.pk is None or 'status' not in data:
+        instance._stock_state = None
+    else:
+        instance._stock_state = (data.get('product_id'), data.get('business_unit_id'), data['status'])
+
+@receiver(post_save, sender=Item)
+def update_stock_on_item_save(sender, instance, created, **kwargs):
+    new = stock.item_state(instance)
+    if created:
+        stock.apply_transition(None, new)
+    elif getattr(instance, '_stock_state', None) is None:
+        # Loaded without its status (e.g. .only()), so the old bucket is unknown.
+        stock.refresh_product(instance.product_id)
+    else:
+        stock.apply_transition(instance._stock_state, new)
+    instance._stock_state = new
+
+@receiver(post_delete, sender=Item)
+def update_stock_on_item_delete(sender, instance, **kwargs):
+    state = getattr(instance, '_stock_state', None) or stock.item_state(instance)
+    stock.apply_transition(state, None)
+
+# -------------------------------------------------
+# Re-value stock when a product's price or category changes
+# -------------------------------------------------
+@receiver(post_init, sender=Product)
+def remember_product_valuation(sender, instance, **kwargs):
+    data = instance.__dict__
+    if instance.pk is None or 'price_per_unit' not in data or 'category_id' not in data:
+        instance._valuation_state = None
+    else:
+        instance._valuation_state = (data['category_id'], data['price_per_unit'])
+
+@receiver(post_save, sender=Product)
+def update_valuation_on_product_save(sender, instance, created, **kwargs):
+    old = getattr(instance, '_valuation_state', None)
+    new = (instance.category_id, instance.price_per_unit)
+    if not created and old is not None:
+        valuation.product_changed(instance.pk, *old, *new)
+    instance._valuation_state = new
+
+@receiver(post_save, sender=Product)
+def check_low_stock_on_product_save(sender, instance, created, **kwargs):
+    # A new product has no stock to cross; later edits may move reorder_level.
+    if not created:
+        lowstock.evaluate(instance.pk)
+
+# -------------------------------------------------
+# Keep the full-text search index in sync
+# -------------------------------------------------
+SEARCH_KINDS = {Product: 'product', Item: 'item', Request: 'request'}
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Item)
+@receiver(post_save, sender=Request)
+def index_for_search(sender, instance, **kwargs):
+    search.index(SEARCH_KINDS[sender], instance.pk)
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Item)
+@receiver(post_delete, sender=Request)
+def remove_from_search(sender, instance, **kwargs):
+    search.remove(SEARCH_KINDS[sender], instance.pk)
+
+@receiver(post_save, sender=ProductCategory)
+def reindex_category_products(sender, instance, created, **kwargs):
+    if not created:
+        search.index_category(instance.pk)
+
+# -------------------------------------------------
+# Bump version counters (API ETags) on every save and delete
+# -------------------------------------------------
+VERSIONED = {Product: 'product', Item: 'item', Request: 'request', Transaction: 'transaction', Notification: 'notification'}
+
+@receiver(post_save)
+@receiver(post_delete)
+def bump_version(sender, **kwargs):
+    name = VERSIONED.get(sender)
+    if name is not None:
+        versions.bump(name)
+
+# Directors' API scopes follow unit membership and each unit's director.
+@receiver(post_save, sender=User)
+def bump_unit_version_on_user_save(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or set(update_fields) != {'last_login'}:
+        versions.bump('businessunit')
+
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=BusinessUnit)
+@receiver(post_delete, sender=BusinessUnit)
+def bump_unit_version(sender, **kwargs):
+    versions.bump('businessunit')
+
+# -------------------------------------------------
+# Invalidate cached dashboards that show the changed rows
+# -------------------------------------------------
+@receiver(post_init, sender=Request)
+def remember_request_dashboard_state(sender, instance, **kwargs):
+    instance._dashboard_status = instance.__dict__.get('status') if instance.pk is not None else None
+
+@receiver(post_save, sender=Request)
+def bump_dashboards_on_request_save(sender, instance, **kwargs):
+    dashboards.requests_changed([instance.employee_id], {getattr(instance, '_dashboard_status', None), instance.status})
+    instance._dashboard_status = instance.status
+
+@receiver(post_delete, sender=Request)
+def bump_dashboards_on_request_delete(sender, instance, **kwargs):
+    dashboards.requests_changed([instance.employee_id], {instance.status})
+
+@receiver(post_save, sender=User)
+def bump_dashboards_on_user_save(sender, instance, update_fields=None, **kwargs):
+    # Logins save last_login only, which no dashboard shows.
+    if update_fields is None or set(update_fields) != {'last_login'}:
+        dashboards.directory_changed()
+
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=BusinessUnit)
+@receiver(post_delete, sender=BusinessUnit)
+def bump_dashboards_on_directory_change(sender, **kwargs):
+    dashboards.directory_changed()
+
+@receiver(post_init, sender=Product)
+def remember_product_name(sender, instance, **kwargs):
+    instance._dashboard_name = instance.__dict__.get('name') if instance.pk is not None else None
+
+@receiver(post_save, sender=Product)
+def bump_dashboards_on_product_rename(sender, instance, created, **kwargs):
+    if not created and getattr(instance, '_dashboard_name', None) != instance.name:
+        dashboards.catalog_changed()
+    instance._dashboard_name = instance.name
+
+# -------------------------------------------------
+# Keep the cached unread-notification count current
+# -------------------------------------------------
+@receiver(post_save, sender=Notification)
+def update_unread_count(sender, instance, created, **kwargs):
+    if created:
+        if not instance.is_read:
+            inbox.adjust_unread(instance.recipient_id, 1)
+        transaction.on_commit(partial(push.publish_notification, instance))
+    else:
+        inbox.invalidate(instance.recipient_id)
+
+@receiver(post_delete, sender=Notification)
+def update_unread_count_on_delete(sender, instance, **kwargs):
+    inbox.invalidate(instance.recipient_id)
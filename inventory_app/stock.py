@@ -0,0 +1,202 @@
+import logging
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+
+from . import lowstock, valuation, versions
+from .models import Item, ProductStock, ProductUnitStock, StockCounts
+
+logger = logging.getLogger(__name__)
+
+STATUS_FIELDS = StockCounts.STATUS_FIELDS
+
+
+# -------------------------------------------------
+# Incremental maintenance
+# -------------------------------------------------
+def _bump(model, lookup, field, delta):
+    # UPDATE ... SET field = field + delta; create the row on first increment.
+    # A decrement against a missing row (e.g. during a cascading delete) is a no-op.
+    rows = model.objects.filter(**lookup)
+    if delta < 0:
+        if rows.filter(**{f'{field}__gte': -delta}).update(**{field: F(field) + delta}):
+            return
+        # The counter has drifted below the decrement. Clamp at zero instead of failing
+        # the borrow/return on the CHECK constraint; `rebuild_stock` repairs the drift.
+        if rows.update(**{field: Greatest(F(field) + delta, 0)}):
+            logger.warning("%s %s.%s drifted below %d; clamped to 0", model.__name__, lookup, field, -delta)
+        return
+    if not rows.update(**{field: F(field) + delta}):
+        model.objects.get_or_create(**lookup)
+        rows.update(**{field: F(field) + delta})
+
+
+def adjust(product_id, business_unit_id, status, delta):
+    """Add ``delta`` items in ``status`` to the product, product/unit and valuation counters."""
+    field = STATUS_FIELDS.get(status)
+    if field is None or not delta or product_id is None:
+        return
+    with transaction.atomic():
+        _bump(ProductStock, {'product_id': product_id}, field, delta)
+        if business_unit_id is not None:
+            _bump(
+                ProductUnitStock,
+                {'product_id': product_id, 'business_unit_id': business_unit_id},
+                field, delta,
+            )
+            valuation.adjust(product_id, business_unit_id, status, delta)
+        if status == 'Available':
+            lowstock.evaluate(product_id)
+    # Status moves made with UPDATE skip the model signals; counters and item rows both changed.
+    versions.bump('item', 'product')
+
+
+def apply_transition(old, new):
+    """
+    Move one item between counters. ``old`` and ``new`` are
+    ``(product_id, business_unit_id, status)`` tuples, or None when the
+    item is being created or deleted.
+    """
+    if old == new:
+        return
+    with transaction.atomic():
+        if old is not None:
+            adjust(*old, -1)
+        if new is not None:
+            adjust(*new, 1)
+
+
+def apply_bulk_transition(product_id, business_unit_counts, old_status, new_status):
+    """
+    Counter maintenance for set-based ``Item`` updates that bypass save().
+    ``business_unit_counts`` maps business_unit_id -> number of items moved.
+    """
+    with transaction.atomic():
+        for business_unit_id, count in business_unit_counts.items():
+            adjust(product_id, business_unit_id, old_status, -count)
+            adjust(product_id, business_unit_id, new_status, count)
+
+
+def item_state(item):
+    return (item.product_id, item.business_unit_id, item.status)
+
+
+def refresh_product(product_id):
+    """Recount a single product's counters from ``Item``."""
+    fields = list(STATUS_FIELDS.values())
+    product_counts = dict.fromkeys(fields, 0)
+    unit_counts = defaultdict(lambda: dict.fromkeys(fields, 0))
+    rows = (
+        Item.objects.filter(product_id=product_id)
+        .values('business_unit_id', 'status')
+        .annotate(n=Count('id'))
+        .order_by()
+    )
+    for row in rows:
+        field = STATUS_FIELDS.get(row['status'])
+        if field is None:
+            continue
+        product_counts[field] += row['n']
+        unit_counts[row['business_unit_id']][field] += row['n']
+    with transaction.atomic():
+        # Carry the per-unit differences over to the valuation rows before overwriting.
+        stored = {
+            row['business_unit_id']: row
+            for row in ProductUnitStock.objects.filter(product_id=product_id).values('business_unit_id', *fields)
+        }
+        for business_unit_id in set(stored) | set(unit_counts):
+            for status, field in STATUS_FIELDS.items():
+                have = stored[business_unit_id][field] if business_unit_id in stored else 0
+                want = unit_counts[business_unit_id][field] if business_unit_id in unit_counts else 0
+                valuation.adjust(product_id, business_unit_id, status, want - have)
+        ProductStock.objects.update_or_create(product_id=product_id, defaults=product_counts)
+        ProductUnitStock.objects.filter(product_id=product_id).exclude(
+            business_unit_id__in=list(unit_counts)
+        ).delete()
+        for business_unit_id, counts in unit_counts.items():
+            ProductUnitStock.objects.update_or_create(
+                product_id=product_id, business_unit_id=business_unit_id, defaults=counts
+            )
+        lowstock.evaluate(product_id)
+
+
+# -------------------------------------------------
+# Full rebuild and verification
+# -------------------------------------------------
+def compute_counts():
+    """Recount every product and product/unit pair straight from ``Item``."""
+    per_product = defaultdict(lambda: dict.fromkeys(STATUS_FIELDS.values(), 0))
+    per_unit = defaultdict(lambda: dict.fromkeys(STATUS_FIELDS.values(), 0))
+    rows = (
+        Item.objects.values('product_id', 'business_unit_id', 'status')
+        .annotate(n=Count('id'))
+        .order_by()
+    )
+    for row in rows:
+        field = STATUS_FIELDS.get(row['status'])
+        if field is None:
+            continue
+        per_product[row['product_id']][field] += row['n']
+        per_unit[(row['product_id'], row['business_unit_id'])][field] += row['n']
+    return per_product, per_unit
+
+
+def _stored_counts():
+    fields = list(STATUS_FIELDS.values())
+    per_product = {
+        row['product_id']: {f: row[f] for f in fields}
+        for row in ProductStock.objects.values('product_id', *fields)
+    }
+    per_unit = {
+        (row['product_id'], row['business_unit_id']): {f: row[f] for f in fields}
+        for row in ProductUnitStock.objects.values('product_id', 'business_unit_id', *fields)
+    }
+    return per_product, per_unit
+
+
+def _diff(expected, stored):
+    zero = dict.fromkeys(STATUS_FIELDS.values(), 0)
+    mismatches = []
+    for key in set(expected) | set(stored):
+        want = expected.get(key, zero)
+        have = stored.get(key, zero)
+        if want != have:
+            mismatches.append((key, want, have))
+    return mismatches
+
+
+def verify():
+    """Return ``(product_mismatches, unit_mismatches)`` as (key, expected, stored) lists."""
+    expected_product, expected_unit = compute_counts()
+    stored_product, stored_unit = _stored_counts()
+    return _diff(expected_product, stored_product), _diff(expected_unit, stored_unit)
+
+
+def rebuild(batch_size=1000):
+    """Replace both counter tables with a fresh recount. Returns the row counts written."""
+    per_product, per_unit = compute_counts()
+    with transaction.atomic():
+        # Keep low-stock flags (and when they were raised) across the rebuild.
+        low_since = dict(
+            ProductStock.objects.filter(low_stock_since__isnull=False).values_list('product_id', 'low_stock_since')
+        )
+        ProductStock.objects.all().delete()
+        ProductUnitStock.objects.all().delete()
+        ProductStock.objects.bulk_create(
+            [
+                ProductStock(product_id=pid, low_stock_since=low_since.get(pid), **counts)
+                for pid, counts in per_product.items()
+            ],
+            batch_size=batch_size,
+        )
+        ProductUnitStock.objects.bulk_create(
+            [
+                ProductUnitStock(product_id=pid, business_unit_id=bu_id, **counts)
+                for (pid, bu_id), counts in per_unit.items()
+            ],
+            batch_size=batch_size,
+        )
+        lowstock.sync()
+    return len(per_product), len(per_unit)
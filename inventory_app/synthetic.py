@@ -0,0 +1,365 @@
+import datetime
+import random
+import time
+from contextlib import contextmanager
+from decimal import Decimal
+from itertools import accumulate, islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from . import lowstock, search, stock, valuation, versions
+from .models import (
+    AuditLog, BusinessUnit, Item, Notification, Product, ProductCategory, Request, RequestApproval,
+    Transaction, UnitOfMeasurement, User,
+)
+
+# Row counts at scale 1 (about 240k rows); every count is multiplied by the scale.
+BASE_COUNTS = {
+    'units': 20,
+    'employees': 500,
+    'officers': 5,
+    'products': 200,
+    'items': 10000,
+    'requests': 50000,
+    'loans': 30000,
+    'notifications': 50000,
+    'audit_logs': 100000,
+}
+CATEGORIES = 20
+UNITS_OF_MEASUREMENT = (('Piece', 'pc'), ('Box', 'box'), ('Set', 'set'))
+PASSWORD = 'synthetic'
+
+# (value, weight) pairs.
+ITEM_STATUSES = (('Available', 60), ('Assigned', 25), ('In Repair', 10), ('Retired', 5))
+CONDITIONS = (('New', 40), ('Used', 40), ('Refurbished', 15), ('Damaged', 5))
+REQUEST_STATUSES = (
+    ('PENDING_DIRECTOR', 10), ('REJECTED_DIRECTOR', 10), ('PENDING_OFFICER', 10),
+    ('REJECTED_OFFICER', 10), ('APPROVED', 60),
+)
+# Approval rows implied by each request status: (role, outcome) in order.
+APPROVAL_TRAIL = {
+    'PENDING_DIRECTOR': (),
+    'REJECTED_DIRECTOR': (('DIRECTOR', 'REJECTED'),),
+    'PENDING_OFFICER': (('DIRECTOR', 'APPROVED'),),
+    'REJECTED_OFFICER': (('DIRECTOR', 'APPROVED'), ('INVENTORY_OFFICER', 'REJECTED')),
+    'APPROVED': (('DIRECTOR', 'APPROVED'), ('INVENTORY_OFFICER', 'APPROVED')),
+}
+AUDIT_ACTIONS = (('Create', 'Item'), ('Update', 'Item'), ('Create', 'Request'), ('Approve', 'Request'),
+                 ('Borrow', 'Transaction'), ('Return', 'Transaction'))
+PRODUCT_NAMES = ('Laptop', 'Monitor', 'Projector', 'Printer', 'Router', 'Tablet', 'Phone', 'Camera',
+                 'Desk', 'Chair', 'Scanner', 'Headset', 'Dock', 'Keyboard', 'Server')
+
+
+def _weighted(rng, choices):
+    values, weights = zip(*choices)
+    cumulative = list(accumulate(weights))
+    return lambda: rng.choices(values, cum_weights=cumulative)[0]
+
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+@contextmanager
+def _explicit_timestamps(*fields):
+    """Let bulk_create keep generated values in auto_now_add fields."""
+    saved = [(f, f.auto_now_add) for f in fields]
+    for f, _ in saved:
+        f.auto_now_add = False
+    try:
+        yield
+    finally:
+        for f, value in saved:
+            f.auto_now_add = value
+
+
+def _next_id(model):
+    return (model.objects.aggregate(m=Max('id'))['m'] or 0) + 1
+
+
+class Generator:
+    """
+    Builds a consistent dataset from ``seed``: the same seed, scale and
+    ``as_of`` date always produce the same rows. Rows referenced by other
+    tables get explicit primary keys, so foreign keys are computed rather
+    than read back, and everything is written with chunked bulk_create,
+    which never calls the post_save handlers in signals.py. The tables
+    those handlers maintain (stock counters, valuation, low-stock flags,
+    search index) are rebuilt set-based at the end.
+    """
+
+    def __init__(self, seed=0, scale=1, chunk_size=5000, as_of=None, days=730, report=None):
+        self.rng = random.Random(seed)
+        self.prefix = f'syn{seed}'
+        self.counts = {name: max(1, int(n * scale)) for name, n in BASE_COUNTS.items()}
+        self.chunk_size = chunk_size
+        self.as_of = as_of or timezone.localdate()
+        self.end = timezone.make_aware(datetime.datetime.combine(self.as_of, datetime.time(18)))
+        self.window = days * 86400
+        self.report = report or (lambda label, done, total: None)
+        self.timings = {}
+
+    # -------------------------------------------------
+    # Helpers
+    # -------------------------------------------------
+    def _moment(self):
+        return self.end - datetime.timedelta(seconds=self.rng.randrange(self.window))
+
+    def _employee(self, unit):
+        # Employee n belongs to unit n % units.
+        units, employees = self.counts['units'], self.counts['employees']
+        n = unit + units * self.rng.randrange((employees - unit - 1) // units + 1)
+        return self.employee_base + n
+
+    def _insert(self, label, model, rows, total):
+        started = time.perf_counter()
+        done = 0
+        for chunk in _chunks(rows, self.chunk_size):
+            model.objects.bulk_create(chunk, batch_size=self.chunk_size)
+            done += len(chunk)
+            self.report(label, done, total)
+        self.timings[label] = time.perf_counter() - started
+        return done
+
+    # -------------------------------------------------
+    # Tables
+    # -------------------------------------------------
+    def reference_data(self):
+        self.category_base = _next_id(ProductCategory)
+        ProductCategory.objects.bulk_create([
+            ProductCategory(id=self.category_base + i, name=f'{self.prefix} category {i}') for i in range(CATEGORIES)
+        ])
+        self.uom_base = _next_id(UnitOfMeasurement)
+        UnitOfMeasurement.objects.bulk_create([
+            UnitOfMeasurement(id=self.uom_base + i, name=name, abbreviation=abbr)
+            for i, (name, abbr) in enumerate(UNITS_OF_MEASUREMENT)
+        ])
+
+    def units_and_users(self):
+        units, employees, officers = self.counts['units'], self.counts['employees'], self.counts['officers']
+        self.unit_base = _next_id(BusinessUnit)
+        self._insert('business units', BusinessUnit, (
+            BusinessUnit(id=self.unit_base + u, name=f'{self.prefix} unit {u}', description='Synthetic')
+            for u in range(units)
+        ), units)
+
+        password = make_password(PASSWORD)
+        self.employee_base = _next_id(User)
+        self.director_base = self.employee_base + employees
+        self.officer_base = self.director_base + units
+        admin_base = self.officer_base + officers
+        joined = self.end - datetime.timedelta(seconds=self.window)
+
+        def users():
+            for n in range(employees):
+                yield User(
+                    id=self.employee_base + n, username=f'{self.prefix}-employee{n}', password=password,
+                    email=f'{self.prefix}-employee{n}@example.com', role='EMPLOYEE',
+                    business_unit_id=self.unit_base + n % units, date_joined=joined,
+                )
+            for u in range(units):
+                yield User(
+                    id=self.director_base + u, username=f'{self.prefix}-director{u}', password=password,
+                    role='DIRECTOR', business_unit_id=self.unit_base + u, date_joined=joined,
+                )
+            for n in range(officers):
+                yield User(
+                    id=self.officer_base + n, username=f'{self.prefix}-officer{n}', password=password,
+                    role='INVENTORY_OFFICER', date_joined=joined,
+                )
+            for n in range(2):
+                yield User(
+                    id=admin_base + n, username=f'{self.prefix}-admin{n}', password=password,
+                    role='ADMIN', date_joined=joined,
+                )
+        self.user_count = self._insert('users', User, users(), employees + units + officers + 2)
+
+        directors = [BusinessUnit(id=self.unit_base + u, director_id=self.director_base + u) for u in range(units)]
+        BusinessUnit.objects.bulk_update(directors, ['director'], batch_size=self.chunk_size)
+
+    def products(self):
+        self.product_base = _next_id(Product)
+        rng = self.rng
+        self._insert('products', Product, (
+            Product(
+                id=self.product_base + n,
+                name=f'{PRODUCT_NAMES[n % len(PRODUCT_NAMES)]} {self.prefix}-{n}',
+                category_id=self.category_base + rng.randrange(CATEGORIES),
+                unit_of_measurement_id=self.uom_base + rng.randrange(len(UNITS_OF_MEASUREMENT)),
+                price_per_unit=Decimal(rng.randrange(1000, 500000)) / 100,
+                reorder_level=rng.choice((0, 0, 2, 5, 10)),
+                is_active=rng.random() > 0.05,
+            )
+            for n in range(self.counts['products'])
+        ), self.counts['products'])
+
+    def items(self):
+        rng = self.rng
+        status = _weighted(rng, ITEM_STATUSES)
+        condition = _weighted(rng, CONDITIONS)
+        units, products = self.counts['units'], self.counts['products']
+        self.item_base = _next_id(Item)
+        # (item_id, employee_id, unit) for every Assigned item; each gets an open loan.
+        self.assigned = []
+        self.item_units = []
+
+        def rows():
+            for n in range(self.counts['items']):
+                unit = rng.randrange(units)
+                item_status = status()
+                holder = self._employee(unit) if item_status == 'Assigned' else None
+                if holder is not None:
+                    self.assigned.append((self.item_base + n, holder))
+                self.item_units.append(unit)
+                purchased = self.as_of - datetime.timedelta(days=rng.randrange(1, 1500))
+                yield Item(
+                    id=self.item_base + n, product_id=self.product_base + rng.randrange(products),
+                    serial_number=f'{self.prefix}-{n:09d}', purchase_date=purchased, condition=condition(),
+                    status=item_status, location=f'Building {unit} / Room {rng.randrange(1, 60)}',
+                    warranty_expiry_date=purchased + datetime.timedelta(days=365 * rng.choice((1, 2, 3))),
+                    assigned_to_id=holder, business_unit_id=self.unit_base + unit,
+                )
+        self._insert('items', Item, rows(), self.counts['items'])
+
+    def requests(self):
+        rng = self.rng
+        status = _weighted(rng, REQUEST_STATUSES)
+        units, products, officers = self.counts['units'], self.counts['products'], self.counts['officers']
+        total = self.counts['requests']
+        self.request_base = _next_id(Request)
+        started = time.perf_counter()
+        approvals_written = 0
+
+        with _explicit_timestamps(RequestApproval._meta.get_field('timestamp')):
+            for start in range(0, total, self.chunk_size):
+                requests, approvals = [], []
+                for n in range(start, min(start + self.chunk_size, total)):
+                    unit = rng.randrange(units)
+                    request_status = status()
+                    requested = self._moment()
+                    trail = APPROVAL_TRAIL[request_status]
+                    decided = requested + datetime.timedelta(hours=rng.randrange(1, 72))
+                    requests.append(Request(
+                        id=self.request_base + n, employee_id=self._employee(unit),
+                        product_id=self.product_base + rng.randrange(products),
+                        reason=f'Needed for project {rng.randrange(1000)}', request_date=requested,
+                        status=request_status,
+                        final_approval_date=decided if request_status == 'APPROVED' else None,
+                    ))
+                    for step, (role, outcome) in enumerate(trail):
+                        approver = self.director_base + unit if role == 'DIRECTOR' else self.officer_base + rng.randrange(officers)
+                        approvals.append(RequestApproval(
+                            request_id=self.request_base + n, approver_id=approver, role=role, status=outcome,
+                            timestamp=requested + (decided - requested) * (step + 1) / len(trail),
+                        ))
+                with transaction.atomic():
+                    Request.objects.bulk_create(requests, batch_size=self.chunk_size)
+                    RequestApproval.objects.bulk_create(approvals, batch_size=self.chunk_size)
+                approvals_written += len(approvals)
+                self.report('requests', start + len(requests), total)
+        self.timings['requests'] = time.perf_counter() - started
+        self.approval_count = approvals_written
+
+    def loans(self):
+        rng = self.rng
+        condition = _weighted(rng, CONDITIONS)
+        units = self.counts['units']
+        history = max(0, self.counts['loans'] - len(self.assigned))
+
+        def rows():
+            # One open loan per Assigned item; Overdue once its return date has passed.
+            for item_id, employee_id in self.assigned:
+                borrowed = self.as_of - datetime.timedelta(days=rng.randrange(1, 90))
+                due = borrowed + datetime.timedelta(days=rng.choice((7, 14, 30, 60)))
+                yield Transaction(
+                    item_id=item_id, employee_id=employee_id, borrow_date=borrowed, expected_return_date=due,
+                    status='Overdue' if due < self.as_of else 'Borrowed', condition_on_borrow=condition(),
+                )
+            for _ in range(history):
+                n = rng.randrange(self.counts['items'])
+                borrowed = self._moment().date() - datetime.timedelta(days=90)
+                due = borrowed + datetime.timedelta(days=rng.choice((7, 14, 30)))
+                returned = borrowed + datetime.timedelta(days=rng.randrange(1, 45))
+                yield Transaction(
+                    item_id=self.item_base + n, employee_id=self._employee(self.item_units[n]),
+                    borrow_date=borrowed, expected_return_date=due, actual_return_date=returned,
+                    status='Returned', condition_on_borrow='Used', condition_on_return=condition(),
+                )
+        with _explicit_timestamps(Transaction._meta.get_field('borrow_date')):
+            self._insert('transactions', Transaction, rows(), len(self.assigned) + history)
+
+    def notifications(self):
+        rng = self.rng
+        templates = (
+            'Your request #{} has been approved.',
+            'Your request #{} has been rejected by Director.',
+            'Request #{} approved by Director. Awaiting your action.',
+            'Your loan #{} is due soon.',
+        )
+        total = self.counts['notifications']
+        with _explicit_timestamps(Notification._meta.get_field('timestamp')):
+            self._insert('notifications', Notification, (
+                Notification(
+                    recipient_id=self.employee_base + rng.randrange(self.user_count),
+                    message=rng.choice(templates).format(self.request_base + rng.randrange(self.counts['requests'])),
+                    is_read=rng.random() < 0.7, timestamp=self._moment(),
+                )
+                for _ in range(total)
+            ), total)
+
+    def audit_logs(self):
+        rng = self.rng
+        total = self.counts['audit_logs']
+        with _explicit_timestamps(AuditLog._meta.get_field('timestamp')):
+            self._insert('audit logs', AuditLog, (
+                AuditLog(
+                    user_id=self.employee_base + rng.randrange(self.user_count), action_type=action,
+                    object_type=object_type, object_id=rng.randrange(1, self.counts['items']),
+                    description=f'{action} {object_type} (synthetic)', timestamp=self._moment(),
+                )
+                for action, object_type in (rng.choice(AUDIT_ACTIONS) for _ in range(total))
+            ), total)
+
+    def derived(self):
+        for label, rebuild in (
+            ('stock counters', stock.rebuild),
+            ('valuation', valuation.rebuild),
+            ('low-stock flags', lowstock.sync),
+            ('search index', search.rebuild),
+        ):
+            started = time.perf_counter()
+            rebuild()
+            self.timings[label] = time.perf_counter() - started
+            self.report(label, 1, 1)
+
+    # -------------------------------------------------
+    # Run
+    # -------------------------------------------------
+    def run(self, derived=True):
+        self.reference_data()
+        self.units_and_users()
+        self.products()
+        self.items()
+        self.requests()
+        self.loans()
+        self.notifications()
+        self.audit_logs()
+        # Explicit ids leave PostgreSQL sequences behind; SQLite needs nothing.
+        models = [ProductCategory, UnitOfMeasurement, BusinessUnit, User, Product, Item, Request]
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
+        if derived:
+            self.derived()
+        # Cached counts and everything keyed by a version counter predate the load.
+        cache.clear()
+        versions.bump_all()
+        return self.timings
+
@@ -1,3 +1,1509 @@
-from django.test import TestCase
+"""
+View benchmarks.
 
-# Create your tests here.
+Seeds a configurable data volume, then requests every URL in
+inventory_app/urls.py as the role that uses it and records wall time, SQL
+query count and SQL time. Each view is checked against its entry in
+benchmark_budgets.json: more queries than budgeted fails, and so does a
+median wall time above the stored baseline times INVENTORY_BENCH_TOLERANCE
+(latency is only checked at the scale the baselines were recorded at).
+
+Environment:
+    INVENTORY_BENCH_SCALE      data volume multiplier (default 1)
+    INVENTORY_BENCH_REPEAT     timed runs per view (default 5)
+    INVENTORY_BENCH_TOLERANCE  allowed slowdown over the baseline (default 3.0)
+    INVENTORY_BENCH_OUTPUT     write the results to this file (not written by default)
+    INVENTORY_BENCH_UPDATE=1   rewrite benchmark_budgets.json from this run
+
+Compare two result files with `manage.py compare_benchmarks OLD NEW`.
+"""
+import csv
+import datetime
+import importlib
+import io
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock, skipUnless
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.db.models import F, QuerySet
+from django.http import HttpResponse
+from django.template import engines
+from django.test import Client, RequestFactory, TestCase
+from django.urls import URLPattern, reverse
+from django.utils import timezone
+
+from . import (
+    allocation, api, archive, audit, bulk, dashboards, export, importer, inbox, ingest, lowstock, metrics, outbox,
+    overdue, pagination, profiling, push, replica, scanner, search, stock, synthetic, urls, valuation, versions,
+)
+from .models import (
+    AuditLog, BusinessUnit, Item, Notification, OutboxEvent, Product, ProductCategory, ProductStock, Request,
+    RequestApproval, Transaction, UnitOfMeasurement, User, VersionCounter,
+)
+
+SCALE = int(os.environ.get('INVENTORY_BENCH_SCALE', 1))
+REPEAT = int(os.environ.get('INVENTORY_BENCH_REPEAT', 5))
+TOLERANCE = float(os.environ.get('INVENTORY_BENCH_TOLERANCE', 3.0))
+# Absolute headroom so sub-millisecond baselines don't fail on scheduler noise.
+SLACK_MS = 25
+OUTPUT = os.environ.get('INVENTORY_BENCH_OUTPUT')
+UPDATE = os.environ.get('INVENTORY_BENCH_UPDATE') == '1'
+BUDGETS = Path(__file__).with_name('benchmark_budgets.json')
+
+# URL names that are not benchmarked, and why.
+EXCLUDED = {
+    'notification_stream': 'async SSE stream that stays open until the client disconnects',
+    'borrow_item': 'GET template does not render and POST assigns the business unit to Item.assigned_to',
+}
+
+
+# -------------------------------------------------
+# Data
+# -------------------------------------------------
+def seed(scale):
+    """
+    Bulk-load ``scale`` x the base volume, then rebuild the derived tables
+    (stock counters, valuation, low-stock flags, search index) that
+    bulk_create skips. Returns the users and rows the cases act on.
+    """
+    today = timezone.localdate()
+    now = timezone.now()
+    units = BusinessUnit.objects.bulk_create([BusinessUnit(name=f'Unit {i}') for i in range(3)])
+    uom = UnitOfMeasurement.objects.create(name='Piece', abbreviation='pc')
+    categories = ProductCategory.objects.bulk_create([ProductCategory(name=f'Category {i}') for i in range(5)])
+
+    directors = User.objects.bulk_create([
+        User(username=f'director{i}', password='!', role='DIRECTOR', business_unit=unit)
+        for i, unit in enumerate(units)
+    ])
+    for unit, director in zip(units, directors):
+        unit.director = director
+    BusinessUnit.objects.bulk_update(units, ['director'])
+    employees = User.objects.bulk_create([
+        User(username=f'employee{i}', password='!', role='EMPLOYEE', business_unit=units[i % len(units)])
+        for i in range(20 * scale)
+    ])
+    officer = User.objects.create(username='officer', password='!', role='INVENTORY_OFFICER')
+    admin = User.objects.create(username='admin', password='!', role='ADMIN')
+
+    products = Product.objects.bulk_create([
+        Product(
+            name=f'Laptop model {i}', category=categories[i % len(categories)], unit_of_measurement=uom,
+            price_per_unit=500 + i, reorder_level=i % 4,
+        )
+        for i in range(30 * scale)
+    ])
+    items = Item.objects.bulk_create([
+        Item(
+            product=products[i % len(products)], serial_number=f'SN{i:07d}',
+            purchase_date=today - datetime.timedelta(days=i % 900), condition='New',
+            location=f'Shelf {i % 40}', business_unit=units[i % len(units)],
+        )
+        for i in range(300 * scale)
+    ], batch_size=500)
+
+    statuses = [value for value, _ in Request.STATUS_CHOICES]
+    Request.objects.bulk_create([
+        Request(
+            employee=employees[i % len(employees)], product=products[i % len(products)],
+            reason=f'Replacement laptop {i}', status=statuses[i % len(statuses)],
+            request_date=now - datetime.timedelta(hours=i),
+        )
+        for i in range(300 * scale)
+    ], batch_size=500)
+
+    loans = items[:100 * scale]
+    for n, item in enumerate(loans):
+        item.status = 'Assigned'
+        item.assigned_to = employees[n % len(employees)]
+    Item.objects.bulk_update(loans, ['status', 'assigned_to'], batch_size=500)
+    Transaction.objects.bulk_create([
+        Transaction(
+            item=item, employee=item.assigned_to, expected_return_date=today + datetime.timedelta(days=n % 30 - 5),
+            condition_on_borrow='New',
+        )
+        for n, item in enumerate(loans)
+    ], batch_size=500)
+
+    employee = employees[0]
+    Notification.objects.bulk_create([
+        Notification(recipient=employee, message=f'Notification {i}', is_read=i % 3 == 0)
+        for i in range(100 * scale)
+    ], batch_size=500)
+    AuditLog.objects.bulk_create([
+        AuditLog(user=officer, action_type='Create', object_type='Item', object_id=i, description=f'Seeded entry {i}')
+        for i in range(1000 * scale)
+    ], batch_size=500)
+
+    stock.rebuild()
+    valuation.rebuild()
+    lowstock.sync()
+    search.rebuild()
+    return {
+        'units': units, 'products': products, 'employee': employee, 'director': directors[0],
+        'officer': officer, 'admin': admin, 'uom': uom, 'category': categories[0],
+    }
+
+
+class Fixture:
+    """Seeded rows plus helpers that create fresh rows for write cases."""
+
+    def __init__(self, rows):
+        self.__dict__.update(rows)
+        self.counter = 0
+
+    def next(self):
+        self.counter += 1
+        return self.counter
+
+    def request(self, status):
+        return Request.objects.create(
+            employee=self.employee, product=self.products[0], reason='Benchmark', status=status,
+        )
+
+    def item(self):
+        return Item.objects.create(
+            product=self.products[0], serial_number=f'BENCH{self.next():06d}', purchase_date=timezone.localdate(),
+            condition='New', location='Bench', business_unit=self.units[0],
+        )
+
+    def loan(self):
+        item = self.item()
+        _, loan = scanner.check_out(self.officer, item.serial_number, self.employee)
+        return loan
+
+    def user(self):
+        return User.objects.create(username=f'bench-user{self.next()}', password='!', role='EMPLOYEE')
+
+    def profile(self):
+        request = RequestFactory().get('/bench/')
+        request.user = self.admin
+        profiling.capture(request, lambda r: HttpResponse('ok'), 'cprofile')
+        return profiling.recent(1)[0]['files'][0]
+
+
+# -------------------------------------------------
+# Cases
+# -------------------------------------------------
+class Case:
+    """
+    One benchmarked request. ``prepare(fixture)`` runs outside the timed
+    section and returns ``(url_args, data)``; ``role`` None is anonymous.
+    """
+
+    def __init__(self, name, url_name, role, method='get', prepare=None, json_body=False, query=None):
+        self.name = name
+        self.url_name = url_name
+        self.role = role
+        self.method = method
+        self.prepare = prepare or (lambda f: ((), None))
+        self.json_body = json_body
+        self.query = query or {}
+
+
+def _ids(qs, n=20):
+    return list(qs.values_list('id', flat=True)[:n])
+
+
+CASES = [
+    Case('login', 'login', None),
+    Case('logout', 'logout', 'EMPLOYEE', 'post'),
+    Case('register', 'register', 'ADMIN'),
+    Case('password_change', 'password_change', 'EMPLOYEE'),
+    Case('password_change_done', 'password_change_done', 'EMPLOYEE'),
+
+    Case('dashboard[EMPLOYEE]', 'dashboard', 'EMPLOYEE'),
+    Case('dashboard[DIRECTOR]', 'dashboard', 'DIRECTOR'),
+    Case('dashboard[INVENTORY_OFFICER]', 'dashboard', 'INVENTORY_OFFICER'),
+    Case('dashboard[ADMIN]', 'dashboard', 'ADMIN'),
+
+    Case('notifications', 'notifications', 'EMPLOYEE'),
+    Case('notification_poll', 'notification_poll', 'EMPLOYEE', query={'since': 0}),
+    Case('mark_notifications_read', 'mark_notifications_read', 'EMPLOYEE', 'post',
+         lambda f: ((), {'ids': _ids(Notification.objects.filter(recipient=f.employee))})),
+    Case('mark_all_notifications_read', 'mark_all_notifications_read', 'EMPLOYEE', 'post'),
+
+    Case('create_request', 'create_request', 'EMPLOYEE'),
+    Case('create_request[POST]', 'create_request', 'EMPLOYEE', 'post',
+         lambda f: ((), {'product': f.products[0].id, 'reason': 'Benchmark'})),
+    Case('approve_request[DIRECTOR]', 'approve_request', 'DIRECTOR', 'get',
+         lambda f: ((f.request('PENDING_DIRECTOR').id,), None)),
+    Case('approve_request[INVENTORY_OFFICER]', 'approve_request', 'INVENTORY_OFFICER', 'get',
+         lambda f: ((f.request('PENDING_OFFICER').id,), None)),
+    Case('reject_request[DIRECTOR]', 'reject_request', 'DIRECTOR', 'get',
+         lambda f: ((f.request('PENDING_DIRECTOR').id,), None)),
+    Case('reject_request[INVENTORY_OFFICER]', 'reject_request', 'INVENTORY_OFFICER', 'get',
+         lambda f: ((f.request('PENDING_OFFICER').id,), None)),
+    Case('bulk_process_requests', 'bulk_process_requests', 'DIRECTOR', 'post',
+         lambda f: ((), {'action': 'approve', 'ids': [f.request('PENDING_DIRECTOR').id for _ in range(20)]})),
+    Case('allocation_stats', 'allocation_stats', 'INVENTORY_OFFICER'),
+    Case('metrics', 'metrics', 'ADMIN'),
+    # Matches no path, so later cases only pay the switch check.
+    Case('profiling_switch', 'profiling_switch', 'ADMIN', 'post',
+         lambda f: ((), {'path': '/bench-unmatched/', 'rate': 1, 'mode': 'cprofile', 'minutes': 1})),
+    Case('profile_file', 'profile_file', 'ADMIN', 'get', lambda f: ((f.profile(),), None)),
+
+    Case('product_list', 'product_list', 'INVENTORY_OFFICER'),
+    Case('add_product', 'add_product', 'INVENTORY_OFFICER'),
+    Case('add_product[POST]', 'add_product', 'INVENTORY_OFFICER', 'post',
+         lambda f: ((), {
+             'name': f'Bench product {f.next()}', 'category': f.category.id, 'unit_of_measurement': f.uom.id,
+             'price_per_unit': '10.00', 'reorder_level': 0, 'is_active': 'on',
+         })),
+    Case('add_item', 'add_item', 'INVENTORY_OFFICER'),
+    Case('add_item[POST]', 'add_item', 'INVENTORY_OFFICER', 'post',
+         lambda f: ((), {
+             'product': f.products[0].id, 'serial_number': f'BENCHFORM{f.next():06d}',
+             'purchase_date': '2024-01-01', 'condition': 'New', 'status': 'Available',
+             'location': 'Bench', 'business_unit': f.units[0].id,
+         })),
+    Case('import_items', 'import_items', 'INVENTORY_OFFICER'),
+
+    Case('scan_lookup', 'scan_lookup', 'INVENTORY_OFFICER',
+         query={'serials': ','.join(f'SN{i:07d}' for i in range(50))}),
+    Case('scan_check_out', 'scan_check_out', 'INVENTORY_OFFICER', 'post',
+         lambda f: ((), {'serial': f.item().serial_number, 'employee': f.employee.username}), json_body=True),
+    Case('scan_check_in', 'scan_check_in', 'INVENTORY_OFFICER', 'post',
+         lambda f: ((), {'serial': f.loan().item.serial_number}), json_body=True),
+    Case('scan_ingest', 'scan_ingest', 'INVENTORY_OFFICER', 'post',
+         lambda f: ((), {'device': 'bench', 'events': [
+             {'client_id': f'bench-{f.next()}', 'type': 'borrow', 'serial': f.item().serial_number,
+              'employee': f.employee.username}
+             for _ in range(20)
+         ]}), json_body=True),
+
+    Case('api_collection[products]', 'api_collection', 'INVENTORY_OFFICER', 'get', lambda f: (('products',), None)),
+    Case('api_collection[items]', 'api_collection', 'INVENTORY_OFFICER', 'get', lambda f: (('items',), None)),
+    Case('api_collection[requests]', 'api_collection', 'INVENTORY_OFFICER', 'get', lambda f: (('requests',), None)),
+    Case('api_collection[transactions]', 'api_collection', 'INVENTORY_OFFICER', 'get',
+         lambda f: (('transactions',), None)),
+    Case('api_collection[notifications]', 'api_collection', 'EMPLOYEE', 'get', lambda f: (('notifications',), None)),
+    Case('api_collection[requests POST]', 'api_collection', 'EMPLOYEE', 'post',
+         lambda f: (('requests',), {'product': f.products[0].id, 'reason': 'Benchmark'}), json_body=True),
+    Case('api_detail[items]', 'api_detail', 'INVENTORY_OFFICER', 'get',
+         lambda f: (('items', Item.objects.order_by('id').values_list('id', flat=True).first()), None)),
+    Case('api_detail[products PATCH]', 'api_detail', 'INVENTORY_OFFICER', 'patch',
+         lambda f: (('products', f.products[1].id), {'reorder_level': f.next() % 5}), json_body=True),
+    Case('api_action[requests approve]', 'api_action', 'DIRECTOR', 'post',
+         lambda f: (('requests', f.request('PENDING_DIRECTOR').id, 'approve'), {}), json_body=True),
+
+    Case('search', 'search', 'INVENTORY_OFFICER', query={'q': 'laptop'}),
+    Case('valuation_report', 'valuation_report', 'ADMIN'),
+    Case('low_stock_report', 'low_stock_report', 'INVENTORY_OFFICER'),
+
+    Case('manage_users', 'manage_users', 'ADMIN'),
+    Case('edit_user', 'edit_user', 'ADMIN', 'get', lambda f: ((f.employee.id,), None)),
+    Case('delete_user', 'delete_user', 'ADMIN', 'post', lambda f: ((f.user().id,), None)),
+    Case('change_user_role', 'change_user_role', 'ADMIN', 'get', lambda f: ((f.employee.id,), None)),
+
+    Case('audit_logs', 'audit_logs', 'ADMIN'),
+
+    # The GET form of return_item is not measured: its template extends a missing 'base.html'.
+    Case('return_item[POST]', 'return_item', 'EMPLOYEE', 'post',
+         lambda f: ((f.loan().id,), {'condition_on_return': 'Used', 'remarks': ''})),
+    Case('manage_transactions', 'manage_transactions', 'INVENTORY_OFFICER'),
+
+    Case('export_data[items]', 'export_data', 'INVENTORY_OFFICER', 'get', lambda f: (('items',), None)),
+    Case('export_data[transactions]', 'export_data', 'INVENTORY_OFFICER', 'get', lambda f: (('transactions',), None)),
+    Case('export_data[requests]', 'export_data', 'INVENTORY_OFFICER', 'get', lambda f: (('requests',), None)),
+    Case('export_data[audit_logs]', 'export_data', 'ADMIN', 'get', lambda f: (('audit_logs',), None)),
+]
+
+
+# -------------------------------------------------
+# Suite
+# -------------------------------------------------
+class QueryTimer:
+    """Execute wrapper counting queries and their time (finer than the debug cursor's ms)."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+
+
+class ViewBenchmarkTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        started = time.perf_counter()
+        cls.fixture = Fixture(seed(SCALE))
+        cls.seed_seconds = time.perf_counter() - started
+
+    def setUp(self):
+        f = self.fixture
+        self.users = {
+            'EMPLOYEE': f.employee, 'DIRECTOR': f.director, 'INVENTORY_OFFICER': f.officer, 'ADMIN': f.admin,
+        }
+        # Keep the profiling switch and profiles out of the real PROFILE_DIR.
+        profile_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(profile_dir.cleanup)
+        patcher = mock.patch.object(profiling, 'PROFILE_DIR', Path(profile_dir.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(profiling.disable)
+
+    def _client(self, role):
+        client = Client()
+        if role is not None:
+            client.force_login(self.users[role])
+        return client
+
+    def _send(self, client, case, path, data):
+        if case.json_body:
+            return getattr(client, case.method)(path, json.dumps(data or {}), content_type='application/json')
+        if case.method == 'get':
+            return client.get(path, {**case.query, **(data or {})})
+        return getattr(client, case.method)(path, data or {})
+
+    def measure(self, case):
+        runs = []
+        for _ in range(REPEAT):
+            # Logout ends the session, so every case starts from a fresh login.
+            client = self._client(case.role)
+            args, data = case.prepare(self.fixture)
+            path = reverse(case.url_name, args=args)
+            cache.clear()
+            timer = QueryTimer()
+            with connection.execute_wrapper(timer):
+                started = time.perf_counter()
+                response = self._send(client, case, path, data)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                elapsed = time.perf_counter() - started
+            self.assertLess(response.status_code, 400, f'{case.name}: HTTP {response.status_code}')
+            runs.append({
+                'wall_ms': elapsed * 1000,
+                'queries': timer.count,
+                'sql_ms': timer.seconds * 1000,
+                'status': response.status_code,
+            })
+        walls = [r['wall_ms'] for r in runs]
+        return {
+            'url_name': case.url_name,
+            'role': case.role,
+            'method': case.method.upper(),
+            'status': runs[-1]['status'],
+            'queries': max(r['queries'] for r in runs),
+            'wall_ms_median': round(statistics.median(walls), 3),
+            'wall_ms_min': round(min(walls), 3),
+            'wall_ms_max': round(max(walls), 3),
+            'sql_ms_median': round(statistics.median(r['sql_ms'] for r in runs), 3),
+        }
+
+    def test_every_url_is_benchmarked(self):
+        names = {p.name for p in urls.urlpatterns if isinstance(p, URLPattern)}
+        covered = {case.url_name for case in CASES} | set(EXCLUDED)
+        self.assertEqual(sorted(names - covered), [], 'URL names without a benchmark case')
+
+    def test_view_budgets(self):
+        budgets = json.loads(BUDGETS.read_text()) if BUDGETS.exists() else {'scale': SCALE, 'views': {}}
+        check_latency = budgets.get('scale') == SCALE
+        results = {}
+        for case in CASES:
+            result = results[case.name] = self.measure(case)
+            budget = budgets['views'].get(case.name)
+            if UPDATE:
+                continue
+            with self.subTest(view=case.name):
+                self.assertIsNotNone(budget, 'no stored budget; run with INVENTORY_BENCH_UPDATE=1')
+                self.assertLessEqual(
+                    result['queries'], budget['queries'],
+                    f"{result['queries']} queries, budget {budget['queries']}",
+                )
+                if check_latency:
+                    limit = max(budget['wall_ms'] * TOLERANCE, budget['wall_ms'] + SLACK_MS)
+                    self.assertLessEqual(
+                        result['wall_ms_median'], limit,
+                        f"median {result['wall_ms_median']:.1f} ms, baseline {budget['wall_ms']:.1f} ms",
+                    )
+
+        if OUTPUT:
+            Path(OUTPUT).write_text(json.dumps({
+                'meta': {
+                    'timestamp': timezone.now().isoformat(),
+                    'scale': SCALE,
+                    'repeat': REPEAT,
+                    'seed_seconds': round(self.seed_seconds, 3),
+                    'database': connection.vendor,
+                    'python': platform.python_version(),
+                    'django': django.get_version(),
+                },
+                'views': results,
+            }, indent=2) + '\n')
+        if UPDATE:
+            BUDGETS.write_text(json.dumps({
+                'scale': SCALE,
+                'views': {
+                    name: {'queries': r['queries'], 'wall_ms': round(r['wall_ms_median'], 1)}
+                    for name, r in results.items()
+                },
+            }, indent=2) + '\n')
+
+
+# -------------------------------------------------
+# Behavioural tests
+# -------------------------------------------------
+_serials = itertools.count(1)
+
+
+def make_user(username, role='EMPLOYEE', unit=None):
+    return User.objects.create(username=username, password='!', role=role, business_unit=unit)
+
+
+def make_director(username, unit):
+    director = make_user(username, 'DIRECTOR', unit)
+    unit.director = director
+    unit.save()
+    return director
+
+
+def make_product(name='Laptop', price=1000, reorder_level=0):
+    uom, _ = UnitOfMeasurement.objects.get_or_create(name='Piece', defaults={'abbreviation': 'pc'})
+    category, _ = ProductCategory.objects.get_or_create(name='Laptops')
+    return Product.objects.create(
+        name=name, category=category, unit_of_measurement=uom, price_per_unit=price, reorder_level=reorder_level,
+    )
+
+
+def make_item(product, unit, status='Available', **fields):
+    fields = {'purchase_date': timezone.localdate(), 'condition': 'New', 'location': 'Shelf', **fields}
+    return Item.objects.create(
+        product=product, business_unit=unit, serial_number=f'T{next(_serials):05d}', status=status, **fields,
+    )
+
+
+def login(user):
+    client = Client()
+    client.force_login(user)
+    return client
+
+
+class ExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.officer = make_user('officer', 'INVENTORY_OFFICER')
+        cls.admin = make_user('admin', 'ADMIN')
+
+    def test_invalid_calendar_date_is_a_bad_request(self):
+        response = login(self.officer).get(reverse('export_data', args=['items']), {'start': '2024-02-30'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_audit_export_includes_archived_rows(self):
+        old = AuditLog.objects.create(user=self.admin, action_type='Create', object_type='Item', object_id=1,
+                                      description='archived')
+        AuditLog.objects.filter(pk=old.pk).update(timestamp=timezone.now() - datetime.timedelta(days=400))
+        live = AuditLog.objects.create(user=self.admin, action_type='Create', object_type='Item', object_id=2,
+                                       description='live')
+        with tempfile.TemporaryDirectory() as directory, mock.patch.object(archive, 'ARCHIVE_DIR', Path(directory)):
+            archive.archive(older_than_days=365)
+            self.assertFalse(AuditLog.objects.filter(pk=old.pk).exists())
+            body = b''.join(export.stream('audit_logs', 'csv')).decode()
+        ids = [int(row[0]) for row in list(csv.reader(io.StringIO(body)))[1:]]
+        self.assertEqual(ids, [old.pk, live.pk])
+
+
+class IngestTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.unit = BusinessUnit.objects.create(name='Engineering')
+        cls.employee = make_user('employee', unit=cls.unit)
+        cls.officer = make_user('officer', 'INVENTORY_OFFICER')
+        cls.product = make_product()
+
+    def setUp(self):
+        self.item = make_item(self.product, self.unit)
+
+    def borrow(self, client_id, **fields):
+        return {'client_id': client_id, 'type': 'borrow', 'serial': self.item.serial_number,
+                'employee': self.employee.username, **fields}
+
+    def test_impossible_date_only_rejects_that_event(self):
+        response = login(self.officer).post(reverse('scan_ingest'), json.dumps({'events': [
+            self.borrow('bad', expected_return_date='2024-02-30'),
+            self.borrow('bad-ts', occurred_at='2024-02-30T10:00:00'),
+            self.borrow('good'),
+        ]}), content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['outcome'] for r in response.json()['results']], ['invalid', 'invalid', 'borrowed'])
+
+    def test_replayed_client_ids_return_the_stored_outcome(self):
+        first = ingest.ingest(self.officer, [self.borrow('a'), self.borrow('a')])
+        self.assertEqual([(r['outcome'], r['duplicate']) for r in first], [('borrowed', False), ('borrowed', True)])
+        again = ingest.ingest(self.officer, [self.borrow('a')])
+        self.assertEqual(again[0]['outcome'], 'borrowed')
+        self.assertTrue(again[0]['duplicate'])
+        self.assertEqual(again[0]['transaction_id'], first[0]['transaction_id'])
+        self.assertEqual(Transaction.objects.filter(item=self.item).count(), 1)
+
+    def test_borrow_then_return_in_one_batch_nets_out(self):
+        results = ingest.ingest(self.officer, [
+            self.borrow('b1'),
+            {'client_id': 'r1', 'type': 'return', 'serial': self.item.serial_number, 'condition': 'Used'},
+        ])
+        self.assertEqual([r['outcome'] for r in results], ['borrowed', 'returned'])
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.status, self.item.condition), ('Available', 'Used'))
+        self.assertEqual(Transaction.objects.get(item=self.item).status, 'Returned')
+        self.assertEqual(ProductStock.objects.get(product=self.product).available, 1)
+
+
+class ApiTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.unit = BusinessUnit.objects.create(name='Engineering')
+        cls.director = make_director('director', cls.unit)
+        cls.employee = make_user('employee', unit=cls.unit)
+        cls.officer = make_user('officer', 'INVENTORY_OFFICER')
+        cls.product = make_product()
+
+    def setUp(self):
+        self.item = make_item(self.product, self.unit)
+
+    def test_conditional_get_returns_304_until_the_collection_changes(self):
+        client = login(self.officer)
+        url = reverse('api_collection', args=['items'])
+        first = client.get(url)
+        etag = first['ETag']
+        self.assertEqual([row['id'] for row in first.json()['results']], [self.item.pk])
+        self.assertEqual(client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        make_item(self.product, self.unit)
+        changed = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], etag)
+
+    def test_a_bump_from_another_worker_changes_the_etag(self):
+        client = login(self.officer)
+        url = reverse('api_collection', args=['items'])
+        etag = client.get(url)['ETag']
+        # Another process wrote: its bump reaches the shared counter row, not this process's cache.
+        cache.clear()
+        self.assertEqual(client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        VersionCounter.objects.filter(name='item').update(value=F('value') + 1)
+        self.assertEqual(client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_director_etag_follows_their_business_unit(self):
+        client = login(self.director)
+        url = reverse('api_collection', args=['items'])
+        etag = client.get(url)['ETag']
+        other = BusinessUnit.objects.create(name='Sales')
+        self.unit.director = None
+        self.unit.save()
+        other.director = self.director
+        other.save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [])
+
+    def test_invalid_calendar_date_is_a_bad_request(self):
+        response = login(self.employee).post(
+            reverse('api_collection', args=['transactions']),
+            json.dumps({'item': self.item.pk, 'expected_return_date': '2024-02-30'}), content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_token_clients_write_without_csrf(self):
+        client = Client(enforce_csrf_checks=True)
+        url = reverse('api_collection', args=['transactions'])
+        body = json.dumps({'item': self.item.pk})
+        with mock.patch.dict(api.TOKENS, {'secret': self.employee.username}):
+            self.assertEqual(client.post(url, body, content_type='application/json',
+                                         HTTP_AUTHORIZATION='Bearer wrong').status_code, 401)
+            response = client.post(url, body, content_type='application/json', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Transaction.objects.get(pk=response.json()['id']).employee, self.employee)
+
+    def test_session_writes_still_need_a_csrf_token(self):
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.employee)
+        response = client.post(reverse('api_collection', args=['transactions']),
+                               json.dumps({'item': self.item.pk}), content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Transaction.objects.exists())
+
+
+class ScannerTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.unit = BusinessUnit.objects.create(name='Engineering')
+        cls.employee = make_user('employee', unit=cls.unit)
+        cls.officer = make_user('officer', 'INVENTORY_OFFICER')
+        cls.product = make_product()
+
+    def setUp(self):
+        self.item = make_item(self.product, self.unit)
+        self.client = login(self.officer)
+
+    def check_out(self, **fields):
+        return self.client.post(reverse('scan_check_out'), json.dumps({
+            'serial': self.item.serial_number, 'employee': self.employee.username, **fields,
+        }), content_type='application/json')
+
+    def test_malformed_or_impossible_due_dates_are_rejected(self):
+        for due in ('soon', '2024-02-30'):
+            response = self.check_out(expected_return_date=due)
+            self.assertEqual(response.status_code, 400, due)
+            self.assertEqual(response.json(), {'outcome': 'invalid_date'})
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_check_out_then_check_in(self):
+        response = self.check_out(expected_return_date='2030-01-31')
+        self.assertEqual(response.json()['outcome'], 'checked_out')
+        self.assertEqual(self.check_out().status_code, 409)
+        response = self.client.post(reverse('scan_check_in'), json.dumps({'serial': self.item.serial_number}),
+                                    content_type='application/json')
+        self.assertEqual(response.json()['outcome'], 'checked_in')
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.status, 'Available')
+        self.assertEqual(ProductStock.objects.get(product=self.product).available, 1)
+
+
+class ArchiveTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = make_user('admin', 'ADMIN')
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        patcher = mock.patch.object(archive, 'ARCHIVE_DIR', self.directory)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def log(self, days_ago):
+        return self.log_at(timezone.now() - datetime.timedelta(days=days_ago))
+
+    def log_at(self, when):
+        entry = AuditLog.objects.create(user=self.admin, action_type='Update', object_type='Item', object_id=1,
+                                        description=str(when))
+        AuditLog.objects.filter(pk=entry.pk).update(timestamp=when)
+        return entry.pk
+
+    def march(self, day):
+        return datetime.datetime(2020, 3, day, tzinfo=datetime.timezone.utc)
+
+    def test_pages_walk_from_live_rows_into_the_archive(self):
+        ids = [self.log(days) for days in (1, 2, 400, 430, 460, 490)]
+        archive.archive(older_than_days=365)
+        self.assertEqual(AuditLog.objects.count(), 2)
+
+        client = login(self.admin)
+        seen, params = [], {'format': 'json', 'page_size': 4}
+        while True:
+            page = client.get(reverse('audit_logs'), params).json()
+            seen += [row['id'] for row in page['results']]
+            if not page['next_cursor']:
+                break
+            params['cursor'] = page['next_cursor']
+        self.assertEqual(seen, ids)
+
+    def test_pages_only_decompress_the_chunks_they_need(self):
+        ids = [self.log_at(self.march(day)) for day in range(1, 7)]
+        archive.archive(older_than_days=365, batch_size=2)
+        [segment] = archive.load_index()['segments'].values()
+        self.assertEqual([c['rows'] for c in segment['chunks']], [2, 2, 2])
+
+        fetch = archive.audit_fetch(user=self.admin)
+        with mock.patch.object(archive, '_read_chunk', wraps=archive._read_chunk) as read:
+            first = fetch(None, True, 2)
+            deeper = fetch((first[-1]['timestamp'], first[-1]['id']), True, 2)
+        self.assertEqual([r['id'] for r in first + deeper], ids[:1:-1])
+        # Each page opens the chunk holding its cursor and the ones it needs; the oldest is never read.
+        self.assertEqual([c.args[2]['min_id'] for c in read.call_args_list],
+                         [ids[4], ids[4], ids[2]])
+
+    def test_a_rerun_after_a_crash_stores_each_row_once(self):
+        for day in range(1, 5):
+            self.log_at(self.march(day))
+        rows = list(AuditLog.objects.all())
+        # Crash after the index is saved but before the rows are deleted.
+        with mock.patch.object(QuerySet, 'delete', side_effect=RuntimeError('crash')), self.assertRaises(RuntimeError):
+            archive.archive(older_than_days=365, batch_size=2)
+        # Crash after the next chunk is appended but before the index is saved.
+        with mock.patch.object(archive, '_save_index', side_effect=RuntimeError('crash')), \
+                self.assertRaises(RuntimeError):
+            archive.archive(older_than_days=365, batch_size=2)
+
+        archive.archive(older_than_days=365, batch_size=2)
+        self.assertFalse(AuditLog.objects.exists())
+        [segment] = archive.load_index()['segments'].values()
+        self.assertEqual(segment['rows'], 4)
+        self.assertEqual(archive._segment_end(segment), (self.directory / segment['file']).stat().st_size)
+        self.assertEqual(sorted(r['id'] for r in archive.read_segments()), [r.pk for r in rows])
+
+    def test_invalid_calendar_date_is_a_bad_request(self):
+        response = login(self.admin).get(reverse('audit_logs'), {'start': '2024-02-30'})
+        self.assertEqual(response.status_code, 400)
+
+
+class PushTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = make_user('employee')
+        cls.other = make_user('other')
+
+    def setUp(self):
+        self.client = login(self.employee)
+
+    def test_long_poll_is_opt_in(self):
+        poll_url = reverse('notification_poll')
+        self.assertNotContains(self.client.get(reverse('dashboard')), poll_url)
+        with mock.patch.object(push, 'TRANSPORT', 'longpoll'):
+            self.assertContains(self.client.get(reverse('dashboard')), poll_url)
+
+    def test_poll_returns_rows_after_the_high_water_mark(self):
+        Notification.objects.create(recipient=self.employee, message='old')
+        first = self.client.get(reverse('notification_poll')).json()
+        self.assertEqual(first['results'], [])
+        new = Notification.objects.create(recipient=self.employee, message='new')
+        response = self.client.get(reverse('notification_poll'), {'since': first['last_id'], 'timeout': 0}).json()
+        self.assertEqual([row['id'] for row in response['results']], [new.pk])
+        self.assertEqual(response['last_id'], new.pk)
+
+    def test_hub_only_reaches_the_recipients_subscribers(self):
+        mine = push.hub.subscribe(self.employee.id, push.ThreadSubscriber())
+        theirs = push.hub.subscribe(self.other.id, push.ThreadSubscriber())
+        try:
+            self.assertEqual(push.hub.publish(self.employee.id, {'id': 1}), 1)
+        finally:
+            push.hub.unsubscribe(self.employee.id, mine)
+            push.hub.unsubscribe(self.other.id, theirs)
+        self.assertEqual(list(mine.items), [{'id': 1}])
+        self.assertFalse(theirs.event.is_set())
+
+
+class OutboxTests(TestCase):
+
+    def setUp(self):
+        self.handled = []
+        self.failing = set()
+        for patcher in (mock.patch.dict(outbox.HANDLERS, {'test.event': self.handler}),
+                        mock.patch.object(outbox, 'logger')):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def handler(self, payload):
+        if payload['n'] in self.failing:
+            raise RuntimeError('boom')
+        self.handled.append(payload['n'])
+
+    def enqueue(self, *events):
+        outbox.enqueue_bulk([('test.event', aggregate, {'n': n}) for aggregate, n in events])
+
+    def test_events_of_one_aggregate_stay_in_order_across_a_retry(self):
+        self.enqueue(('a', 1), ('b', 2), ('a', 3), ('b', 4))
+        self.failing = {1}
+        self.assertEqual(outbox.drain_all(), 3)
+        self.assertEqual(self.handled, [2, 4])
+        first = OutboxEvent.objects.get(payload__n=1)
+        self.assertEqual((first.status, first.attempts), ('PENDING', 1))
+        self.assertIn('boom', first.last_error)
+
+        self.failing = set()
+        OutboxEvent.objects.filter(pk=first.pk).update(available_at=timezone.now())
+        self.assertEqual(outbox.drain_all(), 2)
+        self.assertEqual(self.handled, [2, 4, 1, 3])
+        self.assertFalse(OutboxEvent.objects.exclude(status='DONE').exists())
+
+    def test_deferred_batches_do_not_stall_the_drain(self):
+        self.enqueue(('a', 1), ('a', 2), ('a', 3), ('b', 4))
+        self.failing = {1}
+        with mock.patch.object(outbox, '_drain', wraps=outbox._drain) as passes:
+            outbox.drain_all(batch_size=2)
+        self.assertEqual(passes.call_count, 3)
+        self.assertEqual(self.handled, [4])
+        self.assertEqual(outbox.backlog()['pending'], 3)
+
+    def test_backlog_lag_is_aggregated_over_the_last_hour(self):
+        self.enqueue(('a', 1), ('a', 2), ('a', 3), ('b', 4))
+        now = timezone.now()
+        for n, lag, age in ((1, 2, 10), (2, 4, 20), (3, 30, 7200)):
+            OutboxEvent.objects.filter(payload__n=n).update(
+                status='DONE', created_at=now - datetime.timedelta(seconds=age + lag),
+                processed_at=now - datetime.timedelta(seconds=age),
+            )
+        with self.assertNumQueries(3):
+            stats = outbox.backlog()
+        self.assertEqual((stats['pending'], stats['done_last_hour']), (1, 2))
+        self.assertAlmostEqual(stats['avg_lag_seconds'], 3)
+        self.assertAlmostEqual(stats['max_lag_seconds'], 4)
+
+        OutboxEvent.objects.filter(status='DONE').delete()
+        stats = outbox.backlog()
+        self.assertEqual((stats['done_last_hour'], stats['avg_lag_seconds'], stats['max_lag_seconds']), (0, None, None))
+
+    def test_events_go_dead_after_max_attempts_and_can_be_requeued(self):
+        self.enqueue(('a', 1))
+        self.failing = {1}
+        with mock.patch.object(outbox, 'MAX_ATTEMPTS', 2):
+            for _ in range(2):
+                OutboxEvent.objects.update(available_at=timezone.now())
+                outbox.drain_all()
+        self.assertEqual(OutboxEvent.objects.get().status, 'DEAD')
+        self.assertEqual(outbox.retry_dead(), 1)
+        self.failing = set()
+        outbox.drain_all()
+        self.assertEqual(self.handled, [1])
+
+
+class ImporterTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.unit = BusinessUnit.objects.create(name='Engineering')
+        cls.officer = make_user('officer', 'INVENTORY_OFFICER')
+        cls.product = make_product()
+
+    def rows(self, *serials):
+        return [
+            (line, {'product': 'Laptop', 'serial_number': serial, 'purchase_date': '2024-01-15', 'condition': 'New',
+                    'location': 'Shelf', 'business_unit': 'Engineering'})
+            for line, serial in enumerate(serials, start=2)
+        ]
+
+    def test_rows_are_validated_and_inserted_a_chunk_at_a_time(self):
+        existing = make_item(self.product, self.unit)
+        rows = self.rows('A1', 'A2', existing.serial_number, 'A2', 'A3')
+        rows[-1][1]['condition'] = 'Shiny'
+        with mock.patch.object(audit, 'MODE', 'sync'):
+            result = importer.import_items(rows, user=self.officer, chunk_size=2)
+        self.assertEqual((result.rows, result.created, result.error_count), (5, 2, 3))
+        self.assertEqual([(line, error) for line, _, error in result.errors], [
+            (4, 'serial_number already exists'),
+            (5, 'serial_number already exists'),
+            (6, "invalid condition 'Shiny'"),
+        ])
+        self.assertEqual(ProductStock.objects.get(product=self.product).available, 3)
+        self.assertEqual(
+            sorted(AuditLog.objects.filter(object_type='Item').values_list('description', flat=True)),
+            ['officer imported item A1', 'officer imported item A2'],
+        )
+
+    def test_dry_run_checks_against_the_table_and_inserts_nothing(self):
+        existing = make_item(self.product, self.unit)
+        result = importer.import_items(self.rows('B1', existing.serial_number, 'B1'), dry_run=True)
+        self.assertEqual((result.created, result.error_count), (1, 2))
+        self.assertEqual(Item.objects.count(), 1)
+
+    def test_undecodable_upload_is_a_form_error(self):
+        upload = SimpleUploadedFile('items.csv', 'product,serial_number\nLäptop,X1\n'.encode('latin-1'))
+        response = login(self.officer).post(reverse('import_items'), {'file': upload, 'dry_run': 'on'})
+        self.assertEqual(response.status_code, 200)
+        self.assertFormError(response.context['form'], 'file', 'The file is not UTF-8 CSV or a valid .xlsx workbook.')
+
+
+class BulkReviewTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.unit = BusinessUnit.objects.create(name='Engineering')
+        cls.director = make_director('director', cls.unit)
+        cls.employee = make_user('employee', unit=cls.unit)
+        cls.officer = make_user('officer', 'INVENTORY_OFFICER')
+        cls.product = make_product()
+
+    def request(self, employee=None, status='PENDING_DIRECTOR'):
+        return Request.objects.create(employee=employee or self.employee, product=self.product, reason='work',
+                                      status=status)
+
+    def test_director_outcomes(self):
+        outsider = make_user('outsider', unit=BusinessUnit.objects.create(name='Sales'))
+        mine, theirs, done = self.request(), self.request(outsider), self.request(status='APPROVED')
+        outcomes = bulk.process_requests(self.director, [mine.pk, theirs.pk, done.pk, 0, mine.pk], 'approve')
+        self.assertEqual(outcomes, {
+            mine.pk: 'approved', theirs.pk: 'forbidden', done.pk: 'already_processed', 0: 'not_found',
+        })
+        mine.refresh_from_db()
+        self.assertEqual(mine.status, 'PENDING_OFFICER')
+        self.assertEqual(RequestApproval.objects.get(request=mine).status, 'APPROVED')
+
+    def test_a_director_without_a_unit_is_refused_everything(self):
+        unassigned = make_user('unassigned')
+        req = self.request(unassigned)
+        director = make_user('drifter', 'DIRECTOR')
+        self.assertEqual(bulk.process_requests(director, [req.pk], 'approve'), {req.pk: 'forbidden'})
+        req.refresh_from_db()
+        self.assertEqual(req.status, 'PENDING_DIRECTOR')
+
+    def test_the_batch_is_notified_with_one_insert(self):
+        reqs = [self.request() for _ in range(3)]
+        bulk.process_requests(self.director, [r.pk for r in reqs], 'reject')
+        self.assertEqual(OutboxEvent.objects.filter(topic='requests.reviewed').count(), 1)
+        with mock.patch.object(inbox, 'notify_bulk', wraps=inbox.notify_bulk) as notify:
+            outbox.drain_all()
+        self.assertEqual(notify.call_count, 1)
+        self.assertEqual(Notification.objects.filter(recipient=self.employee).count(), 3)
+
+    def test_officer_approval_claims_stock_until_it_runs_out(self):
+        item = make_item(self.product, self.unit)
+        first, second = self.request(status='PENDING_OFFICER'), self.request(status='PENDING_OFFICER')
+        outcomes = bulk.process_requests(self.officer, [first.pk, second.pk], 'approve')
+        self.assertEqual(outcomes, {first.pk: 'approved', second.pk: 'no_stock'})
+        item.refresh_from_db()
+        self.assertEqual((item.status, item.assigned_to), ('Assigned', self.employee))
+        second.refresh_from_db()
+        self.assertEqual(second.status, 'PENDING_OFFICER')
+
+    def test_oversized_batches_are_rejected(self):
+        ids = [str(i) for i in range(1, 5)]
+        with mock.patch.object(bulk, 'MAX_BATCH', 3):
+            response = login(self.director).post(reverse('bulk_process_requests'), {'action': 'approve', 'ids': ids})
+            self.assertEqual(response.status_code, 400)
+            with self.assertRaises(ValueError):
+                bulk.process_requests(self.director, [1, 2, 3, 4], 'approve')
+
+
+class LowStockTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.unit = BusinessUnit.objects.create(name='Engineering')
+
+    def test_migration_backfill_matches_sync(self):
+        from django.apps import apps
+        migration = importlib.import_module('inventory_app.migrations.0009_productstock_low_stock_since')
+        never_stocked = make_product('Dock', reorder_level=2)
+        stocked = make_product('Monitor', reorder_level=1)
+        make_item(stocked, self.unit)
+        make_product('Cable')
+        ProductStock.objects.update(low_stock_since=None)
+
+        migration.flag_low_stock(apps, None)
+        backfilled = set(ProductStock.objects.filter(low_stock_since__isnull=False).values_list('product', flat=True))
+        ProductStock.objects.all().delete()
+        make_item(stocked, self.unit)
+        lowstock.sync()
+        synced = set(ProductStock.objects.filter(low_stock_since__isnull=False).values_list('product', flat=True))
+        self.assertEqual(backfilled, synced)
+        self.assertEqual(backfilled, {never_stocked.pk})
+
+
+class StockCounterTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.unit = BusinessUnit.objects.create(name='Engineering')
+        cls.employee = make_user('employee', unit=cls.unit)
+        cls.product = make_product()
+
+    def counts(self):
+        stock_row = ProductStock.objects.get(product=self.product)
+        return stock_row.available, stock_row.assigned, stock_row.total
+
+    def test_counters_follow_item_saves_and_deletes(self):
+        first, second = make_item(self.product, self.unit), make_item(self.product, self.unit)
+        self.assertEqual(self.counts(), (2, 0, 2))
+        first.status = 'Assigned'
+        first.assigned_to = self.employee
+        first.save()
+        self.assertEqual(self.counts(), (1, 1, 2))
+        second.delete()
+        self.assertEqual(self.counts(), (0, 1, 1))
+        self.assertEqual(stock.verify(), ([], []))
+
+    def test_rebuild_repairs_drift(self):
+        make_item(self.product, self.unit)
+        ProductStock.objects.update(available=7)
+        self.assertEqual(len(stock.verify()[0]), 1)
+        stock.rebuild()
+        self.assertEqual(stock.verify(), ([], []))
+        self.assertEqual(self.counts()[0], 1)
+
+    def test_decrement_below_a_drifted_counter_clamps_at_zero(self):
+        item = make_item(self.product, self.unit)
+        ProductStock.objects.update(available=0)
+        item.status = 'Assigned'
+        item.assigned_to = self.employee
+        with self.assertLogs('inventory_app.stock', 'WARNING'):
+            item.save()
+        self.assertEqual(self.counts(), (0, 1, 1))
+
+
+class PaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = make_user('employee')
+        Notification.objects.bulk_create([Notification(recipient=cls.employee, message=f'note {n}') for n in range(5)])
+
+    def setUp(self):
+        self.client = login(self.employee)
+
+    def test_cursors_walk_forward_and_back_without_gaps(self):
+        url = reverse('notifications')
+        pages, params = [], {'format': 'json', 'page_size': 2}
+        while True:
+            page = self.client.get(url, params).json()
+            pages.append([row['id'] for row in page['results']])
+            if not page['next_cursor']:
+                break
+            params['cursor'] = page['next_cursor']
+        expected = list(Notification.objects.order_by('-timestamp', '-id').values_list('id', flat=True))
+        self.assertEqual(sum(pages, []), expected)
+        back = self.client.get(url, {'format': 'json', 'page_size': 2, 'cursor': page['prev_cursor']}).json()
+        self.assertEqual([row['id'] for row in back['results']], pages[-2])
+
+    def test_tampered_cursor_is_a_bad_request(self):
+        stamp = {'dt': timezone.now().isoformat()}
+        forged = [
+            'not-a-cursor',
+            pagination.encode_cursor([1], 'next'),
+            pagination.encode_cursor([[1, 2], 3], 'next'),
+            pagination.encode_cursor([{'x': 1}, 3], 'next'),
+            pagination.encode_cursor([stamp, 'three'], 'next'),
+            pagination.encode_cursor(['yesterday', 3], 'prev'),
+        ]
+        for cursor in forged:
+            response = self.client.get(reverse('notifications'), {'cursor': cursor, 'format': 'json'})
+            self.assertEqual(response.status_code, 400, cursor)
+
+
+class AuditBufferTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = make_user('admin', 'ADMIN')
+
+    def record(self, n, mode=None):
+        return audit.record(self.admin, 'Update', 'Item', n, f'entry {n}', mode=mode)
+
+    def test_entries_reach_the_table_in_one_insert(self):
+        entries = [AuditLog(user=self.admin, action_type='Update', object_type='Item', object_id=n,
+                            description=f'entry {n}') for n in range(3)]
+        with self.assertNumQueries(1):
+            audit.flush(entries, mode='buffered')
+        self.assertEqual(AuditLog.objects.count(), 3)
+
+    def test_sync_mode_writes_inside_the_open_transaction(self):
+        self.record(1, mode='sync')
+        self.assertTrue(AuditLog.objects.filter(object_id=1).exists())
+        with transaction.atomic():
+            self.record(2, mode='sync')
+            transaction.set_rollback(True)
+        self.assertFalse(AuditLog.objects.filter(object_id=2).exists())
+
+    def test_buffered_mode_waits_for_the_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.record(1, mode='buffered')
+        self.assertFalse(AuditLog.objects.exists())
+        for callback in callbacks:
+            callback()
+        self.assertEqual(AuditLog.objects.count(), 1)
+
+
+class InboxTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = make_user('employee')
+        cls.other = make_user('other')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_unread_count_stays_exact_through_bulk_writes_and_reads(self):
+        user = self.employee
+        self.assertEqual(inbox.unread_count(user), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            notes = inbox.notify_bulk([Notification(recipient=user, message=f'n{n}') for n in range(3)])
+        self.assertEqual(inbox.unread_count(user), 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(inbox.mark_read(user, [notes[0].pk, notes[0].pk]), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(inbox.unread_count(user), 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            inbox.mark_all_read(user)
+        self.assertEqual(inbox.unread_count(user), 0)
+        self.assertFalse(Notification.objects.filter(recipient=user, is_read=False).exists())
+
+    def test_mark_read_ignores_other_users_notifications(self):
+        note = Notification.objects.create(recipient=self.other, message='not yours')
+        self.assertEqual(inbox.mark_read(self.employee, [note.pk]), 0)
+        note.refresh_from_db()
+        self.assertFalse(note.is_read)
+
+
+class AllocationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.unit = BusinessUnit.objects.create(name='Engineering')
+        cls.employee = make_user('employee', unit=cls.unit)
+        cls.rival = make_user('rival', unit=cls.unit)
+        cls.product = make_product()
+
+    def item(self, purchase_date, unit=None, **fields):
+        return make_item(self.product, unit or self.unit, purchase_date=purchase_date, **fields)
+
+    def test_strategies_pick_different_items(self):
+        other_unit = BusinessUnit.objects.create(name='Sales')
+        old = self.item(datetime.date(2020, 1, 1), unit=other_unit, condition='Used')
+        local = self.item(datetime.date(2021, 1, 1))
+        new = self.item(datetime.date(2022, 1, 1), unit=other_unit, condition='New')
+        candidates = Item.objects.filter(product=self.product, status='Available')
+        self.assertEqual(allocation.fifo(candidates, self.employee).first(), old)
+        self.assertEqual(allocation.same_unit(candidates, self.employee).first(), local)
+        self.assertEqual(allocation.best_condition(candidates, self.employee).first(), local)
+        Item.objects.filter(pk=local.pk).update(condition='Damaged')
+        self.assertEqual(allocation.best_condition(candidates, self.employee).first(), new)
+
+    def test_a_lost_race_moves_on_to_the_next_candidate(self):
+        first = self.item(datetime.date(2020, 1, 1))
+        second = self.item(datetime.date(2021, 1, 1))
+        update = QuerySet.update
+        raced = []
+
+        def racing_update(qs, **changes):
+            # Another approval takes the first candidate between our read and our UPDATE.
+            if not raced and changes.get('status') == 'Assigned':
+                raced.append(True)
+                update(Item.objects.filter(pk=first.pk), status='Assigned', assigned_to=self.rival)
+            return update(qs, **changes)
+
+        with mock.patch.object(connection.features, 'has_select_for_update_skip_locked', False), \
+                mock.patch.object(QuerySet, 'update', racing_update):
+            claim = allocation.claim_item(self.product.pk, self.employee, 'fifo')
+        self.assertEqual((claim.item_id, claim.attempts), (second.pk, 2))
+        second.refresh_from_db()
+        self.assertEqual((second.status, second.assigned_to), ('Assigned', self.employee))
+
+    def test_nothing_available(self):
+        self.assertIsNone(allocation.claim_item(self.product.pk, self.employee))
+
+
+class ValuationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.unit = BusinessUnit.objects.create(name='Engineering')
+        cls.director = make_director('director', cls.unit)
+        cls.product = make_product()
+
+    def test_summary_follows_items_and_price_changes(self):
+        make_item(self.product, self.unit)
+        make_item(self.product, self.unit, status='Assigned', assigned_to=self.director)
+        report = valuation.report()
+        self.assertEqual((report['total_items'], report['total_value']), (2, 2000))
+        self.product.price_per_unit = 1500
+        self.product.save()
+        self.assertEqual(valuation.report()['total_value'], 3000)
+        self.assertEqual(valuation.verify(), [])
+
+    def test_directors_only_see_their_unit(self):
+        make_item(self.product, self.unit)
+        make_item(self.product, BusinessUnit.objects.create(name='Sales'))
+        response = login(self.director).get(reverse('valuation_report'), {'format': 'json'})
+        self.assertEqual(response.json()['total_items'], 1)
+
+
+class LowStockNotificationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.unit = BusinessUnit.objects.create(name='Engineering')
+        cls.officer = make_user('officer', 'INVENTORY_OFFICER')
+        cls.product = make_product('Dock')
+
+    def test_officers_are_notified_once_per_crossing(self):
+        first, second = make_item(self.product, self.unit), make_item(self.product, self.unit)
+        Product.objects.filter(pk=self.product.pk).update(reorder_level=2)
+        for item in (first, second):
+            item.status = 'Retired'
+            item.save()
+        notes = Notification.objects.filter(recipient=self.officer)
+        self.assertEqual(notes.count(), 1)
+        self.assertIn('Low stock: Dock has 1 available', notes.get().message)
+        self.assertEqual(list(lowstock.low_stock().values_list('product', flat=True)), [self.product.pk])
+        make_item(self.product, self.unit)
+        make_item(self.product, self.unit)
+        self.assertFalse(lowstock.low_stock().exists())
+
+
+class OverdueTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.unit = BusinessUnit.objects.create(name='Engineering')
+        cls.employee = make_user('employee', unit=cls.unit)
+        cls.officer = make_user('officer', 'INVENTORY_OFFICER')
+        cls.product = make_product()
+
+    def loan(self, due):
+        item = make_item(self.product, self.unit, status='Assigned', assigned_to=self.employee)
+        return Transaction.objects.create(item=item, employee=self.employee, expected_return_date=due,
+                                          status='Borrowed')
+
+    def test_sweep_flips_late_loans_and_notifies(self):
+        today = timezone.localdate()
+        late = self.loan(today - datetime.timedelta(days=1))
+        on_time = self.loan(today)
+        self.assertEqual(overdue.sweep(today, dry_run=True), 1)
+        self.assertEqual(overdue.sweep(today), 1)
+        late.refresh_from_db()
+        on_time.refresh_from_db()
+        self.assertEqual((late.status, on_time.status), ('Overdue', 'Borrowed'))
+        self.assertEqual(Notification.objects.filter(recipient=self.employee).count(), 1)
+        self.assertEqual(Notification.objects.get(recipient=self.officer).message, '1 loan(s) became overdue.')
+        self.assertEqual(overdue.sweep(today), 0)
+
+
+class SearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.unit = BusinessUnit.objects.create(name='Engineering')
+        cls.employee = make_user('employee', unit=cls.unit)
+        cls.officer = make_user('officer', 'INVENTORY_OFFICER')
+
+    def search(self, user, query, **params):
+        response = login(user).get(reverse('search'), {'q': query, 'format': 'json', **params})
+        return {(hit['kind'], hit['id']) for hit in response.json()['results']}
+
+    def test_prefix_search_finds_indexed_rows_and_follows_renames(self):
+        dock = make_product('Dock')
+        item = make_item(dock, self.unit)
+        self.assertEqual(self.search(self.officer, 'doc'), {('product', dock.pk)})
+        self.assertEqual(self.search(self.officer, item.serial_number), {('item', item.pk)})
+        dock.name = 'Hub'
+        dock.save()
+        self.assertEqual(self.search(self.officer, 'dock'), set())
+        self.assertEqual(self.search(self.officer, 'hub'), {('product', dock.pk)})
+
+    def test_employees_cannot_search_requests(self):
+        req = Request.objects.create(employee=self.employee, product=make_product(), reason='Laptop for travel')
+        self.assertEqual(self.search(self.officer, 'travel', kind='request'), {('request', req.pk)})
+        self.assertEqual(self.search(self.employee, 'travel', kind='request'), set())
+
+
+class DashboardCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = make_user('employee')
+        cls.product = make_product()
+
+    def setUp(self):
+        cache.clear()
+        self.client = login(self.employee)
+
+    def dashboard(self):
+        return self.client.get(reverse('dashboard'), {'format': 'json'})
+
+    def test_pages_are_cached_until_a_request_changes(self):
+        self.assertEqual(self.dashboard()['X-Dashboard-Cache'], 'miss')
+        self.assertEqual(self.dashboard()['X-Dashboard-Cache'], 'hit')
+        req = Request.objects.create(employee=self.employee, product=self.product, reason='work')
+        response = self.dashboard()
+        self.assertEqual(response['X-Dashboard-Cache'], 'miss')
+        self.assertEqual([row['id'] for row in response.json()['results']], [req.pk])
+
+    def test_other_users_changes_do_not_invalidate(self):
+        self.dashboard()
+        Request.objects.create(employee=make_user('other'), product=self.product, reason='work')
+        self.assertEqual(self.dashboard()['X-Dashboard-Cache'], 'hit')
+
+    def test_a_write_in_another_worker_invalidates(self):
+        self.dashboard()
+        # Another process's bump only reaches the shared counter row, never this process's cache.
+        scope = dashboards.employee_scope(self.employee.pk)
+        VersionCounter.objects.filter(name=scope).update(value=F('value') + 1)
+        self.assertEqual(self.dashboard()['X-Dashboard-Cache'], 'miss')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'SQLite tuning profile')
+class SqliteProfileTests(TestCase):
+
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            return cursor.execute(f'PRAGMA {name}').fetchone()[0]
+
+    def test_connections_apply_the_tuning_pragmas(self):
+        self.assertEqual(self.pragma('busy_timeout'), settings.INVENTORY_SQLITE_PRAGMAS['busy_timeout'])
+        self.assertEqual(self.pragma('synchronous'), 1)  # NORMAL
+        self.assertEqual(self.pragma('temp_store'), 2)  # MEMORY
+
+    def test_atomic_blocks_take_the_write_lock_up_front(self):
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+
+
+class ReplicaRoutingTests(TestCase):
+
+    def setUp(self):
+        self.router = replica.ReplicaRouter()
+
+        @replica.replica_reads
+        def view(request):
+            return HttpResponse(self.router.db_for_read(Item) or 'default')
+        self.view = view
+
+    def test_reads_go_to_the_replica_unless_pinned_or_writing(self):
+        factory = RequestFactory()
+        with mock.patch.object(replica, 'available', return_value=True):
+            self.assertEqual(self.view(factory.get('/')).content, b'replica')
+            self.assertEqual(self.view(factory.post('/')).content, b'default')
+            pinned = factory.get('/')
+            pinned.COOKIES[replica.PIN_COOKIE] = str(time.time() + 60)
+            self.assertEqual(self.view(pinned).content, b'default')
+        self.assertIsNone(self.router.db_for_read(Item))
+        self.assertEqual(self.router.db_for_write(Item), 'default')
+
+    def test_a_get_that_writes_pins_the_writer(self):
+        unit = BusinessUnit.objects.create(name='Engineering')
+        director = make_director('director', unit)
+        req = Request.objects.create(employee=make_user('employee', unit=unit), product=make_product(),
+                                     reason='work')
+        client = login(director)
+        with mock.patch.object(replica, 'configured', return_value=True):
+            self.assertNotIn(replica.PIN_COOKIE, client.get(reverse('notifications')).cookies)
+            response = client.get(reverse('approve_request', args=[req.pk]))
+        self.assertIn(replica.PIN_COOKIE, response.cookies)
+
+    def test_background_threads_start_only_from_the_server_entry_points(self):
+        from django.apps import apps
+        with mock.patch.object(replica.refresher, 'start') as refresher, \
+                mock.patch.object(overdue.scheduler, 'start') as scheduler, \
+                mock.patch.object(outbox.worker, 'start') as worker, \
+                mock.patch.object(outbox, 'MODE', 'thread'), \
+                mock.patch.object(replica, 'is_standin', return_value=True), \
+                mock.patch.object(overdue, 'SWEEP_INTERVAL', 60):
+            apps.get_app_config('inventory_app').ready()
+            self.assertFalse(refresher.called or scheduler.called or worker.called)
+            with mock.patch.dict(sys.modules):
+                sys.modules.pop('inventoryproject.wsgi', None)
+                importlib.import_module('inventoryproject.wsgi')
+        refresher.assert_called_once()
+        scheduler.assert_called_once()
+        worker.assert_called_once()
+
+
+class SyntheticDataTests(TestCase):
+
+    def generate(self, seed):
+        with transaction.atomic():
+            synthetic.Generator(seed=seed, scale=0.001, as_of=datetime.date(2025, 6, 30)).run()
+            rows = list(Item.objects.order_by('serial_number').values_list('serial_number', 'status', 'purchase_date'))
+            problems = stock.verify(), valuation.verify()
+            transaction.set_rollback(True)
+        return rows, problems
+
+    def test_same_seed_same_rows_and_consistent_derived_tables(self):
+        first, problems = self.generate(7)
+        self.assertTrue(first)
+        self.assertEqual(problems, (([], []), []))
+        self.assertEqual(self.generate(7)[0], first)
+        self.assertNotEqual(self.generate(8)[0], first)
+
+    def test_a_load_invalidates_etags_and_cached_pages(self):
+        before = versions.get('item', dashboards.OFFICER)
+        synthetic.Generator(seed=1, scale=0.001, as_of=datetime.date(2025, 6, 30)).run(derived=False)
+        after = versions.get('item', dashboards.OFFICER)
+        self.assertTrue(all(new > old for old, new in zip(before, after)))
+
+
+class MetricsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = make_user('employee', unit=BusinessUnit.objects.create(name='Engineering'))
+        cls.admin = make_user('admin', 'ADMIN')
+
+    def setUp(self):
+        metrics.reset()
+
+    def test_requests_are_timed_and_exported(self):
+        response = login(self.employee).get(reverse('notifications'))
+        self.assertRegex(response['Server-Timing'], r'^app;dur=[0-9.]+, db;dur=[0-9.]+;desc="\d+ queries", tpl;dur=')
+        body = login(self.admin).get(reverse('metrics')).content.decode()
+        self.assertIn('inventory_requests_total{view="notifications",method="GET",status="200"} 1', body)
+
+    def test_metrics_need_an_admin_or_the_scrape_token(self):
+        self.assertEqual(login(self.employee).get(reverse('metrics')).status_code, 403)
+        with mock.patch.object(metrics, 'TOKEN', 'scrape'):
+            self.assertEqual(Client().get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape').status_code, 200)
+            self.assertEqual(Client().get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer nope').status_code, 403)
+
+    def test_template_backend_times_renders_of_sampled_requests(self):
+        [backend] = engines.all()
+        self.assertIsInstance(backend, metrics.TimedDjangoTemplates)
+        template = backend.from_string('{% for i in items %}{{ i }}{% endfor %}')
+        recorder = metrics.Recorder(request=None, sampled=True)
+        token = metrics._current.set(recorder)
+        try:
+            template.render({'items': range(100)})
+        finally:
+            metrics._current.reset(token)
+        self.assertGreater(recorder.template_seconds, 0)
+        self.assertEqual(template.render({'items': [1]}), '1')
+
+    def test_unsampled_requests_are_not_wrapped_unless_slow_queries_are_logged(self):
+        client = login(self.employee)
+        with mock.patch.object(metrics, 'SAMPLE_RATE', 0), \
+                mock.patch.object(metrics, 'Recorder', wraps=metrics.Recorder) as recorder:
+            response = client.get(reverse('notifications'))
+            self.assertNotIn('Server-Timing', response)
+            recorder.assert_not_called()
+            with mock.patch.object(metrics, 'SLOW_QUERY_MS', 50):
+                client.get(reverse('notifications'))
+            recorder.assert_called_once_with(mock.ANY, False)
+
+
+class ProfilingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        unit = BusinessUnit.objects.create(name='Engineering')
+        cls.employee = make_user('employee', unit=unit)
+        cls.director = make_director('director', unit)
+        cls.admin = make_user('admin', 'ADMIN')
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        patcher = mock.patch.object(profiling, 'PROFILE_DIR', Path(directory.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(profiling.disable)
+
+    def test_only_matching_requests_are_profiled(self):
+        profiling.enable(path=reverse('notifications'), username='employee')
+        login(self.employee).get(reverse('dashboard'))
+        login(self.director).get(reverse('notifications'))
+        self.assertEqual(profiling.recent(), [])
+        login(self.employee).get(reverse('notifications'))
+        [meta] = profiling.recent()
+        self.assertEqual((meta['view'], meta['user'], meta['mode']), ('notifications', 'employee', 'cprofile'))
+        self.assertTrue(meta['top'])
+
+        response = login(self.admin).get(reverse('profile_file', args=[meta['files'][0]]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(login(self.admin).get(reverse('profile_file', args=['db.sqlite3'])).status_code, 404)
+
+    def test_expired_switch_is_off(self):
+        profiling.enable(minutes=0)
+        self.assertIsNone(profiling.read_switch())
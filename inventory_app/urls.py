@@ -1,7 +1,7 @@
 from django.urls import path
 from django.contrib.auth.views import LogoutView, PasswordChangeView, PasswordChangeDoneView
 from django.contrib.auth import views as auth_views
-from . import views
+from . import api, views
 
 
 
@@ -25,11 +25,16 @@ urlpatterns = [
 
     # Notifications
     path('notifications/', views.notifications, name='notifications'),
+    path('notifications/mark-read/', views.mark_notifications_read, name='mark_notifications_read'),
+    path('notifications/stream/', views.notification_stream, name='notification_stream'),
+    path('notifications/poll/', views.notification_poll, name='notification_poll'),
+    path('notifications/mark-all-read/', views.mark_all_notifications_read, name='mark_all_notifications_read'),
 
     # Requests
     path('request/create/', views.create_request, name='create_request'),
     path('request/<int:pk>/approve/', views.approve_request, name='approve_request'),
     path('request/<int:pk>/reject/', views.reject_request, name='reject_request'),
+    path('request/bulk/', views.bulk_process_requests, name='bulk_process_requests'),
 
     # Products
     path('products/', views.product_list, name='product_list'),           # list products for Inventory Officer
@@ -37,6 +42,25 @@ urlpatterns = [
 
     # Items
     path('items/add/', views.add_item, name='add_item'),
+    path('items/import/', views.import_items, name='import_items'),
+
+    # Scanner API
+    path('api/scan/', views.scan_lookup, name='scan_lookup'),
+    path('api/scan/check-out/', views.scan_check_out, name='scan_check_out'),
+    path('api/scan/check-in/', views.scan_check_in, name='scan_check_in'),
+    path('api/scan/events/', views.scan_ingest, name='scan_ingest'),
+
+    # JSON API
+    path('api/v1/<str:resource>/', api.collection, name='api_collection'),
+    path('api/v1/<str:resource>/<int:pk>/', api.detail, name='api_detail'),
+    path('api/v1/<str:resource>/<int:pk>/<str:name>/', api.action, name='api_action'),
+
+    # Search
+    path('search/', views.search_view, name='search'),
+
+    # Reports
+    path('reports/valuation/', views.valuation_report, name='valuation_report'),
+    path('reports/low-stock/', views.low_stock_report, name='low_stock_report'),
 
     # Users (Admin)
     path('manage-users/', views.manage_users, name='manage_users'),
@@ -52,4 +76,13 @@ urlpatterns = [
     path('return/<int:pk>/', views.return_item, name='return_item'),
     path('transactions/', views.manage_transactions, name='manage_transactions'),
 
+    # Exports
+    path('export/<str:dataset>/', views.export_data, name='export_data'),
+
+    # Operations (allocation stats, Prometheus metrics, on-demand profiling)
+    path('allocation/stats/', views.allocation_stats, name='allocation_stats'),
+    path('metrics', views.metrics_view, name='metrics'),
+    path('profiling/', views.profiling_switch, name='profiling_switch'),
+    path('profiling/<str:name>', views.profile_file, name='profile_file'),
+
 ]
@@ -0,0 +1,125 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+
+from .models import Item, Product, ProductUnitStock, StockCounts, ValuationSummary
+
+STATUS_FIELDS = StockCounts.STATUS_FIELDS
+
+
+# -------------------------------------------------
+# Incremental maintenance
+# -------------------------------------------------
+def _bump(business_unit_id, category_id, status, count, value):
+    lookup = {'business_unit_id': business_unit_id, 'category_id': category_id, 'status': status}
+    changes = {'item_count': F('item_count') + count, 'total_value': F('total_value') + value}
+    updated = ValuationSummary.objects.filter(**lookup).update(**changes)
+    if not updated and count > 0:
+        ValuationSummary.objects.get_or_create(**lookup)
+        ValuationSummary.objects.filter(**lookup).update(**changes)
+
+
+def adjust(product_id, business_unit_id, status, delta):
+    """Move ``delta`` items of a product in ``status`` into (or out of) its valuation row."""
+    if not delta or status not in STATUS_FIELDS or business_unit_id is None:
+        return
+    row = Product.objects.filter(pk=product_id).values_list('category_id', 'price_per_unit').first()
+    if row is None:
+        return
+    category_id, price = row
+    _bump(business_unit_id, category_id, status, delta, price * delta)
+
+
+def product_changed(product_id, old_category_id, old_price, new_category_id, new_price):
+    """
+    Re-value a product's stock after its category or price changed. Uses the
+    per-unit stock counters, so the cost is one row per business unit holding
+    the product rather than one per item.
+    """
+    old_price, new_price = Decimal(old_price), Decimal(new_price)
+    if old_category_id == new_category_id and old_price == new_price:
+        return
+    fields = list(STATUS_FIELDS.items())
+    with transaction.atomic():
+        rows = ProductUnitStock.objects.filter(product_id=product_id).values(
+            'business_unit_id', *[f for _, f in fields]
+        )
+        for row in rows:
+            for status, field in fields:
+                n = row[field]
+                if not n:
+                    continue
+                _bump(row['business_unit_id'], old_category_id, status, -n, -old_price * n)
+                _bump(row['business_unit_id'], new_category_id, status, n, new_price * n)
+
+
+# -------------------------------------------------
+# Full rebuild and verification
+# -------------------------------------------------
+def compute():
+    """Aggregate straight from Item x Product: {(bu, category, status): (count, value)}."""
+    totals = {}
+    rows = (
+        Item.objects.values('business_unit_id', 'product__category_id', 'status')
+        .annotate(n=Count('id'), value=Sum('product__price_per_unit'))
+        .order_by()
+    )
+    for row in rows:
+        if row['status'] not in STATUS_FIELDS:
+            continue
+        key = (row['business_unit_id'], row['product__category_id'], row['status'])
+        totals[key] = (row['n'], row['value'] or Decimal('0'))
+    return totals
+
+
+def verify():
+    """Return (key, expected, stored) for every grain whose (count, value) has drifted."""
+    expected = compute()
+    stored = {
+        (r['business_unit_id'], r['category_id'], r['status']): (r['item_count'], r['total_value'])
+        for r in ValuationSummary.objects.values('business_unit_id', 'category_id', 'status', 'item_count', 'total_value')
+    }
+    zero = (0, Decimal('0'))
+    return [
+        (key, expected.get(key, zero), stored.get(key, zero))
+        for key in set(expected) | set(stored)
+        if expected.get(key, zero) != stored.get(key, zero)
+    ]
+
+
+def rebuild(batch_size=1000):
+    """Replace the summary table with a fresh aggregate. Returns the number of rows written."""
+    totals = compute()
+    with transaction.atomic():
+        ValuationSummary.objects.all().delete()
+        ValuationSummary.objects.bulk_create([
+            ValuationSummary(business_unit_id=bu, category_id=cat, status=status, item_count=n, total_value=value)
+            for (bu, cat, status), (n, value) in totals.items()
+        ], batch_size=batch_size)
+    return len(totals)
+
+
+# -------------------------------------------------
+# Reports
+# -------------------------------------------------
+def report(business_unit_id=None):
+    """Rollups by business unit, category and status, read from the summary table only."""
+    base = ValuationSummary.objects.filter(item_count__gt=0)
+    if business_unit_id is not None:
+        base = base.filter(business_unit_id=business_unit_id)
+
+    def rollup(*fields):
+        return list(
+            base.values(*fields).annotate(items=Sum('item_count'), value=Sum('total_value')).order_by(*fields)
+        )
+
+    totals = base.aggregate(items=Sum('item_count'), value=Sum('total_value'))
+    return {
+        'by_business_unit': rollup('business_unit__name'),
+        'by_category': rollup('category__name'),
+        'by_status': rollup('status'),
+        'by_unit_and_category': rollup('business_unit__name', 'category__name'),
+        'total_items': totals['items'] or 0,
+        'total_value': totals['value'] or Decimal('0'),
+    }
@@ -0,0 +1,58 @@
+import time
+
+from django.db import router
+from django.db.models import F
+
+from . import replica
+from .models import VersionCounter
+
+# Counters live in the VersionCounter table rather than the cache: the default
+# cache is per-process, so a bump made by one worker would never reach the
+# others and they would keep answering with stale ETags and cached pages.
+
+
+def _seed():
+    # Start from the clock rather than 1, so a counter whose row was lost (e.g.
+    # a database restored from an older dump) never comes back at a value an
+    # old ETag or cache key was built from.
+    return int(time.time() * 1000)
+
+
+def get(*names):
+    """Current counters for ``names`` as a tuple, in order (one query once the rows exist)."""
+    found = dict(VersionCounter.objects.filter(name__in=names).values_list('name', 'value'))
+    missing = [n for n in names if n not in found]
+    if missing:
+        VersionCounter.objects.bulk_create(
+            [VersionCounter(name=n, value=_seed()) for n in missing], ignore_conflicts=True,
+        )
+        # Read back from the primary: a replica may not have the new rows yet.
+        primary = VersionCounter.objects.db_manager(router.db_for_write(VersionCounter))
+        found.update(primary.filter(name__in=missing).values_list('name', 'value'))
+    return tuple(found[n] for n in names)
+
+
+def bump(*names):
+    """
+    Invalidate everything derived from ``names``. The UPDATE is part of the
+    surrounding transaction, so other workers see the new counter exactly
+    when they can see the rows it stands for.
+    """
+    names = list(dict.fromkeys(names))
+    if not names:
+        return
+    replica.note_write()
+    counters = VersionCounter.objects.filter(name__in=names)
+    if counters.update(value=F('value') + 1) < len(names):
+        # Some counter has no row yet. Create it, then bump again in case a
+        # concurrent get() created it first (bumping twice is harmless).
+        VersionCounter.objects.bulk_create(
+            [VersionCounter(name=n, value=_seed()) for n in names], ignore_conflicts=True,
+        )
+        counters.update(value=F('value') + 1)
+
+
+def bump_all():
+    """Invalidate every counter, e.g. after a bulk load that bypassed the save signals."""
+    replica.note_write()
+    VersionCounter.objects.update(value=F('value') + 1)
@@ -6,24 +6,46 @@ from django.utils import timezone
 from django.contrib.auth.views import LoginView
 from django.contrib.auth import login, authenticate
 from django.views.decorators.csrf import csrf_protect
+from django.db import transaction
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from asgiref.sync import sync_to_async
+from django.views.decorators.http import require_POST
+from django.utils.dateparse import parse_date
+from datetime import datetime, time, timedelta
+import json
+from zipfile import BadZipFile
 
 from .forms import (
     CustomUserCreationForm, CustomLoginForm,
-    RequestForm, ProductForm, ItemForm,
-    TransactionForm, AdminUserCreationForm
+    RequestForm, ProductForm, ItemForm, ItemImportForm,
+    TransactionForm, AdminUserCreationForm, ProfilingForm
 )
 from .models import (
     User, BusinessUnit, Request, RequestApproval,
     Product, Item, AuditLog, Notification, Transaction
 )
+from .pagination import (
+    InvalidCursor, paginate_with, page_json_response,
+    render_page, render_paginated, wants_json,
+)
+from .replica import replica_reads
+from . import allocation, archive, audit, bulk, dashboards, export, importer, inbox, ingest, lowstock, metrics, overdue, profiling, push, scanner, search, valuation, versions
+
+REQUEST_JSON_FIELDS = ('id', 'employee__username', 'product__name', 'reason', 'status', 'request_date', 'final_approval_date')
+USER_JSON_FIELDS = ('id', 'username', 'email', 'role', 'business_unit__name', 'date_joined')
 
 @login_required
 def dashboard(request):
     role = request.user.role
 
     if role == 'EMPLOYEE':
-        requests = Request.objects.filter(employee=request.user)
-        return render(request, 'inventory/dashboard_employee.html', {'requests': requests})
+        requests = Request.objects.filter(employee=request.user).select_related('product')
+        return dashboards.render_cached(
+            request, role, request.user.id,
+            (dashboards.employee_scope(request.user.id), dashboards.CATALOG),
+            'inventory/dashboard_employee.html', requests, 'requests',
+            REQUEST_JSON_FIELDS, keys=('request_date', 'id'),
+        )
 
     elif role == 'DIRECTOR':
         try:
@@ -35,20 +57,40 @@ def dashboard(request):
             requests = Request.objects.filter(
                 employee__business_unit=business_unit,
                 status='PENDING_DIRECTOR'
-            )
+            ).select_related('employee__business_unit', 'product')
         else:
             requests = Request.objects.none()
 
-        return render(request, 'inventory/dashboard_director.html', {'requests': requests})
+        unit_id = business_unit.id if business_unit else None
+        return dashboards.render_cached(
+            request, role, unit_id,
+            (dashboards.unit_scope(unit_id), dashboards.DIRECTORY, dashboards.CATALOG),
+            'inventory/dashboard_director.html', requests, 'requests',
+            REQUEST_JSON_FIELDS, keys=('request_date', 'id'),
+        )
 
     elif role == 'INVENTORY_OFFICER':
-        requests = Request.objects.filter(status='PENDING_OFFICER')
-        products = Product.objects.all()
-        return render(request, 'inventory/dashboard_officer.html', {'requests': requests, 'products': products})
+        requests = Request.objects.filter(status='PENDING_OFFICER').select_related('employee__business_unit', 'product')
+        products = Product.objects.select_related('stock')
+        return dashboards.render_cached(
+            request, role, 'all',
+            (dashboards.OFFICER, dashboards.DIRECTORY, dashboards.CATALOG),
+            'inventory/dashboard_officer.html', requests, 'requests',
+            REQUEST_JSON_FIELDS, keys=('request_date', 'id'), context={'products': products},
+        )
 
     elif role == 'ADMIN':
-        users = User.objects.exclude(id=request.user.id)
-        return render(request, 'inventory/dashboard_admin.html', {'users': users})
+        users = User.objects.exclude(id=request.user.id).select_related('business_unit')
+        return dashboards.render_cached(
+            request, role, request.user.id, (dashboards.DIRECTORY,),
+            'inventory/dashboard_admin.html', users, 'users',
+            USER_JSON_FIELDS, keys=('date_joined', 'id'),
+            context={
+                'profiling': profiling.read_switch(),
+                'profiling_form': ProfilingForm(),
+                'profiles': profiling.recent(),
+            },
+        )
 
     else:
         return redirect('login')
@@ -141,8 +183,108 @@ def change_user_role(request, user_id):
 
 @login_required
 def notifications(request):
-    user_notifications = Notification.objects.filter(recipient=request.user)
-    return render(request, 'inventory/notifications.html', {'notifications': user_notifications})
+    unread_only = request.GET.get('unread') == '1'
+    user_notifications = inbox.inbox_queryset(request.user, unread_only=unread_only)
+    return render_paginated(
+        request, 'inventory/notifications.html', user_notifications, 'notifications',
+        ('id', 'message', 'is_read', 'timestamp'), context={'unread_only': unread_only},
+    )
+
+@login_required
+@require_POST
+def mark_notifications_read(request):
+    ids = [int(i) for i in request.POST.getlist('ids') if i.isdigit()]
+    updated = inbox.mark_read(request.user, ids)
+    if wants_json(request):
+        return JsonResponse({'updated': updated})
+    messages.success(request, f'{updated} notification(s) marked as read.')
+    return redirect('notifications')
+
+@login_required
+@require_POST
+def mark_all_notifications_read(request):
+    updated = inbox.mark_all_read(request.user)
+    if wants_json(request):
+        return JsonResponse({'updated': updated})
+    messages.success(request, 'All notifications marked as read.')
+    return redirect('notifications')
+
+# -------------------------------------------------
+# Notification push: SSE under ASGI, long-poll under WSGI
+# -------------------------------------------------
+def _notifications_since(user, since_id, limit=100):
+    rows = (
+        Notification.objects.filter(recipient=user, id__gt=since_id)
+        .order_by('id')
+        .values('id', 'message', 'is_read', 'timestamp')[:limit]
+    )
+    return [dict(row, timestamp=row['timestamp'].isoformat()) for row in rows]
+
+def _sse_event(payload):
+    return f"id: {payload['id']}\nevent: notification\ndata: {json.dumps(payload)}\n\n"
+
+async def notification_stream(request):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponse(status=401)
+    try:
+        last_id = int(request.headers.get('Last-Event-ID') or request.GET.get('since') or 0)
+    except ValueError:
+        last_id = 0
+    subscriber = push.hub.subscribe(user.id, push.AsyncSubscriber())
+
+    async def events():
+        nonlocal last_id
+        try:
+            # Resume after a reconnect; a fresh connection only streams new rows.
+            backlog = await sync_to_async(_notifications_since)(user, last_id) if last_id else []
+            for payload in backlog:
+                last_id = payload['id']
+                yield _sse_event(payload)
+            while True:
+                payload = await subscriber.get(push.HEARTBEAT)
+                if subscriber.overflowed:
+                    subscriber.overflowed = False
+                    for payload in await sync_to_async(_notifications_since)(user, last_id):
+                        last_id = payload['id']
+                        yield _sse_event(payload)
+                    continue
+                if payload is None:
+                    yield ': keepalive\n\n'
+                    continue
+                if payload['id'] > last_id:
+                    last_id = payload['id']
+                    yield _sse_event(payload)
+        finally:
+            push.hub.unsubscribe(user.id, subscriber)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+@login_required
+def notification_poll(request):
+    try:
+        since = int(request.GET.get('since', ''))
+    except ValueError:
+        # First poll: hand back the high-water mark without waiting.
+        latest = Notification.objects.filter(recipient=request.user).order_by('-id').values_list('id', flat=True).first()
+        return JsonResponse({'results': [], 'last_id': latest or 0})
+    try:
+        timeout = min(float(request.GET.get('timeout', push.LONG_POLL_TIMEOUT)), push.LONG_POLL_TIMEOUT)
+    except ValueError:
+        timeout = push.LONG_POLL_TIMEOUT
+
+    # Subscribe before checking so a publish between the check and the wait is not lost.
+    subscriber = push.hub.subscribe(request.user.id, push.ThreadSubscriber())
+    try:
+        results = _notifications_since(request.user, since)
+        if not results and subscriber.wait(timeout):
+            results = _notifications_since(request.user, since)
+    finally:
+        push.hub.unsubscribe(request.user.id, subscriber)
+    return JsonResponse({'results': results, 'last_id': results[-1]['id'] if results else since})
 
 @login_required
 def create_request(request):
@@ -154,12 +296,9 @@ def create_request(request):
         req = form.save(commit=False)
         req.employee = request.user
         req.save()
-        AuditLog.objects.create(
-            user=request.user,
-            action_type='Create',
-            object_type='Request',
-            object_id=req.id,
-            description=f'{request.user.username} requested item {req.product}'
+        audit.record(
+            request.user, 'Create', 'Request', req.id,
+            f'{request.user.username} requested item {req.product}'
         )
         messages.success(request, 'Request submitted successfully.')
         return redirect('dashboard')
@@ -171,38 +310,44 @@ def approve_request(request, pk):
     req = get_object_or_404(Request, pk=pk)
 
     if request.user.role == 'DIRECTOR' and req.status == 'PENDING_DIRECTOR':
-        req.status = 'PENDING_OFFICER'
+        new_status = 'PENDING_OFFICER'
     elif request.user.role == 'INVENTORY_OFFICER' and req.status == 'PENDING_OFFICER':
-        item = Item.objects.filter(product=req.product, status='Available').first()
-        if not item:
-            messages.error(request, 'No available item to assign.')
-            return redirect('dashboard')
-        item.status = 'Assigned'
-        item.assigned_to = req.employee
-        item.save()
-
-        req.status = 'APPROVED'
-        req.final_approval_date = timezone.now()
+        new_status = 'APPROVED'
     else:
         messages.warning(request, 'Unauthorized or invalid request status.')
         return redirect('dashboard')
 
-    req.save()
-
-    RequestApproval.objects.create(
-        request=req,
-        approver=request.user,
-        role=request.user.role,
-        status='APPROVED'
-    )
+    with transaction.atomic():
+        # Compare-and-swap on the status so a request is only ever approved once.
+        changes = {'status': new_status}
+        if new_status == 'APPROVED':
+            changes['final_approval_date'] = timezone.now()
+        if not Request.objects.filter(pk=req.pk, status=req.status).update(**changes):
+            messages.warning(request, 'This request has already been processed.')
+            return redirect('dashboard')
+        dashboards.requests_changed([req.employee_id], (req.status, new_status))
+        for field, value in changes.items():
+            setattr(req, field, value)
+        versions.bump('request')
+
+        if new_status == 'APPROVED':
+            claim = allocation.claim_item(req.product_id, req.employee)
+            if claim is None:
+                transaction.set_rollback(True)
+                messages.error(request, 'No available item to assign.')
+                return redirect('dashboard')
+
+        RequestApproval.objects.create(
+            request=req,
+            approver=request.user,
+            role=request.user.role,
+            status='APPROVED'
+        )
 
-    AuditLog.objects.create(
-        user=request.user,
-        action_type='Approve',
-        object_type='Request',
-        object_id=req.id,
-        description=f'{request.user.username} approved request {req.id}'
-    )
+        audit.record(
+            request.user, 'Approve', 'Request', req.id,
+            f'{request.user.username} approved request {req.id}'
+        )
 
     messages.success(request, 'Request approved successfully.')
     return redirect('dashboard')
@@ -212,32 +357,222 @@ def reject_request(request, pk):
     req = get_object_or_404(Request, pk=pk)
 
     if request.user.role == 'DIRECTOR' and req.status == 'PENDING_DIRECTOR':
-        req.status = 'REJECTED_DIRECTOR'
+        new_status = 'REJECTED_DIRECTOR'
     elif request.user.role == 'INVENTORY_OFFICER' and req.status == 'PENDING_OFFICER':
-        req.status = 'REJECTED_OFFICER'
+        new_status = 'REJECTED_OFFICER'
     else:
         messages.warning(request, 'Unauthorized or invalid request status.')
         return redirect('dashboard')
 
-    req.save()
+    with transaction.atomic():
+        if not Request.objects.filter(pk=req.pk, status=req.status).update(status=new_status):
+            messages.warning(request, 'This request has already been processed.')
+            return redirect('dashboard')
+        dashboards.requests_changed([req.employee_id], (req.status, new_status))
+        req.status = new_status
+        versions.bump('request')
+
+        RequestApproval.objects.create(
+            request=req,
+            approver=request.user,
+            role=request.user.role,
+            status='REJECTED'
+        )
+
+        audit.record(
+            request.user, 'Reject', 'Request', req.id,
+            f'{request.user.username} rejected request {req.id}'
+        )
+
+    messages.success(request, 'Request rejected.')
+    return redirect('dashboard')
+
+@login_required
+@require_POST
+def bulk_process_requests(request):
+    action = request.POST.get('action')
+    if action not in bulk.TRANSITIONS:
+        return HttpResponseBadRequest('Unknown action.')
+    ids = list(dict.fromkeys(int(i) for i in request.POST.getlist('ids') if i.isdigit()))
+    if len(ids) > bulk.MAX_BATCH:
+        return HttpResponseBadRequest(f'At most {bulk.MAX_BATCH} requests per batch.')
+    outcomes = bulk.process_requests(request.user, ids, action)
+
+    summary = {}
+    for outcome in outcomes.values():
+        summary[outcome] = summary.get(outcome, 0) + 1
+    if wants_json(request):
+        return JsonResponse({
+            'results': [{'id': request_id, 'outcome': outcome} for request_id, outcome in outcomes.items()],
+            'summary': summary,
+        })
+    done = summary.get('approved', 0) + summary.get('rejected', 0)
+    messages.success(request, f'{done} of {len(outcomes)} request(s) {action}d.')
+    skipped = {k: v for k, v in summary.items() if k not in ('approved', 'rejected')}
+    if skipped:
+        messages.warning(request, 'Skipped: ' + ', '.join(f"{n} {k.replace('_', ' ')}" for k, n in skipped.items()))
+    return redirect('dashboard')
+
+@login_required
+def allocation_stats(request):
+    if request.user.role not in ('ADMIN', 'INVENTORY_OFFICER'):
+        return redirect('dashboard')
+    return JsonResponse(allocation.stats.snapshot())
+
+# -------------------------------------------------
+# Metrics (Prometheus scrape endpoint)
+# -------------------------------------------------
+def metrics_view(request):
+    # Scrapers authenticate with INVENTORY_METRICS_TOKEN; people need an admin session.
+    scraper = bool(metrics.TOKEN) and request.headers.get('Authorization') == f'Bearer {metrics.TOKEN}'
+    if not scraper and not (request.user.is_authenticated and request.user.role == 'ADMIN'):
+        return HttpResponse('Forbidden', status=403, content_type='text/plain')
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+# -------------------------------------------------
+# On-demand profiling (admin only)
+# -------------------------------------------------
+@login_required
+@require_POST
+def profiling_switch(request):
+    if request.user.role != 'ADMIN':
+        return redirect('dashboard')
+    if 'disable' in request.POST:
+        profiling.disable()
+        messages.success(request, 'Profiling switched off.')
+        return redirect('dashboard')
+
+    form = ProfilingForm(request.POST)
+    if form.is_valid():
+        switch = profiling.enable(**form.cleaned_data)
+        messages.success(request, f"Profiling {switch['mode']} for {form.cleaned_data['minutes']} minute(s).")
+    else:
+        messages.error(request, 'Invalid profiling settings: ' + '; '.join(
+            f'{field}: {" ".join(errors)}' for field, errors in form.errors.items()))
+    return redirect('dashboard')
 
-    RequestApproval.objects.create(
-        request=req,
-        approver=request.user,
-        role=request.user.role,
-        status='REJECTED'
+@login_required
+def profile_file(request, name):
+    if request.user.role != 'ADMIN':
+        return redirect('dashboard')
+    path = profiling.profile_path(name)
+    if path is None:
+        raise Http404('No such profile.')
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=name)
+
+# -------------------------------------------------
+# Scanner API
+# -------------------------------------------------
+def _payload(request):
+    # Handhelds post JSON; forms and curl post form data.
+    if request.content_type == 'application/json':
+        try:
+            body = json.loads(request.body or b'{}')
+        except ValueError:
+            return None
+        return body if isinstance(body, dict) else None
+    return request.POST
+
+def _scanner_forbidden():
+    return JsonResponse({'error': 'forbidden'}, status=403)
+
+@login_required
+def scan_lookup(request):
+    if request.user.role not in ('ADMIN', 'INVENTORY_OFFICER'):
+        return _scanner_forbidden()
+    if request.method == 'POST':
+        payload = _payload(request)
+        if payload is None:
+            return HttpResponseBadRequest('Invalid JSON.')
+        if request.content_type == 'application/json':
+            serials = payload.get('serials')
+        else:
+            serials = payload.getlist('serial')
+    else:
+        serials = request.GET.getlist('serial')
+        for chunk in request.GET.getlist('serials'):
+            serials.extend(chunk.split(','))
+    if not isinstance(serials, list) or not all(isinstance(s, str) for s in serials):
+        return HttpResponseBadRequest('serials must be a list of strings.')
+    return JsonResponse({'results': scanner.lookup(serials)})
+
+@login_required
+@require_POST
+def scan_check_out(request):
+    if request.user.role != 'INVENTORY_OFFICER':
+        return _scanner_forbidden()
+    payload = _payload(request)
+    if payload is None:
+        return HttpResponseBadRequest('Invalid JSON.')
+    employee = scanner.employee_by_username(payload.get('employee'))
+    if employee is None:
+        return JsonResponse({'outcome': 'unknown_employee'}, status=400)
+    due = payload.get('expected_return_date')
+    try:
+        expected_return_date = parse_date(str(due)) if due else None
+    except ValueError:
+        expected_return_date = None
+    if due and expected_return_date is None:
+        return JsonResponse({'outcome': 'invalid_date'}, status=400)
+    outcome, loan = scanner.check_out(
+        request.user, str(payload.get('serial', '')).strip(), employee,
+        expected_return_date=expected_return_date,
+        condition=payload.get('condition') or None,
+        remarks=payload.get('remarks') or '',
     )
+    return _scan_response(outcome, loan)
 
-    AuditLog.objects.create(
-        user=request.user,
-        action_type='Reject',
-        object_type='Request',
-        object_id=req.id,
-        description=f'{request.user.username} rejected request {req.id}'
+@login_required
+@require_POST
+def scan_check_in(request):
+    if request.user.role != 'INVENTORY_OFFICER':
+        return _scanner_forbidden()
+    payload = _payload(request)
+    if payload is None:
+        return HttpResponseBadRequest('Invalid JSON.')
+    outcome, loan = scanner.check_in(
+        request.user, str(payload.get('serial', '')).strip(),
+        condition=payload.get('condition') or None,
+        remarks=payload.get('remarks') or '',
     )
+    return _scan_response(outcome, loan)
 
-    messages.success(request, 'Request rejected.')
-    return redirect('dashboard')
+@login_required
+@require_POST
+def scan_ingest(request):
+    if request.user.role != 'INVENTORY_OFFICER':
+        return _scanner_forbidden()
+    if request.content_type != 'application/json':
+        return HttpResponseBadRequest('Expected a JSON body.')
+    payload = _payload(request)
+    if payload is None or not isinstance(payload.get('events'), list):
+        return HttpResponseBadRequest('Body must be {"events": [...]}.')
+    if len(payload['events']) > ingest.MAX_EVENTS:
+        return HttpResponseBadRequest(f'At most {ingest.MAX_EVENTS} events per batch.')
+    try:
+        results = ingest.ingest(request.user, payload['events'], device=str(payload.get('device') or ''))
+    except ingest.IngestConflict as e:
+        return JsonResponse({'error': str(e)}, status=409)
+    summary = {}
+    for result in results:
+        summary[result['outcome']] = summary.get(result['outcome'], 0) + 1
+    return JsonResponse({'results': results, 'summary': summary})
+
+SCAN_ERROR_STATUS = {'invalid_condition': 400, 'not_found': 404}
+
+def _scan_response(outcome, loan):
+    if loan is None:
+        return JsonResponse({'outcome': outcome}, status=SCAN_ERROR_STATUS.get(outcome, 409))
+    return JsonResponse({
+        'outcome': outcome,
+        'transaction': {
+            'id': loan.id,
+            'status': loan.status,
+            'employee_id': loan.employee_id,
+            'expected_return_date': loan.expected_return_date,
+            'actual_return_date': loan.actual_return_date,
+        },
+    })
 
 @login_required
 def add_product(request):
@@ -247,12 +582,9 @@ def add_product(request):
     form = ProductForm(request.POST or None)
     if form.is_valid():
         product = form.save()
-        AuditLog.objects.create(
-            user=request.user,
-            action_type='Create',
-            object_type='Product',
-            object_id=product.id,
-            description=f'{request.user.username} added product {product.name}'
+        audit.record(
+            request.user, 'Create', 'Product', product.id,
+            f'{request.user.username} added product {product.name}'
         )
         messages.success(request, 'Product added successfully.')
         return redirect('dashboard')
@@ -267,12 +599,9 @@ def add_item(request):
     form = ItemForm(request.POST or None)
     if form.is_valid():
         item = form.save()
-        AuditLog.objects.create(
-            user=request.user,
-            action_type='Create',
-            object_type='Item',
-            object_id=item.id,
-            description=f'{request.user.username} added item {item.serial_number}'
+        audit.record(
+            request.user, 'Create', 'Item', item.id,
+            f'{request.user.username} added item {item.serial_number}'
         )
         messages.success(request, 'Item added successfully.')
         return redirect('dashboard')
@@ -280,23 +609,177 @@ def add_item(request):
     return render(request, 'inventory/add_item.html', {'form': form})
 
 @login_required
+def import_items(request):
+    if request.user.role != 'INVENTORY_OFFICER':
+        return redirect('dashboard')
+
+    result = None
+    form = ItemImportForm(request.POST or None, request.FILES or None)
+    if form.is_valid():
+        upload = form.cleaned_data['file']
+        read = importer.reader_for(upload.name)
+        result = importer.ImportResult()
+        try:
+            importer.import_items(read(upload.file), user=request.user, dry_run=form.cleaned_data['dry_run'], result=result)
+        except ImportError as e:
+            messages.error(request, str(e))
+        except (UnicodeDecodeError, BadZipFile):
+            # Rows are read lazily, so chunks before the bad bytes may already be in.
+            form.add_error('file', 'The file is not UTF-8 CSV or a valid .xlsx workbook.')
+            if result.created:
+                messages.warning(request, f'{result.created} item(s) from the start of the file were imported before the error.')
+            result = None
+        else:
+            verb = 'would be created' if form.cleaned_data['dry_run'] else 'created'
+            messages.success(request, f'{result.rows} row(s) read, {result.created} item(s) {verb}, {result.error_count} error(s).')
+
+    return render(request, 'inventory/import_items.html', {'form': form, 'result': result})
+
+EXPORT_ROLES = {
+    'transactions': ('INVENTORY_OFFICER', 'ADMIN'),
+    'items': ('INVENTORY_OFFICER', 'ADMIN'),
+    'requests': ('INVENTORY_OFFICER', 'ADMIN'),
+    'audit_logs': ('ADMIN',),
+}
+
+@login_required
+@replica_reads
+def export_data(request, dataset):
+    if dataset not in export.DATASETS:
+        return HttpResponseBadRequest('Unknown dataset.')
+    if request.user.role not in EXPORT_ROLES[dataset]:
+        return redirect('dashboard')
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in export.ENCODERS:
+        return HttpResponseBadRequest('Format must be csv or jsonl.')
+    compress = request.GET.get('gzip') == '1'
+    business_unit = request.GET.get('business_unit')
+    try:
+        start = parse_date(request.GET.get('start', ''))
+        end = parse_date(request.GET.get('end', ''))
+    except ValueError:
+        return HttpResponseBadRequest('start and end must be valid dates (YYYY-MM-DD).')
+    filters = {
+        'start': start,
+        'end': end,
+        'business_unit': int(business_unit) if business_unit and business_unit.isdigit() else None,
+        'status': request.GET.get('status') or None,
+    }
+
+    response = StreamingHttpResponse(
+        export.stream(dataset, fmt, compress, **filters),
+        content_type='application/gzip' if compress else export.CONTENT_TYPES[fmt],
+    )
+    filename = f"{dataset}-{timezone.now():%Y%m%d-%H%M%S}.{fmt}{'.gz' if compress else ''}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+@login_required
+@replica_reads
 def product_list(request):
     if request.user.role != 'INVENTORY_OFFICER':
         return redirect('dashboard')
-    products = Product.objects.all()
+    products = Product.objects.select_related('category', 'stock')
     return render(request, 'inventory/product_list.html', {'products': products})
 
+@login_required
+@replica_reads
+def valuation_report(request):
+    role = request.user.role
+    if role not in ('ADMIN', 'DIRECTOR', 'INVENTORY_OFFICER'):
+        return redirect('dashboard')
+    # Directors only see the business unit they run.
+    business_unit_id = None
+    if role == 'DIRECTOR':
+        unit = getattr(request.user, 'businessunit', None)
+        business_unit_id = unit.id if unit is not None else -1
+    report = valuation.report(business_unit_id)
+    if wants_json(request):
+        return JsonResponse(report)
+    return render(request, 'inventory/valuation_report.html', report)
+
+@login_required
+@replica_reads
+def low_stock_report(request):
+    if request.user.role not in ('ADMIN', 'INVENTORY_OFFICER'):
+        return redirect('dashboard')
+    rows = lowstock.low_stock()
+    if wants_json(request):
+        return JsonResponse({'results': [
+            {
+                'product_id': row.product_id,
+                'product': row.product.name,
+                'category': row.product.category.name,
+                'available': row.available,
+                'reorder_level': row.product.reorder_level,
+                'low_stock_since': row.low_stock_since,
+            }
+            for row in rows
+        ]})
+    return render(request, 'inventory/low_stock_report.html', {'rows': rows})
+
+# Requests are only searchable by roles that can already see every request.
+SEARCH_KINDS = {
+    'ADMIN': ('product', 'item', 'request'),
+    'INVENTORY_OFFICER': ('product', 'item', 'request'),
+}
+
+@login_required
+def search_view(request):
+    query = request.GET.get('q', '').strip()
+    allowed = SEARCH_KINDS.get(request.user.role, ('product', 'item'))
+    kinds = [k for k in request.GET.getlist('kind') if k in allowed] or list(allowed)
+    try:
+        page = paginate_with(request, search.fetcher(query, kinds), ('score', 'rowid'))
+    except InvalidCursor:
+        return HttpResponseBadRequest('Invalid cursor.')
+    page.object_list = search.hydrate(page.object_list)
+    if wants_json(request):
+        return page_json_response(page)
+    return render_page(request, 'inventory/search.html', page, 'hits', {
+        'query': query,
+        'kinds': kinds,
+        'allowed_kinds': allowed,
+    })
+
 @login_required
 def manage_users(request):
     if request.user.role != 'ADMIN':
         return redirect('dashboard')
-    users = User.objects.exclude(id=request.user.id)
-    return render(request, 'inventory/admin_user_list.html', {'users': users})
+    users = User.objects.exclude(id=request.user.id).select_related('business_unit')
+    return render_paginated(
+        request, 'inventory/admin_user_list.html', users, 'users',
+        USER_JSON_FIELDS, keys=('date_joined', 'id'),
+    )
 
 @login_required
+@replica_reads
 def audit_logs(request):
-    user_audit_logs = AuditLog.objects.filter(user=request.user)
-    return render(request, 'inventory/audit_logs.html', {'audit_logs': user_audit_logs})
+    # Reads go through the archive so old ranges include rows already moved to cold storage.
+    try:
+        start = _parse_day(request.GET.get('start'))
+        end = _parse_day(request.GET.get('end'), next_day=True)
+    except ValueError:
+        return HttpResponseBadRequest('start and end must be valid dates (YYYY-MM-DD).')
+    fetch = archive.audit_fetch(user=request.user, start=start, end=end)
+    try:
+        page = paginate_with(request, fetch, ('timestamp', 'id'))
+    except InvalidCursor:
+        return HttpResponseBadRequest('Invalid cursor.')
+    if wants_json(request):
+        return page_json_response(page)
+    return render_page(request, 'inventory/audit_logs.html', page, 'logs', {
+        'start': request.GET.get('start', ''),
+        'end': request.GET.get('end', ''),
+    })
+
+def _parse_day(value, next_day=False):
+    day = parse_date(value) if value else None
+    if day is None:
+        return None
+    if next_day:
+        day += timedelta(days=1)
+    return timezone.make_aware(datetime.combine(day, time.min))
 
 @login_required
 def borrow_item(request):
@@ -324,7 +807,7 @@ def borrow_item(request):
 @login_required
 def return_item(request, pk):
     transaction = get_object_or_404(Transaction, pk=pk, employee=request.user)
-    if transaction.status != 'Borrowed':
+    if transaction.status not in overdue.OPEN_STATUSES:
         messages.warning(request, 'This item is already returned or invalid.')
         return redirect('dashboard')
 
@@ -349,8 +832,14 @@ def return_item(request, pk):
     return render(request, 'inventory/return_item.html', {'transaction': transaction})
 
 @login_required
+@replica_reads
 def manage_transactions(request):
     if request.user.role != 'INVENTORY_OFFICER':
         return redirect('dashboard')
-    transactions = Transaction.objects.all()
-    return render(request, 'inventory/manage_transactions.html', {'transactions': transactions})
+    transactions = Transaction.objects.select_related('item__product', 'item__business_unit', 'employee')
+    return render_paginated(
+        request, 'inventory/manage_transactions.html', transactions, 'transactions',
+        ('id', 'item__serial_number', 'item__product__name', 'item__business_unit__name',
+         'employee__username', 'borrow_date', 'expected_return_date', 'actual_return_date', 'status'),
+        keys=('borrow_date', 'id'),
+    )
@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'inventoryproject.settings')
 
 application = get_asgi_application()
+
+# Server processes only: management commands never import this module.
+from inventory_app.apps import start_background_tasks  # noqa: E402
+
+start_background_tasks()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -41,20 +42,26 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Outermost, so its timings cover the rest of the stack.
+    'inventory_app.metrics.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'inventory_app.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'inventory_app.audit.AuditBufferMiddleware',
+    'inventory_app.replica.ReplicaPinMiddleware',
 ]
 
 ROOT_URLCONF = 'inventoryproject.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates that reports render time to inventory_app.metrics.
+        'BACKEND': 'inventory_app.metrics.TimedDjangoTemplates',
         'DIRS': ['templates'],  # Directory for custom templates
         'APP_DIRS': True,
         'OPTIONS': {
@@ -62,6 +69,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'inventory_app.context_processors.unread_notifications',
             ],
         },
     },
@@ -73,13 +81,104 @@ WSGI_APPLICATION = 'inventoryproject.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+#
+# INVENTORY_DB_BACKEND selects the profile: 'sqlite' (default) or 'postgresql'.
+#
+# sqlite: every new connection applies INVENTORY_SQLITE_PRAGMAS. WAL lets
+# readers run alongside the single writer, busy_timeout makes a writer wait
+# for the lock instead of failing with "database is locked", and
+# transaction_mode IMMEDIATE takes the write lock at the start of every
+# atomic() block, so two approvals queue on busy_timeout rather than
+# deadlocking on a read-to-write lock upgrade. Connections are kept for
+# CONN_MAX_AGE seconds instead of being reopened on every request. WAL is a
+# persistent property of the file and adds -wal/-shm files next to it, so
+# db.sqlite3 is a local, untracked database (`manage.py migrate` creates it,
+# `manage.py generate_data` fills it).
+#
+# postgresql: set INVENTORY_DB_BACKEND=postgresql plus POSTGRES_DB,
+# POSTGRES_USER, POSTGRES_PASSWORD, POSTGRES_HOST and POSTGRES_PORT, and
+# install psycopg[pool]. Connections come from psycopg's pool (sized by
+# INVENTORY_DB_POOL_MIN/MAX); Django requires CONN_MAX_AGE = 0 with pooling.
+# None of the pragmas apply there: MVCC row locks replace the file lock.
+
+INVENTORY_DB_BACKEND = os.environ.get('INVENTORY_DB_BACKEND', 'sqlite')
+
+INVENTORY_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',  # durable under WAL except on OS crash / power loss
+    'busy_timeout': 5000,  # ms
+    'mmap_size': 134217728,  # 128 MiB
+    'cache_size': -20000,  # negative = KiB, so ~20 MB of page cache per connection
+    'temp_store': 'MEMORY',
 }
 
+if INVENTORY_DB_BACKEND == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('POSTGRES_DB', 'inventory'),
+            'USER': os.environ.get('POSTGRES_USER', 'inventory'),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+            'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+            'CONN_MAX_AGE': 0,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(os.environ.get('INVENTORY_DB_POOL_MIN', 2)),
+                    'max_size': int(os.environ.get('INVENTORY_DB_POOL_MAX', 10)),
+                    'timeout': 10,
+                },
+            },
+        }
+    }
+    if os.environ.get('POSTGRES_REPLICA_HOST'):
+        DATABASES['replica'] = {
+            **DATABASES['default'],
+            'HOST': os.environ['POSTGRES_REPLICA_HOST'],
+            'PORT': os.environ.get('POSTGRES_REPLICA_PORT', DATABASES['default']['PORT']),
+            'TEST': {'MIRROR': 'default'},
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'CONN_MAX_AGE': 600,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'init_command': ';'.join(f'PRAGMA {k}={v}' for k, v in INVENTORY_SQLITE_PRAGMAS.items()),
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
+    }
+    if os.environ.get('INVENTORY_DB_REPLICA') == 'standin':
+        DATABASES['replica'] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.replica.sqlite3',
+            'CONN_MAX_AGE': 600,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'init_command': 'PRAGMA query_only=ON;PRAGMA busy_timeout=5000;PRAGMA mmap_size=134217728',
+            },
+            'TEST': {'MIRROR': 'default'},
+        }
+
+# Read replica. Views marked @replica_reads (lists, reports, exports) read
+# from DATABASES['replica'] when it exists; writes always go to default, and
+# a user is pinned to default for INVENTORY_REPLICA_PIN_SECONDS after any
+# POST/PUT/PATCH/DELETE, or any other request that wrote (e.g. the GET
+# approve/reject links), so they see their own changes.
+#   PostgreSQL: set POSTGRES_REPLICA_HOST (and POSTGRES_REPLICA_PORT).
+#   SQLite: INVENTORY_DB_REPLICA=standin keeps a local copy, db.replica.sqlite3,
+#   refreshed every INVENTORY_REPLICA_REFRESH_INTERVAL seconds in server processes (or by
+#   `manage.py refresh_replica --every N`); reads fall back to default when the
+#   copy is older than INVENTORY_REPLICA_MAX_LAG seconds.
+DATABASE_ROUTERS = ['inventory_app.replica.ReplicaRouter']
+INVENTORY_REPLICA_PIN_SECONDS = 10
+INVENTORY_REPLICA_REFRESH_INTERVAL = 5
+INVENTORY_REPLICA_MAX_LAG = 60
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -124,4 +223,97 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = 'inventory_app.User'
 LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/'
-LOGOUT_REDIRECT_URL = '/login/'
\ No newline at end of file
+LOGOUT_REDIRECT_URL = '/login/'
+
+# Audit log writer: 'sync' writes each entry immediately (deterministic, for tests),
+# 'buffered' batches a request's entries into one bulk_create at the end of the request,
+# 'background' hands them to an in-process flusher thread with a bounded queue.
+INVENTORY_AUDIT_MODE = 'buffered'
+INVENTORY_AUDIT_QUEUE_SIZE = 10000
+INVENTORY_AUDIT_BATCH_SIZE = 500
+INVENTORY_AUDIT_FLUSH_INTERVAL = 0.5  # seconds
+
+# AuditLog rows older than this are moved to gzip JSONL segments by `manage.py archive_audit_logs`.
+INVENTORY_AUDIT_RETENTION_DAYS = 365
+INVENTORY_AUDIT_ARCHIVE_DIR = BASE_DIR / 'archive' / 'auditlog'
+
+# Seconds a cached unread-notification count may live before it is recounted.
+INVENTORY_UNREAD_CACHE_TTL = 300
+
+# Live notification push for the unread badge: 'off' (badge updates on page
+# load), 'sse' (needs an ASGI server, e.g. `uvicorn inventoryproject.asgi:application`)
+# or 'longpoll' (WSGI/runserver). Each long-poll holds a worker thread for up to
+# LONG_POLL_TIMEOUT seconds, then the page waits POLL_INTERVAL (doubling after
+# errors) before asking again, so size the worker pool before enabling it.
+# The fan-out hub is in-process: a notification created by one process only
+# reaches connections held by that same process, so with several workers or
+# hosts push is best-effort and the badge catches up on the next page load.
+INVENTORY_PUSH_TRANSPORT = 'off'
+INVENTORY_PUSH_HEARTBEAT = 15  # seconds between SSE keepalives
+INVENTORY_PUSH_LONG_POLL_TIMEOUT = 5  # seconds a long-poll request may wait
+INVENTORY_PUSH_POLL_INTERVAL = 15  # seconds between long-polls
+
+# How approve_request picks an Available item: 'fifo' (oldest purchase first),
+# 'same_unit' (requester's business unit first) or 'best_condition'.
+INVENTORY_ALLOCATION_STRATEGY = 'fifo'
+
+# Upper bound on request IDs processed by one bulk approve/reject call.
+INVENTORY_BULK_MAX = 1000
+
+# Seconds between overdue-loan sweeps in server processes; 0 leaves it to `manage.py sweep_overdue` (cron).
+INVENTORY_OVERDUE_SWEEP_INTERVAL = 0
+
+# Scanner API: serials resolved per lookup call, and the default loan length for check-outs.
+INVENTORY_SCAN_MAX = 500
+INVENTORY_SCAN_LOAN_DAYS = 14
+# Upper bound on events accepted by one offline-sync batch (/api/scan/events/).
+INVENTORY_INGEST_MAX = 1000
+
+# JSON API (/api/v1/). ERP/BI clients authenticate with a bearer token that
+# acts as the mapped user; browser sessions keep CSRF protection on writes.
+# INVENTORY_API_TOKENS="token1=erp-sync,token2=bi-reader"
+INVENTORY_API_TOKENS = dict(
+    pair.split('=', 1) for pair in os.environ.get('INVENTORY_API_TOKENS', '').split(',') if '=' in pair
+)
+
+# Per-role dashboard page cache. Pages are keyed by the version counters in the
+# VersionCounter table, which every worker shares, so a write handled by any
+# worker invalidates every worker's copy at once. The TTL only bounds how long
+# superseded entries linger; 0 disables the cache. The pages and the hit/miss
+# counters (`manage.py dashboard_cache_stats`) live in the default cache, so
+# they are per-process unless CACHES points at a shared backend.
+INVENTORY_DASHBOARD_CACHE_TTL = 300
+
+# Per-request instrumentation (Server-Timing header, /metrics for Prometheus).
+# SAMPLE_RATE is the fraction of requests timed; lower it (or set 0) on busy
+# hosts. Set SLOW_QUERY_MS to log queries slower than that to `inventory_app.slow_sql`
+# with their view; this times the SQL of unsampled requests too, so it is off (0)
+# by default. Template render time comes from the TimedDjangoTemplates backend
+# below. Histograms are per process.
+INVENTORY_METRICS_SAMPLE_RATE = 1.0
+INVENTORY_SLOW_QUERY_MS = 0
+INVENTORY_METRICS_SERVER_TIMING = True
+INVENTORY_METRICS_TOKEN = os.environ.get('INVENTORY_METRICS_TOKEN', '')
+
+# On-demand request profiler, switched on from the admin dashboard or
+# `manage.py profile_requests`. The switch and the profiles (.prof for pstats,
+# .folded collapsed stacks for flamegraphs) live in PROFILE_DIR on local disk,
+# so each host profiles and lists its own requests. Oldest beyond KEEP are pruned.
+INVENTORY_PROFILE_DIR = BASE_DIR / 'profiles'
+INVENTORY_PROFILE_KEEP = 50
+INVENTORY_PROFILE_SAMPLE_INTERVAL = 0.005  # seconds between stack samples
+
+# Transactional outbox for signal side effects (request notifications, user and
+# business-unit audit entries). 'thread' writes an OutboxEvent in the caller's
+# transaction and a daemon thread in the same process handles it after commit
+# (server processes start that thread at boot to pick up leftovers); 'external' leaves draining to `manage.py drain_outbox --every 1`; 'sync' runs
+# the handlers inline as before. Failed events retry with exponential backoff
+# (RETRY_BASE doubling up to RETRY_MAX seconds) and are marked DEAD after
+# MAX_ATTEMPTS; events of one aggregate (e.g. one request) stay in order.
+INVENTORY_OUTBOX_MODE = 'thread'
+INVENTORY_OUTBOX_BATCH_SIZE = 100
+INVENTORY_OUTBOX_POLL_INTERVAL = 1.0  # seconds between polls for retries
+INVENTORY_OUTBOX_MAX_ATTEMPTS = 8
+INVENTORY_OUTBOX_RETRY_BASE = 2
+INVENTORY_OUTBOX_RETRY_MAX = 300
+INVENTORY_OUTBOX_RETENTION_HOURS = 24
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'inventoryproject.settings')
 
 application = get_wsgi_application()
+
+# Server processes only: management commands never import this module.
+from inventory_app.apps import start_background_tasks  # noqa: E402
+
+start_background_tasks()